@@ -0,0 +1,262 @@
+"""
+Local stand-in for the Monzo API, for load testing the extractor without touching the real bank API
+
+    python benchmarks/fake_monzo_server.py --transactions 100000 --latency-ms 40 --burst-every 50 --error-rate 0.01
+
+then point an extractor at it with an explicit token, which bypasses the token manager and AWS
+
+    client = MonzoAPIClient(base_url='http://127.0.0.1:8080', access_token='fake-token', account_id='acc_benchmark')
+    extractor = MonzoDataExtractor(monzo_client=client)
+
+(or use FakeMonzoServer.client() in-process).
+
+Serves /ping/whoami, /accounts, /balance, /pots, /transactions (with since/before/limit
+pagination following the real API: `since` is a timestamp or transaction ID, `before` a
+timestamp, at most 100 results per page in created order) and POST /oauth2/token.
+"""
+import os
+import sys
+import json
+import time
+import random
+import bisect
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.generate import generate_transactions, generate_pots
+
+MAX_PAGE_SIZE = 100
+
+def _parse_timestamp(value):
+    """Parse an ISO 8601 timestamp as sent by clients (with or without Z) into a naive UTC datetime"""
+    return datetime.fromisoformat(value.replace('Z', '')).replace(tzinfo=None)
+
+class FakeMonzoServer:
+    """
+    Threaded fake Monzo API with latency, rate-limit and error injection
+
+    Args:
+        transactions: Raw transactions (API shape, merchant expanded) served by /transactions,
+                      split between accounts by their account_id
+        pots: /pots response body (pots are filtered by current_account_id)
+        account_id: Default account, which also owns transactions without an account_id
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free port)
+        latency_ms: Base delay added to every response
+        latency_jitter_ms: Random extra delay of up to this many milliseconds
+        burst_every: After every `burst_every` requests, answer the next `burst_length` with 429 (None disables)
+        burst_length: Number of consecutive 429 responses in a burst
+        retry_after: Retry-After header value sent with 429 responses, in seconds
+        error_rate: Fraction of requests answered with a 500
+        seed: Seed for the latency jitter and error injection
+    """
+    def __init__(self, transactions=None, pots=None, account_id='acc_benchmark', host='127.0.0.1', port=0,
+                 latency_ms=0, latency_jitter_ms=0, burst_every=None, burst_length=3, retry_after=0,
+                 error_rate=0.0, seed=42):
+        self.account_id = account_id
+        by_account = {account_id: []}
+        for transaction in transactions or []:
+            by_account.setdefault(transaction.get('account_id', account_id), []).append(transaction)
+
+        # Per account: transactions in created order, their parsed timestamps, and each ID's position
+        self.accounts = {}
+        for owner, owned in by_account.items():
+            owned.sort(key=lambda transaction: _parse_timestamp(transaction['created']))
+            self.accounts[owner] = (
+                owned,
+                [_parse_timestamp(transaction['created']) for transaction in owned],
+                {transaction['id']: index for index, transaction in enumerate(owned)}
+            )
+        self.pots = pots or {'pots': []}
+
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.status_counts = {}
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def client(self, **kwargs):
+        """MonzoAPIClient for this server's default account, with an explicit fake access token"""
+        from src.utils.api import MonzoAPIClient
+        return MonzoAPIClient(base_url=self.url, access_token='fake-token', account_id=self.account_id, **kwargs)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _injected_failure(self):
+        """Decide, under the lock, whether this request gets a 429 or 500 and how long it is delayed"""
+        with self._lock:
+            self.request_count += 1
+            count = self.request_count
+            delay = (self.latency_ms + self._random.uniform(0, self.latency_jitter_ms)) / 1000
+            fail_roll = self._random.random()
+
+        if self.burst_every:
+            cycle = self.burst_every + self.burst_length
+            if (count - 1) % cycle >= self.burst_every:
+                return delay, 429
+        if fail_roll < self.error_rate:
+            return delay, 500
+        return delay, None
+
+    def _record(self, status):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def transactions_page(self, account_id, params):
+        """Select one page of an account's /transactions following the API's pagination rules"""
+        transactions, created, positions = self.accounts[account_id]
+
+        start = 0
+        since = params.get('since')
+        if since:
+            if since in positions:
+                start = positions[since] + 1
+            else:
+                start = bisect.bisect_left(created, _parse_timestamp(since))
+
+        end = len(transactions)
+        before = params.get('before')
+        if before:
+            end = bisect.bisect_left(created, _parse_timestamp(before))
+
+        limit = min(int(params.get('limit', MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        return transactions[start:max(start, min(end, start + limit))]
+
+    def balance(self, account_id):
+        balance = sum(transaction.get('amount', 0) for transaction in self.accounts[account_id][0])
+        return {'balance': balance, 'total_balance': balance, 'currency': 'GBP', 'spend_today': 0}
+
+    def account_pots(self, account_id):
+        return {'pots': [pot for pot in self.pots['pots'] if pot.get('current_account_id', account_id) == account_id]}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+                server._record(status)
+
+            def _handle(self, method):
+                delay, failure = server._injected_failure()
+                if delay:
+                    time.sleep(delay)
+
+                if failure == 429:
+                    return self._send(429, {'code': 'too_many_requests'}, {'Retry-After': str(server.retry_after)})
+                if failure == 500:
+                    return self._send(500, {'code': 'internal_service'})
+
+                parsed = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+
+                if method == 'POST' and parsed.path == '/oauth2/token':
+                    return self._send(200, {'access_token': 'fake-access-token', 'refresh_token': 'fake-refresh-token',
+                                            'expires_in': 21600, 'token_type': 'Bearer'})
+
+                if not self.headers.get('Authorization', '').startswith('Bearer '):
+                    return self._send(401, {'code': 'unauthorized.bad_access_token'})
+
+                if method != 'GET':
+                    return self._send(405, {'code': 'method_not_allowed'})
+
+                if parsed.path == '/ping/whoami':
+                    return self._send(200, {'authenticated': True, 'client_id': 'oauth2client_fake', 'user_id': 'user_fake'})
+                if parsed.path == '/accounts':
+                    return self._send(200, {'accounts': [
+                        {'id': account_id, 'type': 'uk_retail' if account_id == server.account_id else 'uk_retail_joint',
+                         'closed': False}
+                        for account_id in server.accounts
+                    ]})
+
+                account_id = params.get('account_id', params.get('current_account_id'))
+                if account_id not in server.accounts:
+                    return self._send(403, {'code': 'forbidden.insufficient_permissions'})
+
+                if parsed.path == '/balance':
+                    return self._send(200, server.balance(account_id))
+                if parsed.path == '/pots':
+                    return self._send(200, server.account_pots(account_id))
+                if parsed.path == '/transactions':
+                    return self._send(200, {'transactions': server.transactions_page(account_id, params)})
+                return self._send(404, {'code': 'not_found'})
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                # Drain the form body so the connection can be reused
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self._handle('POST')
+
+        return Handler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run a local fake Monzo API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--transactions', type=int, default=10000, help='Number of synthetic transactions served')
+    parser.add_argument('--pots', type=int, default=10, help='Number of synthetic pots served')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--latency-jitter-ms', type=float, default=0)
+    parser.add_argument('--burst-every', type=int, default=None, help='Requests between bursts of 429 responses')
+    parser.add_argument('--burst-length', type=int, default=3, help='Consecutive 429 responses per burst')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429 responses')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 500')
+    args = parser.parse_args()
+
+    transactions = [transaction for batch in generate_transactions(args.transactions, seed=args.seed) for transaction in batch]
+    server = FakeMonzoServer(transactions=transactions, pots=generate_pots(args.pots, seed=args.seed),
+                             host=args.host, port=args.port, latency_ms=args.latency_ms,
+                             latency_jitter_ms=args.latency_jitter_ms, burst_every=args.burst_every,
+                             burst_length=args.burst_length, retry_after=args.retry_after,
+                             error_rate=args.error_rate, seed=args.seed)
+    print(f'Fake Monzo API serving {len(transactions)} transactions for {server.account_id} at {server.url}')
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
@@ -0,0 +1,145 @@
+"""
+Seeded generator of synthetic Monzo API data for benchmarks
+
+Records have the shape returned by the API (merchant expanded, nested counterparty and
+address), so they exercise the same flattening and loading paths as real extracts.
+"""
+import random
+from datetime import datetime, timedelta
+
+CATEGORIES = ['groceries', 'eating_out', 'transport', 'shopping', 'bills', 'entertainment',
+              'general', 'holidays', 'personal_care', 'family', 'charity', 'expenses']
+CITIES = [('London', 51.5072, -0.1276), ('Manchester', 53.4808, -2.2426), ('Bristol', 51.4545, -2.5879),
+          ('Leeds', 53.8008, -1.5491), ('Edinburgh', 55.9533, -3.1883), ('Cardiff', 51.4816, -3.1791)]
+EMOJIS = ['🛒', '🍔', '🚇', '🛍', '💡', '🎬', '💳', '✈️', '💅', '👪', '🎗', '💼']
+FOREIGN_CURRENCIES = ['EUR', 'USD', 'SEK']
+
+def _build_merchants(rng, count):
+    merchants = []
+    for i in range(count):
+        category_index = rng.randrange(len(CATEGORIES))
+        city, latitude, longitude = rng.choice(CITIES)
+        merchants.append({
+            'id': f'merch_{i:08d}',
+            'group_id': f'grp_{i // 3:08d}',
+            'name': f'Merchant {i}',
+            'category': CATEGORIES[category_index],
+            'logo': f'https://mondo-logo-cache.example/{i}.png',
+            'emoji': EMOJIS[category_index],
+            'online': rng.random() < 0.3,
+            'atm': rng.random() < 0.02,
+            'address': {
+                'address': f'{rng.randint(1, 300)} High Street',
+                'city': city,
+                'postcode': f'{city[:2].upper()}{rng.randint(1, 20)} {rng.randint(1, 9)}AB',
+                'country': 'GBR',
+                'latitude': latitude + rng.uniform(-0.05, 0.05),
+                'longitude': longitude + rng.uniform(-0.05, 0.05)
+            },
+            'metadata': {
+                'google_places_id': f'ChIJ{rng.getrandbits(64):016x}',
+                'suggested_tags': f'#{CATEGORIES[category_index]}',
+                'foursquare_id': f'{rng.getrandbits(48):012x}',
+                'website': f'https://merchant{i}.example'
+            }
+        })
+    return merchants
+
+def _build_counterparties(rng, count):
+    return [{
+        'name': f'Counterparty {i}',
+        'account_number': f'{rng.randint(10000000, 99999999)}',
+        'sort_code': f'{rng.randint(100000, 999999)}',
+        'user_id': f'anonuser_{i:08d}'
+    } for i in range(count)]
+
+def generate_transactions(count, seed=42, batch_size=10000, start=datetime(2020, 1, 1), pot_ids=None,
+                          account_id='acc_benchmark'):
+    """
+    Yield batches of raw transactions in created order
+
+    About 80% are card payments at a pool of merchants, 15% are bank transfers with a
+    counterparty, and the rest are top-ups and pot transfers.
+
+    Args:
+        count: Total number of transactions
+        seed: Random seed, so runs are comparable
+        batch_size: Number of transactions per batch (bounds memory at large counts)
+        start: Created timestamp of the first transaction
+        pot_ids: Pot IDs used in pot transfer descriptions
+        account_id: Account the transactions belong to
+    """
+    rng = random.Random(seed)
+    merchants = _build_merchants(rng, max(10, min(count // 50, 5000)))
+    counterparties = _build_counterparties(rng, max(5, min(count // 200, 1000)))
+    pot_ids = pot_ids or [f'pot_{i:08d}' for i in range(5)]
+
+    created = start
+    batch = []
+    for i in range(count):
+        created += timedelta(seconds=rng.randint(60, 6 * 3600))
+        transaction = {
+            'id': f'tx_{seed:04d}{i:012d}',
+            'account_id': account_id,
+            'created': created.strftime('%Y-%m-%dT%H:%M:%S.') + f'{rng.randint(0, 999):03d}Z',
+            'settled': (created + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S.000Z') if rng.random() < 0.95 else '',
+            'currency': 'GBP',
+            'notes': '' if rng.random() < 0.9 else f'note {i}',
+            'is_load': False,
+            'counterparty': {},
+            'merchant': None,
+            'category': 'general'
+        }
+
+        kind = rng.random()
+        if kind < 0.8:
+            merchant = merchants[int(rng.paretovariate(1.2)) % len(merchants)]
+            amount = -int(rng.lognormvariate(7, 1))
+            transaction.update(description=merchant['name'].upper(), merchant=merchant,
+                               category=merchant['category'], amount=amount)
+            if rng.random() < 0.05:
+                transaction.update(local_amount=int(amount * rng.uniform(1.05, 1.3)),
+                                   local_currency=rng.choice(FOREIGN_CURRENCIES))
+        elif kind < 0.95:
+            counterparty = rng.choice(counterparties)
+            amount = int(rng.lognormvariate(9, 1.2)) * (1 if rng.random() < 0.4 else -1)
+            transaction.update(description=counterparty['name'], counterparty=counterparty, amount=amount)
+        elif kind < 0.97:
+            transaction.update(description='Top up', is_load=True, amount=int(rng.lognormvariate(9, 1)))
+        else:
+            transaction.update(description=rng.choice(pot_ids), amount=-int(rng.lognormvariate(8, 1)))
+
+        transaction.setdefault('local_amount', transaction['amount'])
+        transaction.setdefault('local_currency', 'GBP')
+        batch.append(transaction)
+
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+def generate_pots(count, seed=42, account_id='acc_benchmark'):
+    """Raw /pots response with `count` pots belonging to `account_id`"""
+    rng = random.Random(seed)
+    return {'pots': [{
+        'id': f'pot_{i:08d}',
+        'style': 'beach_ball',
+        'balance': rng.randint(0, 5000000),
+        'currency': 'GBP',
+        'type': 'flexible_savings' if rng.random() < 0.3 else 'default',
+        'product_id': 'default',
+        'current_account_id': account_id,
+        'cover_image_url': f'https://pot-images.example/{i}.png',
+        'isa_wrapper': '',
+        'round_up': rng.random() < 0.2,
+        'round_up_multiplier': None,
+        'is_tax_pot': False,
+        'created': '2020-01-01T00:00:00.000Z',
+        'updated': '2024-01-01T00:00:00.000Z',
+        'deleted': rng.random() < 0.1,
+        'locked': False,
+        'available_for_bills': rng.random() < 0.5,
+        'has_virtual_cards': False
+    } for i in range(count)]}
@@ -0,0 +1,84 @@
+"""
+Profile the import time of the Lambda handler module, as paid on every cold start
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module src.main --budget-ms 400 --top 15
+
+Each run imports the module in a fresh interpreter with `python -X importtime` and the
+median total is checked against the budget. The slowest top-level imports of the median
+run are listed so a regression can be traced to the dependency that caused it.
+
+Exits with status 1 if the median import time is over budget.
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def profile_import(module, python=sys.executable):
+    """
+    Import `module` in a fresh interpreter
+
+    Returns:
+        list: (self_us, cumulative_us, depth, name) per imported module, in import order
+    """
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, capture_output=True, text=True, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'Importing {module} failed:\n{result.stderr}')
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+def top_level_imports(entries):
+    """Imports made directly by the profiled module, slowest first"""
+    min_depth = min(depth for _, _, depth, _ in entries)
+    return sorted(
+        ((cumulative, name) for _, cumulative, depth, name in entries if depth == min_depth + 1),
+        reverse=True
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Profile and budget the import time of the Lambda handler')
+    parser.add_argument('--module', default='src.main', help='Module to import')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to sample')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('IMPORT_TIME_BUDGET_MS', 400)),
+                        help='Maximum median import time in milliseconds')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest imports to list')
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        entries = profile_import(args.module)
+        total_us = next(cumulative for _, cumulative, _, name in reversed(entries) if name == args.module)
+        runs.append((total_us, entries))
+    runs.sort(key=lambda run: run[0])
+    median_us, median_entries = runs[len(runs) // 2]
+
+    print(f'{args.module}: median {median_us / 1000:.1f} ms over {args.runs} runs '
+          f'(min {runs[0][0] / 1000:.1f} ms, max {runs[-1][0] / 1000:.1f} ms, budget {args.budget_ms:.0f} ms)')
+
+    module_entry_depth = next(depth for _, _, depth, name in median_entries if name == args.module)
+    direct = [entry for entry in median_entries if entry[2] >= module_entry_depth]
+    print(f"{'cumulative ms':>14}  import")
+    for cumulative_us, name in top_level_imports(direct)[:args.top]:
+        print(f'{cumulative_us / 1000:>14.1f}  {name}')
+
+    heavy = {name for _, _, _, name in median_entries} & {'boto3', 'pandas', 'pyarrow', 'dotenv'}
+    if heavy:
+        print(f"Heavy dependencies imported eagerly: {', '.join(sorted(heavy))}")
+
+    if statistics.median(total for total, _ in runs) / 1000 > args.budget_ms:
+        print(f'OVER BUDGET: {median_us / 1000:.1f} ms > {args.budget_ms:.0f} ms')
+        sys.exit(1)
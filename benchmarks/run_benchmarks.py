@@ -0,0 +1,163 @@
+"""
+Time each pipeline stage on synthetic data and compare against a stored baseline
+
+    python benchmarks/run_benchmarks.py --sizes 1000,10000,100000
+    python benchmarks/run_benchmarks.py --sizes 1000,10000 --update-baseline
+
+Peak memory is the Python heap high-water mark per stage as reported by tracemalloc (SQLite's
+own page cache is not included). tracemalloc slows allocation-heavy code, so throughputs are
+only comparable with a baseline recorded by this script, not with production timings.
+
+Exits with status 1 if any stage regresses beyond the tolerance.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.api.flatten import TRANSACTION_COLUMNS, flatten_transactions
+from src.utils.initialise_database import initialise_database
+from src.utils.storage_profile import connect_database
+from src.load.load import MonzoBronzeDataLoader
+from src.transform.transform import transform_bronze_to_silver, transform_silver_to_gold
+from benchmarks.generate import generate_transactions, generate_pots
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Stages faster than this are dominated by timer noise, so their throughput isn't compared
+MIN_COMPARABLE_SECONDS = 0.1
+
+class StageTimer:
+    """Accumulates wall time and the peak traced memory of one stage across repeated calls"""
+    def __init__(self):
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self.rows = 0
+
+    def run(self, rows, func, *args, **kwargs):
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.seconds += time.perf_counter() - start
+        self.peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1])
+        self.rows += rows
+        return result
+
+    def summary(self):
+        return {
+            'rows': self.rows,
+            'seconds': round(self.seconds, 4),
+            'rows_per_sec': round(self.rows / self.seconds, 1) if self.seconds else None,
+            'peak_mb': round(self.peak_bytes / 1024 / 1024, 2)
+        }
+
+def benchmark_size(size, seed, batch_size, legacy_max, logger):
+    stages = {name: StageTimer() for name in ('flatten', 'load', 'load_legacy', 'pots', 'bronze_to_silver', 'silver_to_gold')}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'benchmark.db')
+        initialise_database(database_path=db_path, logger=logger)
+        loader = MonzoBronzeDataLoader(db_path=db_path, logger=logger)
+
+        tracemalloc.start()
+        try:
+            conn = connect_database(db_path)
+            try:
+                for batch in generate_transactions(size, seed=seed, batch_size=batch_size):
+                    rows = stages['flatten'].run(len(batch), flatten_transactions, batch)
+                    with conn:
+                        stages['load'].run(len(rows), loader.bulk_insert_transaction_rows, rows, conn)
+                    del batch, rows
+
+                with conn:
+                    stages['pots'].run(max(1, size // 100), loader.upsert_pots, generate_pots(max(1, size // 100), seed=seed), conn)
+            finally:
+                conn.close()
+
+            stages['bronze_to_silver'].run(size, transform_bronze_to_silver, db_path, logger, full_rebuild=True)
+            stages['silver_to_gold'].run(size, transform_silver_to_gold, db_path, logger, full_rebuild=True)
+
+            # The row-at-a-time loader is only run at small sizes, as a reference point
+            if size <= legacy_max:
+                legacy_path = os.path.join(tmp_dir, 'legacy.db')
+                initialise_database(database_path=legacy_path, logger=logger)
+                legacy_loader = MonzoBronzeDataLoader(db_path=legacy_path, logger=logger)
+                for batch in generate_transactions(size, seed=seed, batch_size=batch_size):
+                    transactions = [dict(zip(TRANSACTION_COLUMNS, row)) for row in flatten_transactions(batch)]
+                    stages['load_legacy'].run(len(transactions), legacy_loader.load_data,
+                                              {'transactions': transactions, 'balance': {}, 'pots': {}})
+        finally:
+            tracemalloc.stop()
+
+    return {name: stage.summary() for name, stage in stages.items() if stage.rows}
+
+def compare(results, baseline, tolerance):
+    """
+    Flag stages whose throughput fell, or whose peak memory grew, by more than `tolerance`
+
+    Returns:
+        list: Human-readable regression messages
+    """
+    regressions = []
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            expected = baseline.get(size, {}).get(stage)
+            if not expected:
+                continue
+            comparable = min(result['seconds'], expected['seconds']) >= MIN_COMPARABLE_SECONDS
+            if comparable and result['rows_per_sec'] < expected['rows_per_sec'] * (1 - tolerance):
+                regressions.append(f"{stage} @ {size} rows: {result['rows_per_sec']:.0f} rows/s vs baseline {expected['rows_per_sec']:.0f}")
+            # Small absolute allowance so sub-megabyte stages don't flap
+            if result['peak_mb'] > expected['peak_mb'] * (1 + tolerance) + 1:
+                regressions.append(f"{stage} @ {size} rows: peak {result['peak_mb']} MB vs baseline {expected['peak_mb']} MB")
+    return regressions
+
+def print_results(results, baseline):
+    print(f"{'size':>9} {'stage':<17} {'rows/s':>12} {'baseline':>12} {'peak MB':>9} {'seconds':>9}")
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            expected = baseline.get(size, {}).get(stage, {}).get('rows_per_sec')
+            print(f"{size:>9} {stage:<17} {result['rows_per_sec'] or 0:>12.0f} {expected or 0:>12.0f} "
+                  f"{result['peak_mb']:>9.2f} {result['seconds']:>9.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the ETL stages on synthetic Monzo data')
+    parser.add_argument('--sizes', default='1000,10000', help='Comma-separated transaction counts (e.g. 1000,10000,100000,1000000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the generator')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Transactions generated, flattened and loaded per batch')
+    parser.add_argument('--legacy-max', type=int, default=10000, help='Largest size the row-at-a-time load_data is benchmarked at')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed fractional slowdown or memory growth before flagging a regression')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('--update-baseline', action='store_true', help='Write these results as the new baseline')
+    args = parser.parse_args()
+
+    logger = logging.getLogger('benchmark')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    results = {}
+    for size in (int(value) for value in args.sizes.split(',')):
+        results[str(size)] = benchmark_size(size, args.seed, args.batch_size, args.legacy_max, logger)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+
+    print_results(results, baseline)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f'Baseline written to {args.baseline}')
+        sys.exit(0)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION: {regression}')
+    sys.exit(1 if regressions else 0)
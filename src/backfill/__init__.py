@@ -0,0 +1,3 @@
+from .backfill import backfill_transactions
+
+__all__ = ['backfill_transactions']
@@ -0,0 +1,161 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.utils.api import MonzoAPIClient, AsyncMonzoAPIClient
+from src.utils.pipeline_state import advance_transactions_watermark
+from src.utils.initialise_database import initialise_database
+from src.utils.storage_profile import apply_storage_profile, connect_database
+from src.load.load import MonzoBronzeDataLoader
+
+BACKFILL_WINDOWS_SQL = os.path.join(os.path.dirname(__file__), '../sql/create_backfill_windows.sql')
+
+def ensure_backfill_windows_table(conn):
+    """Create the backfill_windows table if it doesn't exist"""
+    with open(BACKFILL_WINDOWS_SQL, 'r') as file:
+        conn.execute(file.read())
+    conn.commit()
+
+def completed_windows(conn, account_id):
+    """(start, end) ISO timestamps of every window already backfilled for an account"""
+    return conn.execute(
+        'SELECT window_start, window_end FROM backfill_windows WHERE account_id = ?',
+        (account_id,)
+    ).fetchall()
+
+def pending_windows(windows, completed):
+    """
+    Drop windows already covered by a completed one
+
+    Coverage rather than equality is checked, so rerunning with a smaller --window-days
+    still skips history loaded by an earlier run.
+    """
+    return [
+        (since, before) for since, before in windows
+        if not any(start <= since.isoformat() and before.isoformat() <= end for start, end in completed)
+    ]
+
+async def _fetch_window(async_client, since, before, page_size):
+    """Fetch one window, returning the error instead of raising so one failure doesn't cancel the others"""
+    start_time = time.perf_counter()
+    try:
+        rows = await async_client.get_all_transactions(since=since, before=before, page_size=page_size, as_rows=True)
+        return since, before, rows, None, time.perf_counter() - start_time
+    except Exception as e:
+        return since, before, None, e, time.perf_counter() - start_time
+
+async def _backfill_async(conn, loader, async_client, windows, logger, page_size):
+    account_id = async_client.account_id
+    totals = {'windows': 0, 'rows': 0, 'inserted': 0, 'failed': 0}
+
+    tasks = [_fetch_window(async_client, since, before, page_size) for since, before in windows]
+    for task in asyncio.as_completed(tasks):
+        since, before, rows, error, elapsed = await task
+        if error is not None:
+            totals['failed'] += 1
+            logger.error(f'[backfill.py] Window {since:%Y-%m-%d} to {before:%Y-%m-%d} failed after {elapsed:.1f}s: {error}')
+            continue
+
+        # Load each window as soon as it arrives, recording its completion in the same transaction
+        with conn:
+            counts = loader.bulk_insert_transactions(rows, conn)
+            newest = loader.newest_transaction(rows)
+            if newest:
+                advance_transactions_watermark(conn, account_id, *newest)
+            conn.execute('''
+                INSERT OR REPLACE INTO backfill_windows
+                    (account_id, window_start, window_end, rows_loaded, rows_inserted, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (account_id, since.isoformat(), before.isoformat(), len(rows), counts['inserted'],
+                  datetime.now().isoformat()))
+
+        totals['windows'] += 1
+        totals['rows'] += len(rows)
+        totals['inserted'] += counts['inserted']
+        rate = len(rows) / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f'[backfill.py] Window {since:%Y-%m-%d} to {before:%Y-%m-%d} done ({totals["windows"]}/{len(windows)}): '
+            f'{len(rows)} rows fetched, {counts["inserted"]} inserted in {elapsed:.1f}s ({rate:.0f} rows/s)'
+        )
+
+    return totals
+
+def backfill_transactions(db_path, logger, start, end, window_days=30, max_concurrency=4, page_size=100, client=None):
+    """
+    Load historical transactions for [start, end) into the bronze layer
+
+    The range is split into windows of `window_days` that are fetched concurrently (all requests
+    share the container-wide rate limit). Each window is loaded as soon as it has been fetched and
+    recorded in backfill_windows, so rerunning a killed backfill only fetches the windows it hadn't finished.
+
+    Args:
+        db_path: Path to SQLite database file
+        logger: Logger instance
+        start: Start of the range (datetime)
+        end: End of the range (datetime)
+        window_days: Length of each window in days
+        max_concurrency: Maximum number of API requests in flight at once, passed to AsyncMonzoAPIClient.
+            Every window is started together and pages through its results one request at a time, so
+            this also bounds how many windows make progress at once.
+        page_size: Number of transactions per request
+        client: MonzoAPIClient to use (a new one is created if not given)
+
+    Returns:
+        dict: Number of windows completed, rows fetched and rows inserted by this run
+
+    Raises:
+        RuntimeError: If any window failed (after every other window has been loaded)
+    """
+    if not os.path.exists(db_path):
+        logger.info(f'[backfill.py] Database not found. Creating new database at {db_path}')
+        initialise_database(database_path=db_path, logger=logger)
+    # Older databases may lack columns the loader writes (account_id, content_hash)
+    apply_storage_profile(db_path=db_path, logger=logger)
+
+    async_client = AsyncMonzoAPIClient(client=client or MonzoAPIClient(), max_concurrency=max_concurrency)
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=logger)
+
+    conn = connect_database(db_path)
+    try:
+        ensure_backfill_windows_table(conn)
+
+        windows = async_client.split_windows(start, end, timedelta(days=window_days))
+        windows = pending_windows(windows, completed_windows(conn, async_client.account_id))
+        if not windows:
+            logger.info(f'[backfill.py] {start:%Y-%m-%d} to {end:%Y-%m-%d} already backfilled, nothing to do')
+            return {'windows': 0, 'rows': 0, 'inserted': 0, 'failed': 0}
+
+        logger.info(f'[backfill.py] Backfilling {len(windows)} windows of {window_days} days with up to {max_concurrency} concurrent requests')
+        start_time = time.perf_counter()
+        totals = asyncio.run(_backfill_async(conn, loader, async_client, windows, logger, page_size))
+        elapsed = time.perf_counter() - start_time
+
+        logger.info(
+            f'[backfill.py] Backfill completed: {totals["windows"]} windows, {totals["rows"]} rows fetched, '
+            f'{totals["inserted"]} inserted in {elapsed:.1f}s ({totals["rows"] / elapsed if elapsed > 0 else 0:.0f} rows/s)'
+        )
+        if totals['failed']:
+            raise RuntimeError(f"{totals['failed']} backfill windows failed; rerun the same range to retry them")
+        return totals
+    finally:
+        conn.close()
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Backfill historical transactions into the bronze layer')
+    parser.add_argument('--db-path', default=os.getenv('LOCAL_DB_PATH'), help='Path to SQLite database file')
+    parser.add_argument('--from', dest='start', type=_parse_date, required=True, help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='end', type=_parse_date, default=datetime.now(), help='End date, exclusive (YYYY-MM-DD, defaults to now)')
+    parser.add_argument('--window-days', type=int, default=30, help='Length of each window in days')
+    parser.add_argument('--concurrency', type=int, default=4, help='Maximum number of API requests in flight at once')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - monzo-etl - %(levelname)s - %(message)s')
+    backfill_transactions(args.db_path, logging.getLogger('main'), args.start, args.end,
+                          window_days=args.window_days, max_concurrency=args.concurrency)
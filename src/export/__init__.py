@@ -0,0 +1,3 @@
+from .export import export_to_parquet
+
+__all__ = ['export_to_parquet']
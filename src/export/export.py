@@ -0,0 +1,126 @@
+import os
+import sys
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.utils.pipeline_state import ensure_pipeline_state_table, get_state, set_state
+from src.utils.utils import get_client
+from src.utils.storage_profile import connect_database
+from src.transform.transform import month_bounds, silver_months_changed_since, silver_watermark
+
+EXPORT_STATE_KEY = 'export:parquet'
+
+# Tables written as year=YYYY/month=MM partitions, with the filter selecting one partition
+PARTITIONED_TABLES = {
+    'silver_transactions': 'created >= :start AND created < :end',
+    'gold_monthly_spending': 'year = :year AND month = :month',
+    'gold_monthly_category_spending': 'year = :year AND month = :month'
+}
+
+# Small dimension tables rewritten as a single file whenever the silver layer changes
+UNPARTITIONED_TABLES = ['silver_merchants']
+
+SQLITE_TO_ARROW_TYPES = {
+    'INTEGER': ('INTEGER', pa.int64()),
+    'BOOLEAN': ('INTEGER', pa.int64()),
+    'REAL': ('REAL', pa.float64())
+}
+
+def _table_columns(conn, table):
+    """
+    Build a SELECT list that casts each column to its declared type, and the matching Arrow schema
+
+    SQLite columns can hold mixed types, so casting keeps every chunk of a partition on one schema.
+    """
+    select_list = []
+    fields = []
+    for _, name, declared_type, *_ in conn.execute(f'PRAGMA table_info({table})'):
+        sql_type, arrow_type = SQLITE_TO_ARROW_TYPES.get(declared_type.upper(), ('TEXT', pa.string()))
+        select_list.append(f'CAST({name} AS {sql_type}) AS {name}')
+        fields.append(pa.field(name, arrow_type))
+    return ', '.join(select_list), pa.schema(fields)
+
+def _write_parquet(conn, query, params, schema, path, chunk_size):
+    """Stream a query into one Parquet file, reading `chunk_size` rows at a time"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunk_size):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+def export_to_parquet(db_path, logger, output_dir, s3_bucket=None, s3_prefix=None, full_export=False, chunk_size=50000):
+    """
+    Export the silver and gold layers to Parquet, rewriting only the partitions touched since the last export
+
+    Args:
+        db_path: Path to SQLite database file
+        logger: Logger instance
+        output_dir: Local directory the Parquet files are written to
+        s3_bucket: If given with s3_prefix, each file is uploaded to S3 and removed locally
+        s3_prefix: S3 prefix for the exported files
+        full_export: Rewrite every partition instead of only the touched ones
+        chunk_size: Number of rows read from SQLite at a time
+
+    Returns:
+        list: Relative paths of the files written
+    """
+    conn = None
+    try:
+        conn = connect_database(db_path)
+        ensure_pipeline_state_table(conn)
+        conn.commit()
+
+        state = None if full_export else get_state(conn, EXPORT_STATE_KEY)
+        watermark = state['watermark'] if state else None
+        new_watermark = silver_watermark(conn)
+
+        months = silver_months_changed_since(conn, watermark)
+        if not months:
+            logger.info('[export.py] No silver changes since last export, nothing to write')
+            return []
+
+        logger.info(f'[export.py] Exporting {len(months)} month partitions to Parquet')
+        s3_client = get_client('s3') if s3_bucket and s3_prefix else None
+        written = []
+
+        def publish(relative_path, rows):
+            local_path = os.path.join(output_dir, relative_path)
+            if s3_client:
+                s3_key = f"{s3_prefix.rstrip('/')}/{relative_path.replace(os.sep, '/')}"
+                s3_client.upload_file(Filename=local_path, Bucket=s3_bucket, Key=s3_key)
+                os.remove(local_path)
+            written.append(relative_path)
+            logger.debug(f'[export.py] Wrote {rows} rows to {relative_path}')
+
+        for table, partition_filter in PARTITIONED_TABLES.items():
+            select_list, schema = _table_columns(conn, table)
+            query = f'SELECT {select_list} FROM {table} WHERE {partition_filter}'
+            for year, month in months:
+                relative_path = os.path.join(table, f'year={year:04d}', f'month={month:02d}', 'part-0.parquet')
+                start, end = month_bounds(year, month)
+                params = {'year': year, 'month': month, 'start': start, 'end': end}
+                rows = _write_parquet(conn, query, params, schema,
+                                      os.path.join(output_dir, relative_path), chunk_size)
+                publish(relative_path, rows)
+
+        for table in UNPARTITIONED_TABLES:
+            select_list, schema = _table_columns(conn, table)
+            relative_path = os.path.join(table, 'part-0.parquet')
+            rows = _write_parquet(conn, f'SELECT {select_list} FROM {table}', None, schema,
+                                  os.path.join(output_dir, relative_path), chunk_size)
+            publish(relative_path, rows)
+
+        set_state(conn, EXPORT_STATE_KEY, new_watermark)
+        conn.commit()
+
+        logger.info(f'[export.py] Exported {len(written)} Parquet files')
+        return written
+    except Exception as e:
+        logger.error(f'[export.py] Error exporting silver and gold layers to Parquet: {e}')
+        raise
+    finally:
+        if conn:
+            conn.close()
@@ -1,24 +1,111 @@
 import sys
 import os
+import asyncio
 from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from src.utils.api import MonzoAPIClient
+from src.utils.api import MonzoAPIClient, AsyncMonzoAPIClient
 
 class MonzoDataExtractor:
-    """Extract data from Monzo API using MonzoAPIClient and MonzoTokenManager to refresh access token"""
-    def __init__(self, transactions_days_back: int = 30, logger=None):
+    """
+    Extract data from Monzo API using MonzoAPIClient and MonzoTokenManager to refresh access token
+
+    Args:
+        transactions_days_back: Default extraction window when no `since` is given
+        logger: Logger instance
+        use_async: Fetch transactions, balance and pots concurrently with AsyncMonzoAPIClient
+        window_days: In async mode, split the transactions window into chunks of this many days
+                     and fetch them concurrently (None fetches the whole window as one)
+        as_rows: Return transactions as bronze_transactions tuples the loader binds directly,
+                 instead of dicts
+        landing_zone: RawLandingZone the raw API responses are recorded to, for offline replay (optional)
+        monzo_client: MonzoAPIClient to use, e.g. one pointed at a local fake server (defaults to a client
+                      authenticated through MonzoTokenManager; landing_zone is ignored when given)
+    """
+    def __init__(self, transactions_days_back: int = 30, logger=None, use_async: bool = False, window_days: int = None,
+                 as_rows: bool = False, landing_zone=None, monzo_client: MonzoAPIClient = None):
         self.logger = logger
-        self.monzo_client = MonzoAPIClient()
+        self.monzo_client = monzo_client or MonzoAPIClient(landing_zone=landing_zone)
         self.transactions_days_back = transactions_days_back
+        self.use_async = use_async
+        self.window_days = window_days
+        self.as_rows = as_rows
+
+    @property
+    def account_id(self):
+        return self.monzo_client.account_id
+
+    def _client_for(self, account_id=None):
+        if account_id is None or account_id == self.monzo_client.account_id:
+            return self.monzo_client
+        return self.monzo_client.for_account(account_id)
+
+    def discover_accounts(self):
+        """IDs of every open account visible to the access token (personal, joint, ...)"""
+        account_ids = [account['id'] for account in self.monzo_client.list_accounts()]
+        self.logger.info(f"[extract.py] Discovered {len(account_ids)} open accounts")
+        return account_ids
+
+    def extract_accounts(self, since_by_account):
+        """
+        Extract several accounts, concurrently with `use_async`
+
+        With `use_async`, every account's transactions, balance and pots are fetched at the same
+        time on one event loop (split into `window_days` windows if set). All requests share the
+        client's session, so the connection pool and rate limit apply across accounts. Otherwise
+        accounts are fetched one after another, each page following the last.
+
+        Args:
+            since_by_account: Dictionary of account ID to the datetime or transaction ID to fetch transactions since
+
+        Returns:
+            dict: Account ID to a dictionary of transactions, balance and pots
+        """
+        self.logger.info(f"[extract.py] Extracting {len(since_by_account)} accounts {'concurrently' if self.use_async else 'sequentially'}")
+
+        try:
+            if self.use_async:
+                results = asyncio.run(self._extract_accounts_async(since_by_account))
+            else:
+                results = [self._extract_data_sync(since, account_id=account_id)
+                           for account_id, since in since_by_account.items()]
+        except Exception as e:
+            self.logger.error(f"[extract.py] Error extracting data from Monzo API: {e}")
+            raise
+
+        extracted = {}
+        for account_id, (transactions_data, balance_data, pots_data) in zip(since_by_account, results):
+            self.logger.info(f"[extract.py] Account {account_id}: {len(transactions_data)} transactions + balance + pots data")
+            extracted[account_id] = {
+                'transactions': transactions_data,
+                'balance': balance_data,
+                'pots': pots_data
+            }
+        return extracted
 
-    def extract_data(self):
+    async def _extract_accounts_async(self, since_by_account):
+        return await asyncio.gather(*[
+            self._extract_data_async(since, account_id=account_id)
+            for account_id, since in since_by_account.items()
+        ])
+
+    def extract_data(self, since=None):
+        """
+        Args:
+            since: Fetch transactions created after this datetime or transaction ID
+                   (defaults to `transactions_days_back` days ago)
+        """
         self.logger.info("[extract.py] Extracting data from Monzo API")
 
         try:
-            since = datetime.now() - timedelta(days=self.transactions_days_back)
-            transactions_data = self.monzo_client.get_transactions(since=since)
-            balance_data = self.monzo_client.get_balance()
-            pots_data = self.monzo_client.list_pots()
+            if since is None:
+                since = datetime.now() - timedelta(days=self.transactions_days_back)
+            self.logger.info(f"[extract.py] Fetching transactions since {since}")
+
+            if self.use_async:
+                transactions_data, balance_data, pots_data = asyncio.run(self._extract_data_async(since))
+            else:
+                transactions_data, balance_data, pots_data = self._extract_data_sync(since)
+
             self.logger.info(f"[extract.py] Data extracted from Monzo API successfully ({len(transactions_data)} transactions + balance + pots data)")
             return {
                 'transactions': transactions_data,
@@ -27,4 +114,69 @@ class MonzoDataExtractor:
             }
         except Exception as e:
             self.logger.error(f"[extract.py] Error extracting data from Monzo API: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def _extract_data_sync(self, since, account_id=None):
+        if since is None:
+            since = datetime.now() - timedelta(days=self.transactions_days_back)
+        client = self._client_for(account_id)
+        transactions_data = []
+        for page in client.iter_transactions(since=since, as_rows=self.as_rows):
+            transactions_data.extend(page)
+        return transactions_data, client.get_balance(), client.list_pots()
+
+    def stream_transactions(self, since=None, account_id=None):
+        """
+        Yield pages of transactions one at a time instead of materialising the whole window
+
+        Pages are fetched sequentially by following the transaction ID cursor, so only one page
+        is held in memory. `as_rows` applies as in extract_data.
+
+        Args:
+            since: Fetch transactions created after this datetime or transaction ID
+                   (defaults to `transactions_days_back` days ago)
+            account_id: Account to stream (defaults to the configured account)
+        """
+        if since is None:
+            since = datetime.now() - timedelta(days=self.transactions_days_back)
+        self.logger.info(f"[extract.py] Streaming transactions since {since}")
+
+        yield from self._client_for(account_id).iter_transactions(since=since, as_rows=self.as_rows)
+
+    def extract_snapshots(self, account_id=None):
+        """Fetch the current balance and pots of an account (defaults to the configured account)"""
+        self.logger.info("[extract.py] Extracting balance and pots from Monzo API")
+        client = self._client_for(account_id)
+        return {
+            'balance': client.get_balance(),
+            'pots': client.list_pots()
+        }
+
+    async def _get_transactions_async(self, async_client, since):
+        if not self.window_days or not isinstance(since, datetime):
+            return await async_client.get_all_transactions(since=since, as_rows=self.as_rows)
+
+        windows = async_client.split_windows(since, datetime.now(), timedelta(days=self.window_days))
+        self.logger.info(f"[extract.py] Fetching {len(windows)} transaction windows concurrently")
+        window_results = await async_client.get_transactions_windows(windows, as_rows=self.as_rows)
+
+        # Transactions on a window boundary can be returned twice
+        transactions_data = []
+        seen_ids = set()
+        for window_transactions in window_results:
+            for transaction in window_transactions:
+                transaction_id = transaction[0] if self.as_rows else transaction['id']
+                if transaction_id not in seen_ids:
+                    seen_ids.add(transaction_id)
+                    transactions_data.append(transaction)
+        return transactions_data
+
+    async def _extract_data_async(self, since, account_id=None):
+        if since is None:
+            since = datetime.now() - timedelta(days=self.transactions_days_back)
+        async_client = AsyncMonzoAPIClient(client=self._client_for(account_id))
+        return await asyncio.gather(
+            self._get_transactions_async(async_client, since),
+            async_client.get_balance(),
+            async_client.list_pots()
+        )
@@ -1,7 +1,80 @@
 import sqlite3
 import json
+import hashlib
 from datetime import datetime
 from typing import Dict, List, Any
+from src.utils.api.flatten import TRANSACTION_COLUMNS
+from src.utils.pipeline_state import (advance_transactions_watermark, clear_state, parse_timestamp,
+                                      set_state, stream_checkpoint_key)
+from src.utils.storage_profile import connect_database
+
+TAGS_INDEX = TRANSACTION_COLUMNS.index('merchant_suggested_tags')
+CREATED_INDEX = TRANSACTION_COLUMNS.index('created')
+
+POT_COLUMNS = (
+    'id',
+    'style',
+    'balance',
+    'currency',
+    'type',
+    'product_id',
+    'current_account_id',
+    'cover_image_url',
+    'isa_wrapper',
+    'round_up',
+    'round_up_multiplier',
+    'is_tax_pot',
+    'created',
+    'updated',
+    'deleted',
+    'locked',
+    'available_for_bills',
+    'has_virtual_cards',
+    'date_retrieved'
+)
+
+# Every bronze_transactions row is stored with the hash of its source values (all columns but date_retrieved)
+HASHED_TRANSACTION_COLUMNS = TRANSACTION_COLUMNS + ('content_hash',)
+
+# Lookups of existing hashes are batched to stay under SQLite's bound parameter limit
+HASH_LOOKUP_BATCH_SIZE = 500
+
+# A transaction that already exists is rewritten only if its content changed, which also
+# moves date_retrieved forward so the incremental transform picks the change up
+UPSERT_TRANSACTION_SQL = f'''
+    INSERT INTO bronze_transactions ({', '.join(HASHED_TRANSACTION_COLUMNS)})
+    VALUES ({', '.join('?' * len(HASHED_TRANSACTION_COLUMNS))})
+    ON CONFLICT (id) DO UPDATE SET
+        {', '.join(f'{column} = excluded.{column}' for column in HASHED_TRANSACTION_COLUMNS[1:])}
+    WHERE bronze_transactions.content_hash IS NOT excluded.content_hash
+'''
+
+BALANCE_COLUMNS = (
+    'account_id',
+    'balance',
+    'total_balance',
+    'currency',
+    'spend_today',
+    'date_retrieved'
+)
+
+# Pots and balance are kept as SCD type 2 history: a new version is written only when the
+# record's hash changes, closing the previous version's validity range
+SCD2_COLUMNS = ('record_hash', 'valid_from', 'valid_to', 'last_seen')
+
+INSERT_POT_SQL = f'''
+    INSERT INTO bronze_pots ({', '.join(POT_COLUMNS + SCD2_COLUMNS)})
+    VALUES ({', '.join('?' * len(POT_COLUMNS + SCD2_COLUMNS))})
+'''
+
+INSERT_BALANCE_SQL = f'''
+    INSERT INTO bronze_balance ({', '.join(BALANCE_COLUMNS + SCD2_COLUMNS)})
+    VALUES ({', '.join('?' * len(BALANCE_COLUMNS + SCD2_COLUMNS))})
+'''
+
+def record_hash(values) -> str:
+    """Stable hash of a record's source values, used to detect changed snapshots"""
+    return hashlib.sha256(json.dumps(list(values), default=str, separators=(',', ':')).encode()).hexdigest()
 
 class MonzoBronzeDataLoader:
     """
@@ -24,103 +97,32 @@ class MonzoBronzeDataLoader:
 
     def insert_transaction(self, transaction: Dict[str, Any], conn):
         """
-        Insert a single transaction into SQLite database only if its ID doesn't already exist
+        Insert a single transaction into SQLite database, or update it if its content changed
     
         Args:
             transaction: Transaction data dictionary
         
         Returns:
-            bool: True if inserted, False if ID already existed
+            bool: True if inserted or updated, False if it already existed unchanged
         """
         try:
             cursor = conn.cursor()
+            current_time = datetime.now().isoformat()
+            row = self._hash_row(self._encode_row(self._transaction_row(transaction, current_time)))
             
-            # Check if ID exists
+            # Check if ID exists with the same content
             cursor.execute('''
-                SELECT 1 FROM bronze_transactions WHERE id = ?
-            ''', (transaction.get('id'),))
+                SELECT content_hash FROM bronze_transactions WHERE id = ?
+            ''', (row[0],))
+            existing = cursor.fetchone()
             
-            if cursor.fetchone() is not None:
-                self.logger.debug(f"[load.py] Transaction {transaction.get('id')} already exists, skipping insertion")
+            if existing is not None and existing[0] == row[-1]:
+                self.logger.debug(f"[load.py] Transaction {row[0]} already exists unchanged, skipping insertion")
                 return False
             
-            current_time = datetime.now().isoformat()
+            cursor.execute(UPSERT_TRANSACTION_SQL, row)
             
-            cursor.execute('''
-                INSERT INTO bronze_transactions (
-                    id,
-                    description,
-                    amount,
-                    currency,
-                    created,
-                    category,
-                    notes,
-                    is_load,
-                    settled,
-                    local_amount,
-                    local_currency,
-                    counterparty_name,
-                    counterparty_account_num,
-                    counterparty_sort_code,
-                    merchant_id,
-                    merchant_name,
-                    merchant_category,
-                    merchant_logo,
-                    merchant_emoji,
-                    merchant_online,
-                    merchant_atm,
-                    merchant_address,
-                    merchant_city,
-                    merchant_postcode,
-                    merchant_country,
-                    merchant_latitude,
-                    merchant_longitude,
-                    merchant_google_places_id,
-                    merchant_suggested_tags,
-                    merchant_foursquare_id,
-                    merchant_website,
-                    date_retrieved
-                ) VALUES (
-                    ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
-                    ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
-                    ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-                )
-            ''', (
-                transaction.get('id'),
-                transaction.get('description'),
-                transaction.get('amount'),
-                transaction.get('currency'),
-                transaction.get('created'),
-                transaction.get('category'),
-                transaction.get('notes'),
-                transaction.get('is_load'),
-                transaction.get('settled'),
-                transaction.get('local_amount'),
-                transaction.get('local_currency'),
-                transaction.get('counterparty_name'),
-                transaction.get('counterparty_account_num'),
-                transaction.get('counterparty_sort_code'),
-                transaction.get('merchant_id'),
-                transaction.get('merchant_name'),
-                transaction.get('merchant_category'),
-                transaction.get('merchant_logo'),
-                transaction.get('merchant_emoji'),
-                transaction.get('merchant_online'),
-                transaction.get('merchant_atm'),
-                transaction.get('merchant_address'),
-                transaction.get('merchant_city'),
-                transaction.get('merchant_postcode'),
-                transaction.get('merchant_country'),
-                transaction.get('merchant_latitude'),
-                transaction.get('merchant_longitude'),
-                transaction.get('merchant_google_places_id'),
-                json.dumps(transaction.get('merchant_suggested_tags')),
-                transaction.get('merchant_foursquare_id'),
-                transaction.get('merchant_website'),
-                current_time
-            ))
-            
-            self.logger.debug(f"[load.py] Successfully inserted transaction {transaction.get('id')}")
+            self.logger.debug(f"[load.py] Successfully {'updated' if existing else 'inserted'} transaction {row[0]}")
             return True
                 
         except sqlite3.Error as e:
@@ -129,110 +131,356 @@ class MonzoBronzeDataLoader:
 
     def insert_balance(self, balance: Dict[str, Any], conn):
         """
-        Insert balance data into SQLite database
+        Insert balance data into SQLite database if it has changed since the current version
         
         Args:
             balance: Balance data dictionary from Monzo API
         """
-        try:
-            cursor = conn.cursor()
-            
-            current_time = datetime.now().isoformat()
-            
-            cursor.execute('''
-                INSERT INTO bronze_balance (
-                    balance,
-                    total_balance,
-                    currency,
-                    spend_today,
-                    date_retrieved
-                ) VALUES (?, ?, ?, ?, ?)
-            ''', (
-                balance.get('balance'),
-                balance.get('total_balance'),
-                balance.get('currency'),
-                balance.get('spend_today'),
-                current_time
-            ))
-            
-            self.logger.debug("[load.py] Successfully inserted balance data")
-            
-        except sqlite3.Error as e:
-            self.logger.error(f"[load.py] Failed to insert balance data: {str(e)}")
-            raise
+        self.upsert_balance(balance, conn)
+        self.logger.debug("[load.py] Successfully inserted balance data")
 
     def insert_pot(self, pot: Dict[str, Any], conn):
         """
-        Insert a single pot into SQLite database
+        Insert a single pot into SQLite database if it has changed since the current version
         
         Args:
             pot: Pot data dictionary from Monzo API
         """
-        try:
-            cursor = conn.cursor()
-            
-            current_time = datetime.now().isoformat()
-            
-            cursor.execute('''
-                INSERT INTO bronze_pots (
-                    id,
-                    style,
-                    balance,
-                    currency,
-                    type,
-                    product_id,
-                    current_account_id,
-                    cover_image_url,
-                    isa_wrapper,
-                    round_up,
-                    round_up_multiplier,
-                    is_tax_pot,
-                    created,
-                    updated,
-                    deleted,
-                    locked,
-                    available_for_bills,
-                    has_virtual_cards,
-                    date_retrieved
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                pot.get('id'),
-                pot.get('style'),
-                pot.get('balance'),
-                pot.get('currency'),
-                pot.get('type'),
-                pot.get('product_id'),
-                pot.get('current_account_id'),
-                pot.get('cover_image_url'),
-                pot.get('isa_wrapper', False),
-                pot.get('round_up', False),
-                pot.get('round_up_multiplier'),
-                pot.get('is_tax_pot', False),
-                pot.get('created'),
-                pot.get('updated'),
-                pot.get('deleted', False),
-                pot.get('locked', False),
-                pot.get('available_for_bills', False),
-                pot.get('has_virtual_cards', False),
-                current_time
+        self.upsert_pots({'pots': [pot]}, conn)
+        self.logger.debug(f"[load.py] Successfully inserted pot {pot.get('id')}")
+
+    def insert_pots(self, pots: Dict[str, Any], conn):
+        """
+        Insert multiple pots into SQLite database
+        
+        Args:
+            pots: Pots response dictionary containing a 'pots' list
+        """
+        counts = self.upsert_pots(pots, conn)
+        self.logger.info(f"[load.py] Successfully inserted {counts['changed']} changed pots ({counts['unchanged']} unchanged)")
+
+    @staticmethod
+    def _transaction_row(transaction: Dict[str, Any], current_time: str) -> tuple:
+        """Build the bronze_transactions parameter row for a flattened transaction dict"""
+        row = [transaction.get(column) for column in TRANSACTION_COLUMNS[:-1]]
+        row.append(current_time)
+        return tuple(row)
+
+    @staticmethod
+    def _encode_row(row: tuple) -> tuple:
+        """Serialise the suggested tags (the one non-scalar column) as JSON for binding"""
+        tags = row[TAGS_INDEX]
+        if isinstance(tags, str):
+            return row
+        return row[:TAGS_INDEX] + (json.dumps(tags),) + row[TAGS_INDEX + 1:]
+
+    @staticmethod
+    def _hash_row(row: tuple) -> tuple:
+        """Append the content hash of an encoded row's source values (everything but date_retrieved)"""
+        return row + (record_hash(row[:-1]),)
+
+    @staticmethod
+    def current_transaction_hashes(conn, transaction_ids: List[str]) -> Dict[str, str]:
+        """Stored content hash of each of `transaction_ids` already in bronze_transactions (None before v4)"""
+        hashes = {}
+        for start in range(0, len(transaction_ids), HASH_LOOKUP_BATCH_SIZE):
+            batch = transaction_ids[start:start + HASH_LOOKUP_BATCH_SIZE]
+            hashes.update(conn.execute(
+                f"SELECT id, content_hash FROM bronze_transactions WHERE id IN ({', '.join('?' * len(batch))})",
+                batch
             ))
-            
-            self.logger.debug(f"[load.py] Successfully inserted pot {pot.get('id')}")
-            
+        return hashes
+
+    @staticmethod
+    def _pot_row(pot: Dict[str, Any], current_time: str) -> tuple:
+        """Build the bronze_pots parameter row for a pot"""
+        return (
+            pot.get('id'),
+            pot.get('style'),
+            pot.get('balance'),
+            pot.get('currency'),
+            pot.get('type'),
+            pot.get('product_id'),
+            pot.get('current_account_id'),
+            pot.get('cover_image_url'),
+            pot.get('isa_wrapper', False),
+            pot.get('round_up', False),
+            pot.get('round_up_multiplier'),
+            pot.get('is_tax_pot', False),
+            pot.get('created'),
+            pot.get('updated'),
+            pot.get('deleted', False),
+            pot.get('locked', False),
+            pot.get('available_for_bills', False),
+            pot.get('has_virtual_cards', False),
+            current_time
+        )
+
+    def bulk_insert_transactions(self, transactions: List[Any], conn) -> Dict[str, int]:
+        """
+        Upsert many transactions with a single batched statement, skipping those that exist unchanged
+
+        Args:
+            transactions: List of flattened transaction dictionaries, or rows ordered as TRANSACTION_COLUMNS
+            conn: Open SQLite connection (caller is responsible for committing)
+
+        Returns:
+            dict: Counts of inserted, updated and skipped transactions
+        """
+        current_time = datetime.now().isoformat()
+        rows = [
+            transaction if isinstance(transaction, tuple) else self._transaction_row(transaction, current_time)
+            for transaction in transactions
+        ]
+        return self.bulk_insert_transaction_rows(rows, conn)
+
+    def bulk_insert_transaction_rows(self, rows: List[tuple], conn) -> Dict[str, int]:
+        """
+        Upsert pre-flattened bronze_transactions rows (see flatten_transactions)
+
+        New IDs are inserted and existing ones rewritten only if their content hash changed, so
+        re-fetching an overlap window costs one indexed lookup per unchanged transaction.
+
+        Args:
+            rows: Tuples ordered as TRANSACTION_COLUMNS
+            conn: Open SQLite connection (caller is responsible for committing)
+
+        Returns:
+            dict: Counts of inserted, updated and skipped (unchanged) transactions
+        """
+        try:
+            hashed_rows = [self._hash_row(self._encode_row(row)) for row in rows]
+            current_hashes = self.current_transaction_hashes(conn, [row[0] for row in hashed_rows])
+
+            inserted, updated, written = 0, 0, []
+            for row in hashed_rows:
+                if row[0] not in current_hashes:
+                    inserted += 1
+                elif current_hashes[row[0]] != row[-1]:
+                    updated += 1
+                else:
+                    continue
+                # A transaction repeated within the batch is written once
+                current_hashes[row[0]] = row[-1]
+                written.append(row)
+
+            conn.executemany(UPSERT_TRANSACTION_SQL, written)
         except sqlite3.Error as e:
-            self.logger.error(f"[load.py] Failed to insert pot {pot.get('id', 'unknown')}: {str(e)}")
+            self.logger.error(f"[load.py] Failed to bulk upsert {len(rows)} transactions: {str(e)}")
             raise
 
-    def insert_pots(self, pots: List[Dict[str, Any]], conn):
+        return {'inserted': inserted, 'updated': updated, 'skipped': len(rows) - inserted - updated}
+
+    @staticmethod
+    def newest_transaction(transactions: List[Any]):
+        """(created, id) of the most recently created transaction, accepting dicts or rows"""
+        newest = None
+        for transaction in transactions:
+            if isinstance(transaction, tuple):
+                created, transaction_id = transaction[CREATED_INDEX], transaction[0]
+            else:
+                created, transaction_id = transaction.get('created'), transaction.get('id')
+            if created and (newest is None or parse_timestamp(created) > parse_timestamp(newest[0])):
+                newest = (created, transaction_id)
+        return newest
+
+    def upsert_pots(self, pots: Dict[str, Any], conn, as_of: str = None) -> Dict[str, int]:
         """
-        Insert multiple pots into SQLite database
-        
+        Write a new version of each pot whose contents changed, and touch last_seen on the rest
+
         Args:
-            pots: List of pot data dictionaries
+            pots: Pots response dictionary containing a 'pots' list
+            conn: Open SQLite connection (caller is responsible for committing)
+            as_of: When the pots were fetched (ISO 8601), defaulting to now
+
+        Returns:
+            dict: Counts of changed (new version written) and unchanged pots
+        """
+        current_time = as_of or datetime.now().isoformat()
+        rows = [self._pot_row(pot, current_time) for pot in (pots or {}).get('pots', [])]
+
+        try:
+            current_hashes = dict(conn.execute('SELECT id, record_hash FROM bronze_pots WHERE valid_to IS NULL'))
+
+            changed, unchanged = [], []
+            for row in rows:
+                row_hash = record_hash(row[:-1])
+                if current_hashes.get(row[0]) == row_hash:
+                    unchanged.append((current_time, row[0]))
+                else:
+                    changed.append(row + (row_hash, current_time, None, current_time))
+
+            conn.executemany('UPDATE bronze_pots SET last_seen = ? WHERE id = ? AND valid_to IS NULL', unchanged)
+            conn.executemany('UPDATE bronze_pots SET valid_to = ? WHERE id = ? AND valid_to IS NULL',
+                             [(current_time, row[0]) for row in changed])
+            conn.executemany(INSERT_POT_SQL, changed)
+        except sqlite3.Error as e:
+            self.logger.error(f"[load.py] Failed to upsert {len(rows)} pots: {str(e)}")
+            raise
+
+        return {'changed': len(changed), 'unchanged': len(unchanged)}
+
+    def upsert_balance(self, balance: Dict[str, Any], conn, account_id: str = None, as_of: str = None) -> bool:
+        """
+        Write a new balance version if it changed, otherwise touch last_seen on the account's current one
+
+        Args:
+            balance: Balance data dictionary from Monzo API
+            conn: Open SQLite connection (caller is responsible for committing)
+            account_id: Account the balance belongs to, if the balance doesn't say
+            as_of: When the balance was fetched (ISO 8601), defaulting to now
+
+        Returns:
+            bool: True if a new version was written
+        """
+        current_time = as_of or datetime.now().isoformat()
+        account_id = balance.get('account_id', account_id)
+        row = (
+            account_id,
+            balance.get('balance'),
+            balance.get('total_balance'),
+            balance.get('currency'),
+            balance.get('spend_today'),
+            current_time
+        )
+        row_hash = record_hash(row[:-1])
+
+        try:
+            current = conn.execute('SELECT record_hash FROM bronze_balance WHERE valid_to IS NULL AND account_id IS ?',
+                                   (account_id,)).fetchone()
+            if current is not None and current[0] == row_hash:
+                conn.execute('UPDATE bronze_balance SET last_seen = ? WHERE valid_to IS NULL AND account_id IS ?',
+                             (current_time, account_id))
+                return False
+
+            conn.execute('UPDATE bronze_balance SET valid_to = ? WHERE valid_to IS NULL AND account_id IS ?',
+                         (current_time, account_id))
+            conn.execute(INSERT_BALANCE_SQL, row + (row_hash, current_time, None, current_time))
+            return True
+        except sqlite3.Error as e:
+            self.logger.error(f"[load.py] Failed to upsert balance data: {str(e)}")
+            raise
+
+    def bulk_load_data(self, data, account_id: str = None, as_of: str = None) -> Dict[str, int]:
+        """
+        Load data into SQLite database using batched statements inside a single transaction
+
+        Args:
+            data: Data dictionary containing transactions, balance, and pots
+            account_id: If given, the account's transaction watermark is advanced in the same transaction
+            as_of: When the balance and pots were fetched (ISO 8601), defaulting to now
+
+        Returns:
+            dict: Counts of inserted, updated and skipped transactions, changed and unchanged pots, and whether the balance changed
+        """
+        self.logger.info("[load.py] Bulk loading data into SQLite database")
+
+        conn = None
+
+        try:
+            conn = connect_database(self.db_path)
+
+            transactions_data = data.get('transactions') or []
+            balance_data = data.get('balance')
+            pots_data = data.get('pots')
+
+            with conn:
+                counts = self.bulk_insert_transactions(transactions_data, conn)
+
+                counts['balance_changed'] = self.upsert_balance(balance_data, conn, account_id, as_of) if balance_data else False
+
+                pot_counts = self.upsert_pots(pots_data, conn, as_of)
+                counts['pots_changed'] = pot_counts['changed']
+                counts['pots_unchanged'] = pot_counts['unchanged']
+
+                newest = self.newest_transaction(transactions_data)
+                if account_id and newest:
+                    advance_transactions_watermark(conn, account_id, *newest)
+
+            self.logger.info(
+                f"[load.py] Bulk loading completed successfully ({counts['inserted']} transactions inserted, "
+                f"{counts['updated']} updated, {counts['skipped']} skipped, {counts['pots_changed']} pots changed)"
+            )
+            return counts
+        except Exception as e:
+            self.logger.error(f"[load.py] Bulk loading failed: {str(e)}")
+            raise
+        finally:
+            if conn:
+                conn.close()
+
+    def stream_load_transactions(self, pages, account_id: str, chunk_size: int = 500,
+                                 on_chunk_committed=None) -> Dict[str, int]:
+        """
+        Load pages of transactions as they arrive, committing every `chunk_size` rows
+
+        Each chunk is committed together with a checkpoint of the last transaction it contains,
+        and the account's watermark advanced, so a run interrupted part way through resumes
+        from the checkpoint rather than reloading the whole window. The checkpoint is cleared
+        once every page has been loaded.
+
+        Args:
+            pages: Iterable of pages, each a list of transaction dicts or rows (see MonzoDataExtractor.stream_transactions)
+            account_id: Account the transactions belong to
+            chunk_size: Number of rows committed per transaction
+            on_chunk_committed: Called with the running counts after each chunk is committed, e.g. to
+                upload progress (optional)
+
+        Returns:
+            dict: Counts of transactions extracted (received from `pages`), inserted, updated and skipped, and
+                the number of chunks committed
         """
-        for pot in pots.get('pots'):
-            self.insert_pot(pot, conn)
-        self.logger.info(f"[load.py] Successfully inserted {len(pots)} pots")
+        self.logger.info(f"[load.py] Streaming transactions into SQLite database in chunks of {chunk_size}")
+
+        counts = {'extracted': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'chunks': 0}
+        checkpoint_key = stream_checkpoint_key(account_id)
+        conn = None
+
+        def commit_chunk(chunk):
+            with conn:
+                chunk_counts = self.bulk_insert_transactions(chunk, conn)
+                newest = self.newest_transaction(chunk)
+                if newest:
+                    advance_transactions_watermark(conn, account_id, *newest)
+                last = chunk[-1]
+                last_created, last_id = (last[CREATED_INDEX], last[0]) if isinstance(last, tuple) else (last.get('created'), last.get('id'))
+                set_state(conn, checkpoint_key, last_created, last_id)
+
+            counts['inserted'] += chunk_counts['inserted']
+            counts['updated'] += chunk_counts['updated']
+            counts['skipped'] += chunk_counts['skipped']
+            counts['chunks'] += 1
+            self.logger.debug(f"[load.py] Committed chunk {counts['chunks']} ({chunk_counts['inserted']} inserted) up to {last_id}")
+            if on_chunk_committed:
+                on_chunk_committed(counts)
+
+        try:
+            conn = connect_database(self.db_path)
+
+            chunk = []
+            for page in pages:
+                counts['extracted'] += len(page)
+                chunk.extend(page)
+                while len(chunk) >= chunk_size:
+                    commit_chunk(chunk[:chunk_size])
+                    del chunk[:chunk_size]
+            if chunk:
+                commit_chunk(chunk)
+
+            with conn:
+                clear_state(conn, checkpoint_key)
+
+            self.logger.info(
+                f"[load.py] Streaming load completed successfully ({counts['inserted']} transactions inserted, "
+                f"{counts['updated']} updated, {counts['skipped']} skipped, {counts['chunks']} chunks)"
+            )
+            return counts
+        except Exception as e:
+            self.logger.error(f"[load.py] Streaming load failed after {counts['chunks']} chunks: {str(e)}")
+            raise
+        finally:
+            if conn:
+                conn.close()
 
     def load_data(self, data):
         """
@@ -247,7 +495,7 @@ class MonzoBronzeDataLoader:
 
         try:
             # Use a single connection for all database operations
-            conn = sqlite3.connect(self.db_path)
+            conn = connect_database(self.db_path)
 
             transactions_data = data.get('transactions')
             balance_data = data.get('balance')
@@ -2,28 +2,64 @@
 Monzo ETL Pipeline
 """
 import os
-import boto3
+import time
 from datetime import datetime
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.initialise_database import initialise_database
-from utils.logging_utils import Logger
-from extract.extract import MonzoDataExtractor
-from load.load import MonzoBronzeDataLoader
-from transform.transform import transform_bronze_to_silver
-from botocore.exceptions import ClientError
-from dotenv import load_dotenv
+from src.utils.initialise_database import initialise_database
+from src.utils.logging_utils import Logger
+from src.utils.db_cache import DatabaseCache
+from src.utils.storage_profile import apply_storage_profile, assign_unowned_rows, checkpoint_database, finalise_database
+from src.utils.metrics import RunMetrics
+from src.utils.landing_zone import RawLandingZone
+from src.utils.api.http_session import get_session
+from src.utils.pipeline_state import get_stream_checkpoint, resolve_transactions_since
+from src.extract.extract import MonzoDataExtractor
+from src.load.load import MonzoBronzeDataLoader
+from src.transform.transform import transform_bronze_to_silver, transform_silver_to_gold
 
-load_dotenv()
+# Nothing below runs at import time: .env loading, AWS clients and the Parquet export
+# (pandas/pyarrow) are all set up on first use so the Lambda init phase stays short
+
+_local_env_loaded = False
+
+def _load_local_env():
+    """
+    Load the .env file once per container, on the first handler call
+
+    The Docker image bakes .env in, and it is where the deployed function gets its paths and
+    bucket names, so it is loaded on Lambda too. Variables already set in the environment win.
+    """
+    global _local_env_loaded
+    if _local_env_loaded:
+        return
+    _local_env_loaded = True
+
+    from dotenv import load_dotenv
+    load_dotenv()
 
 def lambda_handler(event=None, context=None):
+    _load_local_env()
+
+    # Generate a unique run ID using a timestamp
+    run_id = datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
+
+    # One structured metrics record per run (CloudWatch EMF on stdout, plus a local file if configured)
+    metrics = RunMetrics(run_id=run_id, local_path=os.getenv('METRICS_LOCAL_PATH'))
+    metrics.put('RunFailed', 0)
+    if os.getenv('TENANT_NAME'):
+        # Set by the multi-tenant runner
+        metrics.set_property('Tenant', os.getenv('TENANT_NAME'))
+    api_stats_before = get_session().snapshot_stats()
+    run_start = time.perf_counter()
+    db_cache = None
+    landing_zone = None
+    logger_instance = None
+
     try:
         # Create logs directory in lambda environment if it doesn't exist
         os.makedirs('/tmp/logs', exist_ok=True)
 
-        # Generate a unique run ID using a timestamp
-        run_id = datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
-
         # Initialise logger
         log_file_path = os.getenv('LOCAL_LOG_PATH')
         s3_bucket = os.getenv('AWS_S3_BUCKET_NAME')
@@ -31,58 +67,219 @@ def lambda_handler(event=None, context=None):
         logger_instance = Logger(log_file_path, s3_bucket, s3_prefix, logger_name='main', run_id=run_id)
         logger = logger_instance.logger
 
-        # Create S3 client
-        logger.info('[main.py] Creating S3 client')
-        s3_client = boto3.client('s3')
-
-        # Download SQLite database or create it if it doesn't exist
+        # Download SQLite database (skipped if this warm container already holds the current copy) or create it if it doesn't exist
         local_path = os.getenv('LOCAL_DB_PATH')
-        try:
-            logger.info(f'[main.py] Attempting to download database from S3 to {local_path}')
-            s3_client.download_file(Bucket=os.getenv('AWS_S3_BUCKET_NAME'), 
-                                    Key=os.getenv('AWS_S3_DATABASE_NAME'), 
-                                    Filename=local_path)
-            logger.info('[main.py] Database downloaded from S3 successfully')
-        except ClientError as e:
-            logger.info(f'[main.py] Database not found in S3. Creating new database at {local_path}')
-            initialise_database(database_path=local_path)
-            logger.info('[main.py] Database created successfully')
-
-        # Extract data
-        extractor = MonzoDataExtractor(transactions_days_back=30, logger=logger)
-
-        extracted_data = extractor.extract_data()
-
-        # Load data into bronze layer of SQLite database
+        db_cache = DatabaseCache(local_path=local_path, 
+                                 bucket=os.getenv('AWS_S3_BUCKET_NAME'), 
+                                 key=os.getenv('AWS_S3_DATABASE_NAME'), 
+                                 logger=logger,
+                                 compression=os.getenv('DB_SNAPSHOT_COMPRESSION') or None)
+        with metrics.stage('Download'):
+            if db_cache.download():
+                logger.info('[main.py] Database available locally')
+            else:
+                logger.info(f'[main.py] Database not found in S3. Creating new database at {local_path}')
+                initialise_database(database_path=local_path, logger=logger)
+                logger.info('[main.py] Database created successfully')
+
+            # Add indexes and apply any pending storage profile migrations (a no-op once up to date)
+            apply_storage_profile(db_path=local_path, logger=logger)
+
+        # Optionally keep the raw API responses of this run for offline replay (see src/replay/replay.py)
+        raw_prefix = os.getenv('AWS_S3_RAW_PREFIX')
+        raw_local_path = os.getenv('LOCAL_RAW_LANDING_PATH')
+        if raw_prefix or raw_local_path:
+            landing_zone = RawLandingZone(run_id=run_id, 
+                                          local_dir=raw_local_path or '/tmp/raw', 
+                                          s3_bucket=os.getenv('AWS_S3_BUCKET_NAME'), 
+                                          s3_prefix=raw_prefix, 
+                                          logger=logger)
+
+        # Extract data, resuming from the last loaded transaction where one is recorded
+        days_back = int(os.getenv('TRANSACTIONS_DAYS_BACK', 30))
+        overlap_hours = float(os.getenv('TRANSACTIONS_OVERLAP_HOURS', 72))
+        # EXTRACT_MODE: 'async' (default) fetches accounts, and WINDOW_DAYS-day windows of each, concurrently; 'sync' one after another
+        window_days = os.getenv('WINDOW_DAYS')
+        extractor = MonzoDataExtractor(transactions_days_back=days_back, 
+                                       logger=logger, 
+                                       use_async=os.getenv('EXTRACT_MODE', 'async') == 'async',
+                                       window_days=int(window_days) if window_days else None,
+                                       as_rows=True,
+                                       landing_zone=landing_zone)
+
+        # Rows loaded before accounts were tracked belong to the credentials' account
+        assign_unowned_rows(db_path=local_path, account_id=extractor.account_id, logger=logger)
+
+        # MONZO_ACCOUNT_IDS: 'all' (default) discovers every open account, otherwise a comma-separated list
+        account_setting = os.getenv('MONZO_ACCOUNT_IDS', 'all')
+        if account_setting == 'all':
+            account_ids = extractor.discover_accounts() or [extractor.account_id]
+        else:
+            account_ids = [account_id.strip() for account_id in account_setting.split(',') if account_id.strip()]
+        metrics.put('Accounts', len(account_ids))
+
+        since_by_account = {
+            account_id: resolve_transactions_since(db_path=local_path, 
+                                                   account_id=account_id, 
+                                                   overlap_hours=overlap_hours, 
+                                                   default_days_back=days_back)
+            for account_id in account_ids
+        }
+
         bronze_loader = MonzoBronzeDataLoader(db_path=local_path, logger=logger)
+        counts = {'extracted': 0, 'inserted': 0, 'updated': 0, 'skipped': 0}
+
+        if os.getenv('PIPELINE_MODE', 'batch') == 'stream':
+            # Stream pages straight into the bronze layer in committed chunks, keeping memory bounded by the chunk size.
+            # Accounts are streamed one after another so only one page is in flight.
+            # Committed chunks are uploaded every STREAM_UPLOAD_EVERY_CHUNKS chunks, and once more when less than
+            # STREAM_UPLOAD_TIME_BUDGET_MS of the invocation is left, so a timeout (which skips the except below)
+            # still leaves the next run a checkpoint to resume from.
+            upload_every = int(os.getenv('STREAM_UPLOAD_EVERY_CHUNKS', 20))
+            upload_time_budget_ms = int(os.getenv('STREAM_UPLOAD_TIME_BUDGET_MS', 60000))
+            progress = {'chunks_since_upload': 0, 'low_on_time': False, 'uploads': 0}
+
+            def upload_committed_chunks(account_counts):
+                progress['chunks_since_upload'] += 1
+                low_on_time = (not progress['low_on_time'] and hasattr(context, 'get_remaining_time_in_millis')
+                               and context.get_remaining_time_in_millis() < upload_time_budget_ms)
+                if progress['chunks_since_upload'] < upload_every and not low_on_time:
+                    return
+                progress['low_on_time'] = progress['low_on_time'] or low_on_time
+                logger.info(f"[main.py] Uploading database to S3 after {account_counts['chunks']} committed chunks")
+                checkpoint_database(db_path=local_path)
+                db_cache.upload()
+                progress['chunks_since_upload'] = 0
+                progress['uploads'] += 1
+
+            try:
+                # Extraction and loading are interleaved, so they are timed as one stage
+                with metrics.stage('ExtractLoad'):
+                    for account_id, since in since_by_account.items():
+                        checkpoint = get_stream_checkpoint(db_path=local_path, account_id=account_id)
+                        if checkpoint:
+                            logger.info(f"[main.py] Resuming interrupted streaming load of {account_id} after transaction {checkpoint['last_id']}")
+                            since = checkpoint['last_id']
+
+                        account_counts = bronze_loader.stream_load_transactions(
+                            extractor.stream_transactions(since=since, account_id=account_id),
+                            account_id=account_id,
+                            chunk_size=int(os.getenv('STREAM_CHUNK_SIZE', 500)),
+                            on_chunk_committed=upload_committed_chunks
+                        )
+                        counts['extracted'] += account_counts['extracted']
+                        counts['inserted'] += account_counts['inserted']
+                        counts['updated'] += account_counts['updated']
+                        counts['skipped'] += account_counts['skipped']
+            except Exception:
+                # Persist the committed chunks and checkpoint so the next run picks up where this one stopped
+                logger.info('[main.py] Uploading partially loaded database to S3 before failing')
+                try:
+                    finalise_database(db_path=local_path)
+                    db_cache.upload()
+                except Exception as upload_error:
+                    logger.error(f'[main.py] Failed to upload partially loaded database: {upload_error}')
+                # Re-raise the load failure, not the upload one
+                raise
+            finally:
+                metrics.put('PartialUploads', progress['uploads'])
 
-        bronze_loader.load_data(extracted_data)
+            # Balance and pots snapshots are small and not checkpointed, so they are loaded after the streamed transactions
+            for account_id in since_by_account:
+                bronze_loader.bulk_load_data(extractor.extract_snapshots(account_id), account_id=account_id)
+        else:
+            with metrics.stage('Extract'):
+                extracted_accounts = extractor.extract_accounts(since_by_account)
+            counts['extracted'] = sum(len(data['transactions']) for data in extracted_accounts.values())
 
-        # Transform data from bronze to silver layer
-        transform_bronze_to_silver(db_path=local_path, logger=logger)
+            # Load data into bronze layer of SQLite database, one transaction per account
+            with metrics.stage('Load'):
+                for account_id, extracted_data in extracted_accounts.items():
+                    account_counts = bronze_loader.bulk_load_data(extracted_data, account_id=account_id)
+                    counts['inserted'] += account_counts['inserted']
+                    counts['updated'] += account_counts['updated']
+                    counts['skipped'] += account_counts['skipped']
+            del extracted_accounts
+
+        if landing_zone:
+            # Everything is fetched by now; land the run even if a later stage fails
+            with metrics.stage('Landing'):
+                landing_zone.close()
+            metrics.put('RawPagesLanded', landing_zone.pages)
+            metrics.put('RawBytesLanded', landing_zone.bytes_written, 'Bytes')
+
+        metrics.put('TransactionsExtracted', counts['extracted'])
+        metrics.put('TransactionsInserted', counts['inserted'])
+        metrics.put('TransactionsUpdated', counts['updated'])
+        metrics.put('TransactionsSkipped', counts['skipped'])
+
+        # Transform new bronze rows to silver layer (pass {"full_rebuild": true} in the event to reprocess everything)
+        full_rebuild = bool((event or {}).get('full_rebuild', False))
+        with metrics.stage('TransformSilver'):
+            silver_rows = transform_bronze_to_silver(db_path=local_path, logger=logger, full_rebuild=full_rebuild)
+        metrics.put('SilverRowsProcessed', silver_rows or 0)
+
+        # Recompute gold aggregates for the months touched by this run
+        with metrics.stage('TransformGold'):
+            gold_months = transform_silver_to_gold(db_path=local_path, logger=logger, full_rebuild=full_rebuild)
+        metrics.put('GoldMonthsRefreshed', len(gold_months or []))
+
+        # Export touched silver and gold partitions to Parquet for analysts
+        export_prefix = os.getenv('AWS_S3_EXPORT_PREFIX')
+        if export_prefix:
+            try:
+                from src.export.export import export_to_parquet
+
+                with metrics.stage('Export'):
+                    exported = export_to_parquet(db_path=local_path, 
+                                                 logger=logger, 
+                                                 output_dir=os.getenv('LOCAL_EXPORT_PATH', '/tmp/export'), 
+                                                 s3_bucket=os.getenv('AWS_S3_BUCKET_NAME'), 
+                                                 s3_prefix=export_prefix)
+                metrics.put('ParquetFilesExported', len(exported))
+            except Exception as e:
+                # The export watermark isn't advanced, so the same partitions are retried next run
+                logger.error(f'[main.py] Parquet export failed, continuing without it: {e}')
 
         logger.info('[main.py] Uploading database back to S3')
 
         # Load back to S3
-        s3_client.upload_file(Filename=local_path, 
-                              Bucket=os.getenv('AWS_S3_BUCKET_NAME'), 
-                              Key=os.getenv('AWS_S3_DATABASE_NAME'))
+        with metrics.stage('Upload'):
+            finalise_database(db_path=local_path)
+            db_cache.upload()
         
         logger.info('[main.py] Pipeline run successfully')
 
-        # Upload log file to S3
-        logger.info('[main.py] Uploading log file to S3')
-        logger_instance.upload_log_to_s3()
-
         return {
             'statusCode': 200,
             'body': 'ETL process completed successfully'
         }
     except Exception as e:
+        if logger_instance:
+            logger_instance.logger.exception(f'[main.py] Pipeline run failed: {e}')
+        metrics.put('RunFailed', 1)
+        metrics.set_property('Error', str(e))
         return {
             'statusCode': 500,
             'body': f'Error: {str(e)}'
         }
+    finally:
+        if landing_zone:
+            # Keep whatever was fetched before a failed extraction or load (a no-op if already closed)
+            landing_zone.close()
+        api_stats = get_session().snapshot_stats()
+        metrics.put('ApiCalls', api_stats['requests'] - api_stats_before['requests'])
+        metrics.put('ApiRetries', api_stats['retries'] - api_stats_before['retries'])
+        metrics.put('ApiRateLimited', api_stats['rate_limited'] - api_stats_before['rate_limited'])
+        if db_cache:
+            metrics.put('BytesDownloaded', db_cache.bytes_downloaded, 'Bytes')
+            metrics.put('BytesUploaded', db_cache.bytes_uploaded, 'Bytes')
+        metrics.put('RunSeconds', time.perf_counter() - run_start, 'Seconds')
+        metrics.emit()
+        if logger_instance:
+            # Upload the run's log on failure too, so the error and what led up to it are kept
+            logger_instance.logger.info('[main.py] Uploading log file to S3')
+            logger_instance.upload_log_to_s3()
     
 if __name__ == "__main__":
     lambda_handler(None, None)
\ No newline at end of file
@@ -0,0 +1,3 @@
+from .replay import replay_runs
+
+__all__ = ['replay_runs']
@@ -0,0 +1,129 @@
+"""
+Replay landed raw API responses through flattening, load and transform without calling the API
+
+    python src/replay/replay.py --db-path /tmp/replay.db --landing-path /tmp/raw
+    python src/replay/replay.py --db-path /tmp/replay.db --run 2025-01-01-06-00-00 --full-rebuild
+
+Runs are replayed oldest first, so a transaction fetched by several runs ends up with its
+latest content. Loading is an upsert, so replaying into a database that already holds the
+data only rewrites transactions whose flattened content changed (e.g. after a change to
+flatten.py), which the incremental transform then carries into silver and gold. Balance and
+pot versions are dated by when the landed run fetched them, not when they are replayed.
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.utils.api import MonzoAPIClient
+from src.utils.api.flatten import flatten_transactions
+from src.utils.initialise_database import initialise_database
+from src.utils.landing_zone import download_landed_runs, iter_landed_pages, list_landed_runs
+from src.utils.storage_profile import apply_storage_profile
+from src.load.load import MonzoBronzeDataLoader
+from src.transform.transform import transform_bronze_to_silver, transform_silver_to_gold
+
+def _replay_run(loader, landing_dir, run_id, chunk_size, totals):
+    """Load one run's responses, one transaction per chunk of rows and one for each account's snapshots"""
+    pending_rows, balances, pots, fetched_at = {}, {}, {}, {}
+
+    def load(account_id, data, as_of=None):
+        counts = loader.bulk_load_data(data, account_id=account_id, as_of=as_of)
+        for key in ('inserted', 'updated', 'skipped'):
+            totals[key] += counts[key]
+
+    for page in iter_landed_pages(landing_dir, run_id):
+        account_id = page['account_id']
+        totals['pages'] += 1
+
+        if page['endpoint'] == '/transactions':
+            rows = pending_rows.setdefault(account_id, [])
+            rows.extend(flatten_transactions(page['body'].get('transactions', []), account_id=account_id))
+            if len(rows) >= chunk_size:
+                load(account_id, {'transactions': rows})
+                pending_rows[account_id] = []
+        elif page['endpoint'] == '/balance':
+            balances[account_id] = MonzoAPIClient.parse_balance(page['body'], account_id)
+            fetched_at[account_id] = page.get('fetched_at')
+        elif page['endpoint'] == '/pots':
+            pots[account_id] = page['body']
+            fetched_at[account_id] = page.get('fetched_at')
+
+    for account_id in {**pending_rows, **balances, **pots}:
+        load(account_id, {
+            'transactions': pending_rows.get(account_id, []),
+            'balance': balances.get(account_id),
+            'pots': pots.get(account_id)
+        }, as_of=fetched_at.get(account_id))
+
+def replay_runs(db_path, logger, landing_dir, run_ids=None, s3_bucket=None, s3_prefix=None, chunk_size=5000,
+                full_rebuild=False, transform=True):
+    """
+    Feed landed runs back through the pipeline's load and transform stages
+
+    Args:
+        db_path: Path to SQLite database file (created if it doesn't exist)
+        logger: Logger instance
+        landing_dir: Local directory holding run_id=<landed_run_id>/pages.ndjson.gz landing files
+        run_ids: Landed run IDs to replay (defaults to every landed run)
+        s3_bucket: If given with s3_prefix, landing files missing locally are downloaded first
+        s3_prefix: S3 prefix the runs were landed under
+        chunk_size: Number of transaction rows loaded per database transaction
+        full_rebuild: Rebuild silver and gold from every bronze row instead of only the changed ones
+        transform: Run the bronze to silver and silver to gold transforms after loading
+
+    Returns:
+        dict: Counts of runs, pages, inserted, updated and skipped transactions
+    """
+    if s3_bucket and s3_prefix:
+        downloaded = download_landed_runs(s3_bucket, s3_prefix, landing_dir, run_ids=run_ids)
+        logger.info(f'[replay.py] Downloaded {len(downloaded)} landed runs from s3://{s3_bucket}/{s3_prefix}')
+
+    landed = list_landed_runs(landing_dir)
+    run_ids = sorted(run_ids) if run_ids else landed
+    missing = sorted(set(run_ids) - set(landed))
+    if missing:
+        raise ValueError(f"No landed responses for runs: {', '.join(missing)}")
+
+    if os.path.exists(db_path):
+        apply_storage_profile(db_path=db_path, logger=logger)
+    else:
+        logger.info(f'[replay.py] Creating new database at {db_path}')
+        initialise_database(database_path=db_path, logger=logger)
+
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=logger)
+    totals = {'runs': 0, 'pages': 0, 'inserted': 0, 'updated': 0, 'skipped': 0}
+    start_time = time.perf_counter()
+
+    for run_id in run_ids:
+        logger.info(f'[replay.py] Replaying run {run_id}')
+        _replay_run(loader, landing_dir, run_id, chunk_size, totals)
+        totals['runs'] += 1
+
+    if transform:
+        transform_bronze_to_silver(db_path=db_path, logger=logger, full_rebuild=full_rebuild)
+        transform_silver_to_gold(db_path=db_path, logger=logger, full_rebuild=full_rebuild)
+
+    logger.info(
+        f"[replay.py] Replayed {totals['runs']} runs ({totals['pages']} responses) in {time.perf_counter() - start_time:.1f}s: "
+        f"{totals['inserted']} transactions inserted, {totals['updated']} updated, {totals['skipped']} unchanged"
+    )
+    return totals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Replay landed raw API responses into a database without calling the API')
+    parser.add_argument('--db-path', default=os.getenv('LOCAL_DB_PATH'), help='Path to SQLite database file')
+    parser.add_argument('--landing-path', default=os.getenv('LOCAL_RAW_LANDING_PATH', '/tmp/raw'), help='Local directory of landed runs')
+    parser.add_argument('--run', dest='run_ids', action='append', help='Landed run ID to replay (repeatable, defaults to every landed run)')
+    parser.add_argument('--s3-bucket', default=os.getenv('AWS_S3_BUCKET_NAME'), help='S3 bucket to download landed runs from')
+    parser.add_argument('--s3-prefix', default=os.getenv('AWS_S3_RAW_PREFIX'), help='S3 prefix the runs were landed under')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Transaction rows loaded per database transaction')
+    parser.add_argument('--full-rebuild', action='store_true', help='Rebuild silver and gold from every bronze row')
+    parser.add_argument('--no-transform', dest='transform', action='store_false', help='Only load the bronze layer')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - monzo-etl - %(levelname)s - %(message)s')
+    replay_runs(args.db_path, logging.getLogger('main'), args.landing_path, run_ids=args.run_ids,
+                s3_bucket=args.s3_bucket, s3_prefix=args.s3_prefix, chunk_size=args.chunk_size,
+                full_rebuild=args.full_rebuild, transform=args.transform)
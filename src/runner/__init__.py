@@ -0,0 +1,3 @@
+from .runner import run_tenants, tenant_environment
+
+__all__ = ['run_tenants', 'tenant_environment']
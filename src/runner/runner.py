@@ -0,0 +1,211 @@
+"""
+Run the pipeline for several tenants (one Monzo user each) in a bounded process pool
+
+    python src/runner/runner.py --tenants tenants.json --workers 4
+
+tenants.json is a list of tenant configs:
+
+    [{"name": "alice", "credentials_secret": "monzo-api-credentials-alice",
+      "database_key": "alice/monzo.db", "token_table": "monzo-tokens-alice",
+      "env": {"TRANSACTIONS_DAYS_BACK": "7"}}]
+
+Each tenant runs the same code path as lambda_handler, configured through its own
+environment. Worker processes are reused between tenants, so imports, AWS clients and the
+HTTP connection pool are set up once per worker instead of once per tenant. Multiprocessing
+needs /dev/shm, so this runs on a container or host rather than inside Lambda.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import importlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+DEFAULT_HANDLER = 'src.main.lambda_handler'
+
+# Tenant config keys and the environment variables the pipeline reads them from
+TENANT_ENV_KEYS = {
+    'credentials_secret': 'MONZO_CREDENTIALS_SECRET',
+    'token_table': 'MONZO_TOKEN_TABLE',
+    'database_key': 'AWS_S3_DATABASE_NAME',
+    'bucket': 'AWS_S3_BUCKET_NAME',
+    'log_prefix': 'AWS_S3_LOG_PREFIX',
+    'export_prefix': 'AWS_S3_EXPORT_PREFIX',
+    'raw_prefix': 'AWS_S3_RAW_PREFIX',
+}
+
+# Without these a tenant would fall back to the shared secret, token table and database of another user
+REQUIRED_TENANT_KEYS = ('credentials_secret', 'token_table', 'database_key')
+
+# S3 prefixes that, when set for every tenant in the runner's environment, are split per tenant
+TENANT_SCOPED_PREFIXES = ('log_prefix', 'export_prefix', 'raw_prefix')
+
+def tenant_environment(tenant, work_dir):
+    """
+    Environment variables a tenant's run is configured with
+
+    Args:
+        tenant: Tenant config with a `name`, every key in REQUIRED_TENANT_KEYS, any other TENANT_ENV_KEYS
+                and an optional `env` dictionary of extra variables
+        work_dir: Directory under which each tenant gets its own local database, logs, raw landing and export files
+
+    Returns:
+        dict: Environment variable name to value
+
+    Raises:
+        ValueError: If the tenant has no name or is missing a required key
+    """
+    if not tenant.get('name'):
+        raise ValueError('Every tenant needs a name')
+    missing = [key for key in REQUIRED_TENANT_KEYS if not tenant.get(key)]
+    if missing:
+        raise ValueError(f"Tenant {tenant['name']} is missing {', '.join(missing)}")
+
+    tenant_dir = os.path.join(work_dir, tenant['name'])
+    env = {
+        'TENANT_NAME': tenant['name'],
+        'LOCAL_DB_PATH': os.path.join(tenant_dir, 'monzo.db'),
+        'LOCAL_LOG_PATH': os.path.join(tenant_dir, 'monzo_etl'),
+        'LOCAL_RAW_LANDING_PATH': os.path.join(tenant_dir, 'raw'),
+        'LOCAL_EXPORT_PATH': os.path.join(tenant_dir, 'export'),
+    }
+    # Log, export and raw landing prefixes shared by every tenant are split per tenant, like the local paths
+    for key in TENANT_SCOPED_PREFIXES:
+        shared_prefix = os.getenv(TENANT_ENV_KEYS[key])
+        if shared_prefix and tenant.get(key) is None:
+            env[TENANT_ENV_KEYS[key]] = f"{shared_prefix.rstrip('/')}/tenant={tenant['name']}"
+    for key, variable in TENANT_ENV_KEYS.items():
+        if tenant.get(key) is not None:
+            env[variable] = str(tenant[key])
+    env.update({variable: str(value) for variable, value in tenant.get('env', {}).items()})
+    return env
+
+def _run_tenant(name, env, event, handler_path):
+    """Run one tenant in a worker process with its environment applied, restoring the worker's environment afterwards"""
+    previous = {variable: os.environ.get(variable) for variable in env}
+    os.environ.update(env)
+    start = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(env['LOCAL_DB_PATH']), exist_ok=True)
+        module_name, function_name = handler_path.rsplit('.', 1)
+        handler = getattr(importlib.import_module(module_name), function_name)
+        response = handler(event, None)
+        status_code = response.get('statusCode', 500)
+        return {
+            'name': name,
+            'status': 'succeeded' if status_code == 200 else 'failed',
+            'status_code': status_code,
+            'body': response.get('body'),
+            'seconds': time.perf_counter() - start,
+            'pid': os.getpid()
+        }
+    except Exception as e:
+        return {
+            'name': name,
+            'status': 'failed',
+            'status_code': None,
+            'body': f'Error: {e}',
+            'seconds': time.perf_counter() - start,
+            'pid': os.getpid()
+        }
+    finally:
+        for variable, value in previous.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+
+def summarise(results, wall_seconds):
+    """Totals over a run's per-tenant results"""
+    failed = [result['name'] for result in results if result['status'] != 'succeeded']
+    tenant_seconds = sum(result['seconds'] for result in results)
+    return {
+        'tenants': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': failed,
+        'wall_seconds': wall_seconds,
+        'tenant_seconds': tenant_seconds,
+        # How much faster the pool was than running every tenant back to back
+        'speedup': tenant_seconds / wall_seconds if wall_seconds > 0 else 0,
+        'slowest': max(results, key=lambda result: result['seconds'])['name'] if results else None
+    }
+
+def run_tenants(tenants, max_workers=4, work_dir='/tmp/tenants', logger=None, handler=DEFAULT_HANDLER, event=None):
+    """
+    Run the pipeline for every tenant in a pool of worker processes
+
+    A tenant whose run raises or returns a non-200 response is reported as failed without
+    affecting the others. If a worker process dies, only the tenants it had not finished are
+    marked failed.
+
+    Args:
+        tenants: List of tenant configs (see tenant_environment)
+        max_workers: Maximum number of tenants run at once
+        work_dir: Directory for the tenants' local databases and logs
+        logger: Logger instance
+        handler: Dotted path of the function run per tenant, called as handler(event, None)
+        event: Event passed to every tenant's run (a tenant's own `event` takes precedence)
+
+    Returns:
+        tuple: (list of per-tenant results in completion order, summary dictionary)
+    """
+    logger = logger or logging.getLogger('main')
+    names = [tenant.get('name') for tenant in tenants]
+    if len(set(names)) != len(names):
+        raise ValueError('Tenant names must be unique')
+    environments = [tenant_environment(tenant, work_dir) for tenant in tenants]
+
+    logger.info(f'[runner.py] Running {len(tenants)} tenants with up to {max_workers} workers')
+    results = []
+    start = time.perf_counter()
+
+    # Spawned (not forked) workers start without the parent's threads, locks and open connections
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {
+            executor.submit(_run_tenant, tenant['name'], env, tenant.get('event', event), handler): tenant['name']
+            for tenant, env in zip(tenants, environments)
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                result = {'name': name, 'status': 'failed', 'status_code': None,
+                          'body': f'Error: worker process died ({e})', 'seconds': 0.0, 'pid': None}
+            results.append(result)
+            log = logger.info if result['status'] == 'succeeded' else logger.error
+            log(f"[runner.py] Tenant {name} {result['status']} in {result['seconds']:.1f}s: {result['body']}")
+
+    summary = summarise(results, time.perf_counter() - start)
+    logger.info(
+        f"[runner.py] {summary['succeeded']}/{summary['tenants']} tenants succeeded in {summary['wall_seconds']:.1f}s "
+        f"({summary['tenant_seconds']:.1f}s of tenant runs, {summary['speedup']:.1f}x)"
+    )
+    if summary['failed']:
+        logger.error(f"[runner.py] Failed tenants: {', '.join(summary['failed'])}")
+    return results, summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the Monzo ETL pipeline for several tenants')
+    parser.add_argument('--tenants', required=True, help='JSON file with a list of tenant configs')
+    parser.add_argument('--workers', type=int, default=4, help='Maximum number of tenants run at once')
+    parser.add_argument('--work-dir', default='/tmp/tenants', help='Directory for local databases and logs')
+    parser.add_argument('--full-rebuild', action='store_true', help='Reprocess every bronze row for every tenant')
+    args = parser.parse_args()
+
+    with open(args.tenants, 'r') as file:
+        tenant_configs = json.load(file)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - monzo-etl - %(levelname)s - %(message)s')
+    results, summary = run_tenants(tenant_configs, max_workers=args.workers, work_dir=args.work_dir,
+                                   event={'full_rebuild': True} if args.full_rebuild else None)
+
+    print(f"{'tenant':<24}{'status':<12}{'seconds':>10}")
+    for result in sorted(results, key=lambda result: result['name']):
+        print(f"{result['name']:<24}{result['status']:<12}{result['seconds']:>10.1f}")
+    sys.exit(1 if summary['failed'] else 0)
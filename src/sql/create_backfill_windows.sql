@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS backfill_windows (
+    account_id TEXT NOT NULL,
+    window_start TEXT NOT NULL,
+    window_end TEXT NOT NULL,
+    rows_loaded INTEGER,
+    rows_inserted INTEGER,
+    completed_at TIMESTAMP,
+    PRIMARY KEY (account_id, window_start, window_end)
+);
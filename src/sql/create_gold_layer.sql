@@ -3,4 +3,17 @@ CREATE TABLE IF NOT EXISTS gold_monthly_spending (
     year INTEGER,
     total_spend REAL,
     avg_spend REAL
-);
\ No newline at end of file
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_gold_monthly_spending_year_month
+    ON gold_monthly_spending (year, month);
+
+CREATE TABLE IF NOT EXISTS gold_monthly_category_spending (
+    year INTEGER,
+    month INTEGER,
+    category TEXT,
+    total_spend REAL,
+    avg_spend REAL,
+    transaction_count INTEGER,
+    PRIMARY KEY (year, month, category)
+);
@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS pipeline_state (
+    state_key TEXT PRIMARY KEY,
+    watermark TEXT,
+    last_id TEXT,
+    updated_at TIMESTAMP
+);
@@ -0,0 +1,19 @@
+-- Storage profile v1: indexes for the pipeline's access paths
+
+-- Incremental bronze-to-silver transform
+CREATE INDEX IF NOT EXISTS idx_bronze_transactions_date_retrieved ON bronze_transactions (date_retrieved);
+
+-- Watermark lookups and date-range queries
+CREATE INDEX IF NOT EXISTS idx_bronze_transactions_created ON bronze_transactions (created);
+
+-- Latest pot/balance snapshot lookups
+CREATE INDEX IF NOT EXISTS idx_bronze_pots_id_date_retrieved ON bronze_pots (id, date_retrieved);
+CREATE INDEX IF NOT EXISTS idx_bronze_balance_date_retrieved ON bronze_balance (date_retrieved);
+
+-- Gold refresh and Parquet export month ranges
+CREATE INDEX IF NOT EXISTS idx_silver_transactions_created ON silver_transactions (created);
+CREATE INDEX IF NOT EXISTS idx_silver_transactions_inserted_at ON silver_transactions (inserted_at);
+
+-- Merchant joins and category breakdowns
+CREATE INDEX IF NOT EXISTS idx_silver_transactions_merchant_id ON silver_transactions (merchant_id);
+CREATE INDEX IF NOT EXISTS idx_silver_transactions_category_created ON silver_transactions (category, created);
@@ -0,0 +1,46 @@
+-- Storage profile v2: change-data-capture for pot and balance snapshots (SCD type 2)
+--
+-- Each row is one version of a pot (or of the balance), valid from valid_from until valid_to.
+-- The current version has valid_to NULL; last_seen is the latest run that saw it unchanged.
+-- Point-in-time query:
+--   SELECT * FROM bronze_pots WHERE valid_from <= :t AND (valid_to IS NULL OR valid_to > :t)
+
+ALTER TABLE bronze_pots ADD COLUMN record_hash TEXT;
+ALTER TABLE bronze_pots ADD COLUMN valid_from TIMESTAMP;
+ALTER TABLE bronze_pots ADD COLUMN valid_to TIMESTAMP;
+ALTER TABLE bronze_pots ADD COLUMN last_seen TIMESTAMP;
+
+ALTER TABLE bronze_balance ADD COLUMN record_hash TEXT;
+ALTER TABLE bronze_balance ADD COLUMN valid_from TIMESTAMP;
+ALTER TABLE bronze_balance ADD COLUMN valid_to TIMESTAMP;
+ALTER TABLE bronze_balance ADD COLUMN last_seen TIMESTAMP;
+
+-- Snapshots appended before CDC become consecutive versions: each is valid until the next
+-- snapshot of the same pot. Their record_hash stays NULL, so the first CDC run writes a fresh version.
+UPDATE bronze_pots
+SET valid_from = date_retrieved,
+    last_seen = date_retrieved,
+    valid_to = (
+        SELECT MIN(later.date_retrieved)
+        FROM bronze_pots later
+        WHERE later.id = bronze_pots.id
+            AND later.date_retrieved > bronze_pots.date_retrieved
+    );
+
+UPDATE bronze_balance
+SET valid_from = date_retrieved,
+    last_seen = date_retrieved,
+    valid_to = (
+        SELECT MIN(later.date_retrieved)
+        FROM bronze_balance later
+        WHERE later.date_retrieved > bronze_balance.date_retrieved
+    );
+
+CREATE INDEX IF NOT EXISTS idx_bronze_pots_id_valid_to ON bronze_pots (id, valid_to);
+CREATE INDEX IF NOT EXISTS idx_bronze_balance_valid_to ON bronze_balance (valid_to);
+
+CREATE VIEW IF NOT EXISTS bronze_pots_current AS
+SELECT * FROM bronze_pots WHERE valid_to IS NULL;
+
+CREATE VIEW IF NOT EXISTS bronze_balance_current AS
+SELECT * FROM bronze_balance WHERE valid_to IS NULL;
@@ -0,0 +1,45 @@
+-- Storage profile v3: multiple accounts in one database
+--
+-- Transactions (bronze and silver) and balance snapshots are keyed by account_id. Pots
+-- already carry current_account_id. Watermarks are per account in pipeline_state
+-- ('transactions:<account_id>').
+
+ALTER TABLE bronze_transactions ADD COLUMN account_id TEXT;
+ALTER TABLE bronze_balance ADD COLUMN account_id TEXT;
+ALTER TABLE silver_transactions ADD COLUMN account_id TEXT;
+
+-- Rows loaded before v3 all came from the single configured account, which is the only
+-- account with a recorded watermark. Databases without one keep a NULL account_id here;
+-- main.py assigns those rows to the credentials' account on the next run
+-- (storage_profile.assign_unowned_rows).
+CREATE TABLE IF NOT EXISTS pipeline_state (
+    state_key TEXT PRIMARY KEY,
+    watermark TEXT,
+    last_id TEXT,
+    updated_at TIMESTAMP
+);
+
+UPDATE bronze_transactions
+SET account_id = (
+    SELECT CASE WHEN COUNT(*) = 1 THEN substr(MAX(state_key), length('transactions:') + 1) END
+    FROM pipeline_state
+    WHERE state_key LIKE 'transactions:%'
+);
+
+UPDATE bronze_balance
+SET account_id = (
+    SELECT CASE WHEN COUNT(*) = 1 THEN substr(MAX(state_key), length('transactions:') + 1) END
+    FROM pipeline_state
+    WHERE state_key LIKE 'transactions:%'
+);
+
+UPDATE silver_transactions
+SET account_id = (
+    SELECT bronze_transactions.account_id
+    FROM bronze_transactions
+    WHERE bronze_transactions.id = silver_transactions.id
+);
+
+CREATE INDEX IF NOT EXISTS idx_bronze_transactions_account_created ON bronze_transactions (account_id, created);
+CREATE INDEX IF NOT EXISTS idx_bronze_balance_account_valid_to ON bronze_balance (account_id, valid_to);
+CREATE INDEX IF NOT EXISTS idx_silver_transactions_account_created ON silver_transactions (account_id, created);
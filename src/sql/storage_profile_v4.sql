@@ -0,0 +1,16 @@
+-- Storage profile v4: content-hash upserts for mutable transaction fields
+--
+-- Transactions change after they are first seen (settled, notes, category, the amount of a
+-- pending transaction). bronze_transactions.content_hash is the hash of the row's source
+-- values; a transaction fetched again is rewritten only when its hash differs, moving
+-- date_retrieved forward so the incremental transform upserts it into silver.
+-- silver_transactions.updated_at records when a silver row last changed after its insert.
+
+ALTER TABLE bronze_transactions ADD COLUMN content_hash TEXT;
+ALTER TABLE silver_transactions ADD COLUMN updated_at TIMESTAMP;
+
+-- Rows loaded before v4 keep a NULL hash, so the first run to fetch them again rewrites them
+-- once; silver only records an update if a transformed column actually differs.
+
+-- Gold refresh and Parquet export find changed months by updated_at as well as inserted_at
+CREATE INDEX IF NOT EXISTS idx_silver_transactions_updated_at ON silver_transactions (updated_at);
@@ -0,0 +1,15 @@
+-- Storage profile v5: change sequence for silver transactions
+--
+-- inserted_at and updated_at only have one-second resolution, so gold refresh and Parquet
+-- export, which compared them with their watermark using `>`, missed rows changed in the same
+-- second as their previous run. Each bronze-to-silver transform now takes the next value of a
+-- counter kept in pipeline_state ('silver:change_seq') and stamps every silver row it inserts
+-- or changes with it. Gold refresh and export store the last sequence they processed instead.
+
+ALTER TABLE silver_transactions ADD COLUMN change_seq INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_silver_transactions_change_seq ON silver_transactions (change_seq);
+
+-- Rows transformed before v5 keep a NULL sequence. Timestamp watermarks can't be compared with
+-- the sequence, so they are dropped and the next run refreshes and exports every month once.
+DELETE FROM pipeline_state WHERE state_key IN ('transform:silver_to_gold', 'export:parquet');
@@ -0,0 +1,14 @@
+-- Storage profile v6: months that silver transactions moved out of
+--
+-- Gold refresh and Parquet export recompute the months of silver rows changed since their
+-- watermark, taken from each row's current `created`. When an upsert moves a transaction to
+-- another month, the month it left still held its amount. transform_bronze_to_silver.sql now
+-- records that month here, stamped with the change sequence of the transform that moved it,
+-- and silver_months_changed_since includes it.
+
+CREATE TABLE IF NOT EXISTS silver_month_moves (
+    change_seq INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    PRIMARY KEY (change_seq, year, month)
+) WITHOUT ROWID;
@@ -1,10 +1,21 @@
+-- Reads from bronze_transactions_delta, a temp table created by transform.py holding only the
+-- bronze rows retrieved since the last successful transform (or every row for a full rebuild)
+
+-- Take the next silver change sequence; every silver row this transform inserts or changes is
+-- stamped with it (see storage_profile_v5.sql)
+INSERT INTO pipeline_state (state_key, watermark, last_id, updated_at)
+VALUES ('silver:change_seq', 1, NULL, CURRENT_TIMESTAMP)
+ON CONFLICT (state_key) DO UPDATE SET
+    watermark = CAST(pipeline_state.watermark AS INTEGER) + 1,
+    updated_at = excluded.updated_at;
+
 -- Insert data into silver_counterparties table
 INSERT OR IGNORE INTO silver_counterparties (account_num, sort_code, name)
 SELECT DISTINCT
     counterparty_account_num,
     counterparty_sort_code,
     counterparty_name
-FROM bronze_transactions
+FROM bronze_transactions_delta
 WHERE counterparty_account_num IS NOT NULL AND counterparty_sort_code IS NOT NULL;
 
 -- Insert data into silver_merchants table
@@ -31,17 +42,30 @@ SELECT DISTINCT
     merchant_suggested_tags,
     merchant_foursquare_id,
     merchant_website
-FROM bronze_transactions
+FROM bronze_transactions_delta
 WHERE merchant_id IS NOT NULL;
 
--- Insert data into silver_transactions table
-INSERT OR IGNORE INTO silver_transactions (
-    id, description, amount, currency, created, category, notes, is_load, settled,
+-- Record the month each transaction is about to move out of, so gold refresh and export
+-- recompute it too (see storage_profile_v6.sql)
+INSERT OR IGNORE INTO silver_month_moves (change_seq, year, month)
+SELECT DISTINCT
+    (SELECT CAST(watermark AS INTEGER) FROM pipeline_state WHERE state_key = 'silver:change_seq'),
+    CAST(substr(s.created, 1, 4) AS INTEGER),
+    CAST(substr(s.created, 6, 2) AS INTEGER)
+FROM bronze_transactions_delta d
+JOIN silver_transactions s ON s.id = d.id
+WHERE substr(s.created, 1, 7) IS NOT substr(d.created, 1, 7);
+
+-- Upsert data into silver_transactions table. Bronze rows are only re-staged when their content
+-- changed, and an existing silver row is only rewritten (and its updated_at set) if a column differs.
+INSERT INTO silver_transactions (
+    id, account_id, description, amount, currency, created, category, notes, is_load, settled,
     local_amount, local_currency, counterparty_account_num, counterparty_sort_code,
-    merchant_id, inserted_at
+    merchant_id, inserted_at, change_seq
 )
 SELECT
     id,
+    account_id,
     description,
     amount,
     currency,
@@ -55,5 +79,53 @@ SELECT
     counterparty_account_num,
     counterparty_sort_code,
     merchant_id,
+    CURRENT_TIMESTAMP,
+    (SELECT CAST(watermark AS INTEGER) FROM pipeline_state WHERE state_key = 'silver:change_seq')
+FROM bronze_transactions_delta
+WHERE true
+ON CONFLICT (id) DO UPDATE SET
+    account_id = excluded.account_id,
+    description = excluded.description,
+    amount = excluded.amount,
+    currency = excluded.currency,
+    created = excluded.created,
+    category = excluded.category,
+    notes = excluded.notes,
+    is_load = excluded.is_load,
+    settled = excluded.settled,
+    local_amount = excluded.local_amount,
+    local_currency = excluded.local_currency,
+    counterparty_account_num = excluded.counterparty_account_num,
+    counterparty_sort_code = excluded.counterparty_sort_code,
+    merchant_id = excluded.merchant_id,
+    updated_at = excluded.inserted_at,
+    change_seq = excluded.change_seq
+WHERE (
+    silver_transactions.account_id, silver_transactions.description, silver_transactions.amount,
+    silver_transactions.currency, silver_transactions.created, silver_transactions.category,
+    silver_transactions.notes, silver_transactions.is_load, silver_transactions.settled,
+    silver_transactions.local_amount, silver_transactions.local_currency,
+    silver_transactions.counterparty_account_num, silver_transactions.counterparty_sort_code,
+    silver_transactions.merchant_id
+) IS NOT (
+    excluded.account_id, excluded.description, excluded.amount,
+    excluded.currency, excluded.created, excluded.category,
+    excluded.notes, excluded.is_load, excluded.settled,
+    excluded.local_amount, excluded.local_currency,
+    excluded.counterparty_account_num, excluded.counterparty_sort_code,
+    excluded.merchant_id
+);
+
+-- Advance the transform watermark to the newest bronze row processed
+INSERT INTO pipeline_state (state_key, watermark, last_id, updated_at)
+SELECT
+    'transform:bronze_to_silver',
+    MAX(date_retrieved),
+    NULL,
     CURRENT_TIMESTAMP
-FROM bronze_transactions;
\ No newline at end of file
+FROM bronze_transactions_delta
+WHERE date_retrieved IS NOT NULL
+HAVING MAX(date_retrieved) IS NOT NULL
+ON CONFLICT (state_key) DO UPDATE SET
+    watermark = excluded.watermark,
+    updated_at = excluded.updated_at;
@@ -0,0 +1,39 @@
+-- Recomputes the months listed in gold_refresh_months, a temp table created by transform.py
+-- holding (year, month, period_start, period_end) for every month touched since the last run.
+-- Spend is outgoing transactions in pounds, excluding top-ups and transfers into pots.
+
+DELETE FROM gold_monthly_spending
+WHERE (year, month) IN (SELECT year, month FROM gold_refresh_months);
+
+DELETE FROM gold_monthly_category_spending
+WHERE (year, month) IN (SELECT year, month FROM gold_refresh_months);
+
+INSERT INTO gold_monthly_spending (month, year, total_spend, avg_spend)
+SELECT
+    m.month,
+    m.year,
+    SUM(-t.amount) / 100.0,
+    AVG(-t.amount) / 100.0
+FROM gold_refresh_months m
+JOIN silver_transactions t
+    ON t.created >= m.period_start AND t.created < m.period_end
+WHERE t.amount < 0
+    AND COALESCE(t.is_load, 0) = 0
+    AND COALESCE(t.description, '') NOT LIKE 'pot\_%' ESCAPE '\'
+GROUP BY m.year, m.month;
+
+INSERT INTO gold_monthly_category_spending (year, month, category, total_spend, avg_spend, transaction_count)
+SELECT
+    m.year,
+    m.month,
+    COALESCE(t.category, 'uncategorised'),
+    SUM(-t.amount) / 100.0,
+    AVG(-t.amount) / 100.0,
+    COUNT(*)
+FROM gold_refresh_months m
+JOIN silver_transactions t
+    ON t.created >= m.period_start AND t.created < m.period_end
+WHERE t.amount < 0
+    AND COALESCE(t.is_load, 0) = 0
+    AND COALESCE(t.description, '') NOT LIKE 'pot\_%' ESCAPE '\'
+GROUP BY m.year, m.month, COALESCE(t.category, 'uncategorised');
@@ -1,3 +1,3 @@
-from .transform import transform_bronze_to_silver
+from .transform import transform_bronze_to_silver, transform_silver_to_gold, rebuild_gold_months
 
-__all__ = ['transform_bronze_to_silver']
\ No newline at end of file
+__all__ = ['transform_bronze_to_silver', 'transform_silver_to_gold', 'rebuild_gold_months']
\ No newline at end of file
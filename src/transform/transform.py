@@ -1,16 +1,248 @@
 import os
 import sqlite3
 import sys
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.utils import execute_sql_script
+import argparse
+import logging
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.utils.pipeline_state import ensure_pipeline_state_table, get_state, set_state
+from src.utils.utils import execute_sql_script
+from src.utils.storage_profile import connect_database
 
-def transform_bronze_to_silver(db_path, logger):
+TRANSFORM_STATE_KEY = 'transform:bronze_to_silver'
+GOLD_STATE_KEY = 'transform:silver_to_gold'
+SILVER_CHANGE_SEQ_KEY = 'silver:change_seq'
+SQL_DIR = os.path.join(os.path.dirname(__file__), '../sql')
+
+REBUILD_SILVER_SQL = '''
+DELETE FROM silver_transactions;
+DELETE FROM silver_merchants;
+DELETE FROM silver_counterparties;
+'''
+
+def _create_bronze_delta(conn, watermark):
+    """
+    Stage the bronze rows to transform in the temp table read by transform_bronze_to_silver.sql
+
+    Args:
+        watermark: Only rows with a later date_retrieved are staged. None stages every row.
+    """
+    conn.execute('DROP TABLE IF EXISTS temp.bronze_transactions_delta')
+    if watermark is None:
+        conn.execute('CREATE TEMP TABLE bronze_transactions_delta AS SELECT * FROM bronze_transactions')
+    else:
+        conn.execute('''
+            CREATE TEMP TABLE bronze_transactions_delta AS
+            SELECT * FROM bronze_transactions WHERE date_retrieved > ?
+        ''', (watermark,))
+
+    return conn.execute('SELECT COUNT(*) FROM bronze_transactions_delta').fetchone()[0]
+
+def transform_bronze_to_silver(db_path, logger, full_rebuild=False):
+    """
+    Transform bronze rows retrieved since the last successful run into the silver layer
+
+    Args:
+        db_path: Path to SQLite database file
+        logger: Logger instance
+        full_rebuild: Clear the silver tables and reprocess every bronze row
+
+    Returns:
+        int: Number of bronze rows processed
+    """
+    conn = None
     try:
-        conn = sqlite3.connect(db_path)
-        sql_dir = os.path.join(os.path.dirname(__file__), '../sql')
+        conn = connect_database(db_path)
+
+        ensure_pipeline_state_table(conn)
+        conn.commit()
+
+        state = None if full_rebuild else get_state(conn, TRANSFORM_STATE_KEY)
+        watermark = state['watermark'] if state else None
+
+        delta_rows = _create_bronze_delta(conn, watermark)
+        if full_rebuild:
+            logger.info(f'[transform.py] Full rebuild of silver layer from {delta_rows} bronze rows')
+        else:
+            logger.info(f'[transform.py] Transforming {delta_rows} bronze rows retrieved after {watermark}')
+
+        with open(os.path.join(SQL_DIR, 'transform_bronze_to_silver.sql'), 'r') as file:
+            sql_script = file.read()
 
-        execute_sql_script(conn, os.path.join(sql_dir, 'transform_bronze_to_silver.sql'))
+        if full_rebuild:
+            sql_script = REBUILD_SILVER_SQL + sql_script
+
+        # Run the whole transform, including the watermark update, as one transaction
+        try:
+            conn.executescript(f'BEGIN;\n{sql_script}\nCOMMIT;')
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+        logger.info('[transform.py] Bronze layer successfully transformed to silver layer')
+        return delta_rows
     except Exception as e:
         logger.error(f'[transform.py] Error transforming bronze layer to silver layer: {e}')
+    finally:
+        if conn:
+            conn.close()
+
+def month_bounds(year, month):
+    """Lower and upper bounds (YYYY-MM) of a month, for range comparisons against ISO 8601 timestamps"""
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f'{year:04d}-{month:02d}', f'{next_year:04d}-{next_month:02d}'
+
+def silver_watermark(conn):
+    """
+    Latest silver change sequence, taken by the last bronze-to-silver transform (see storage_profile_v5.sql)
+
+    The sequence only ever increases, unlike the one-second inserted_at/updated_at timestamps,
+    so comparing it with `>` never misses rows changed alongside the previous watermark.
+    """
+    return conn.execute('''
+        SELECT MAX(change_seq) FROM (
+            SELECT MAX(change_seq) AS change_seq FROM silver_transactions
+            UNION ALL
+            SELECT CAST(watermark AS INTEGER) FROM pipeline_state WHERE state_key = ?
+        )
+    ''', (SILVER_CHANGE_SEQ_KEY,)).fetchone()[0]
+
+def silver_months_changed_since(conn, watermark):
+    """
+    (year, month) of every silver transaction inserted or updated after the watermark, and of
+    every month a transaction moved out of since then
+
+    Args:
+        watermark: silver_watermark value (as stored in pipeline_state), or None for every month
+    """
+    where = ''
+    params = ()
+    if watermark is not None:
+        where = ' WHERE change_seq > ?'
+        params = (int(watermark), int(watermark))
+    query = f'''
+        SELECT CAST(substr(created, 1, 4) AS INTEGER), CAST(substr(created, 6, 2) AS INTEGER)
+        FROM silver_transactions{where}
+        UNION
+        SELECT year, month FROM silver_month_moves{where}
+    '''
+    return sorted(conn.execute(query, params).fetchall())
+
+def _refresh_gold_months(conn, months):
+    """Recompute the gold aggregates for `months` as one transaction"""
+    conn.execute('DROP TABLE IF EXISTS temp.gold_refresh_months')
+    conn.execute('''
+        CREATE TEMP TABLE gold_refresh_months (
+            year INTEGER,
+            month INTEGER,
+            period_start TEXT,
+            period_end TEXT
+        )
+    ''')
+    conn.executemany(
+        'INSERT INTO gold_refresh_months (year, month, period_start, period_end) VALUES (?, ?, ?, ?)',
+        [(year, month, *month_bounds(year, month)) for year, month in months]
+    )
+    conn.commit()
+
+    with open(os.path.join(SQL_DIR, 'transform_silver_to_gold.sql'), 'r') as file:
+        sql_script = file.read()
+
+    try:
+        conn.executescript(f'BEGIN;\n{sql_script}\nCOMMIT;')
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+def transform_silver_to_gold(db_path, logger, full_rebuild=False):
+    """
+    Refresh the gold monthly spending aggregates for months touched since the last run
+
+    Args:
+        db_path: Path to SQLite database file
+        logger: Logger instance
+        full_rebuild: Recompute every month in the silver layer
+
+    Returns:
+        list: (year, month) pairs that were recomputed
+    """
+    conn = None
+    try:
+        conn = connect_database(db_path)
+        ensure_pipeline_state_table(conn)
+        # Databases pulled from S3 may predate the category table and gold indexes
+        execute_sql_script(conn, os.path.join(SQL_DIR, 'create_gold_layer.sql'))
+
+        state = None if full_rebuild else get_state(conn, GOLD_STATE_KEY)
+        watermark = state['watermark'] if state else None
+        new_watermark = silver_watermark(conn)
+
+        months = silver_months_changed_since(conn, watermark)
+        if full_rebuild:
+            conn.execute('DELETE FROM gold_monthly_spending')
+            conn.execute('DELETE FROM gold_monthly_category_spending')
+            conn.commit()
+
+        if months:
+            logger.info(f'[transform.py] Recomputing gold aggregates for {len(months)} months')
+            _refresh_gold_months(conn, months)
+
+        if new_watermark is not None:
+            set_state(conn, GOLD_STATE_KEY, new_watermark)
+            conn.commit()
+
+        logger.info('[transform.py] Silver layer successfully transformed to gold layer')
+        return months
+    except Exception as e:
+        logger.error(f'[transform.py] Error transforming silver layer to gold layer: {e}')
+    finally:
+        if conn:
+            conn.close()
+
+def _parse_month(value):
+    year, month = value.split('-')
+    return int(year), int(month)
+
+def rebuild_gold_months(db_path, logger, start_month, end_month):
+    """
+    Recompute the gold aggregates for an inclusive range of months
+
+    Args:
+        db_path: Path to SQLite database file
+        logger: Logger instance
+        start_month: First month to rebuild (YYYY-MM)
+        end_month: Last month to rebuild (YYYY-MM)
+
+    Returns:
+        list: (year, month) pairs that were recomputed
+    """
+    year, month = _parse_month(start_month)
+    end = _parse_month(end_month)
+    if (year, month) > end:
+        raise ValueError(f"start_month {start_month} is after end_month {end_month}")
+
+    months = []
+    while (year, month) <= end:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    conn = connect_database(db_path)
+    try:
+        execute_sql_script(conn, os.path.join(SQL_DIR, 'create_gold_layer.sql'))
+        _refresh_gold_months(conn, months)
+    finally:
+        conn.close()
+
+    logger.info(f'[transform.py] Rebuilt gold aggregates for {start_month} to {end_month} ({len(months)} months)')
+    return months
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Rebuild the gold monthly spending aggregates for a range of months')
+    parser.add_argument('--db-path', default=os.getenv('LOCAL_DB_PATH'), help='Path to SQLite database file')
+    parser.add_argument('--from', dest='start_month', required=True, help='First month to rebuild (YYYY-MM)')
+    parser.add_argument('--to', dest='end_month', required=True, help='Last month to rebuild (YYYY-MM)')
+    args = parser.parse_args()
 
-    logger.info('[transform.py] Bronze layer successfully transformed to silver layer')
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - monzo-etl - %(levelname)s - %(message)s')
+    rebuild_gold_months(args.db_path, logging.getLogger('main'), args.start_month, args.end_month)
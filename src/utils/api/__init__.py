@@ -1,4 +1,5 @@
 from .api_client import MonzoAPIClient
+from .async_api_client import AsyncMonzoAPIClient
 from .token_manager import MonzoTokenManager
 
-__all__ = ['MonzoAPIClient', 'MonzoTokenManager']
\ No newline at end of file
+__all__ = ['MonzoAPIClient', 'AsyncMonzoAPIClient', 'MonzoTokenManager']
\ No newline at end of file
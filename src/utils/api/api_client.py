@@ -1,25 +1,57 @@
+import os
+import copy
 import json
-import requests
 from datetime import datetime
-from src.utils import get_secret
-from .token_manager import MonzoTokenManager
+from ..utils import get_secret
+from .flatten import TRANSACTION_COLUMNS, flatten_transactions
+from .http_session import MonzoSession, get_api_base_url, get_session
+from .token_manager import DEFAULT_CREDENTIALS_SECRET, MonzoTokenManager
 
 class MonzoAPIClient:
     """
     A client for interacting with the Monzo API.
 
-    Credentials retrieved via AWS secrets manager.
+    Credentials retrieved via AWS secrets manager. All requests go through a pooled
+    MonzoSession with retries and a shared rate limit.
+
+    Args:
+        session: MonzoSession to use (defaults to the container-wide shared session)
+        base_url: Monzo API base URL (defaults to MONZO_API_BASE_URL or https://api.monzo.com)
+        access_token: Use this access token instead of the one managed by MonzoTokenManager,
+                      e.g. for a local fake server
+        account_id: Account to query (required with access_token, defaults to the account in the
+                    credentials secret)
+        secret_name: Secrets Manager secret holding the client credentials
+                     (defaults to MONZO_CREDENTIALS_SECRET or monzo-api-credentials)
+        token_table: DynamoDB table holding the OAuth tokens (defaults to MONZO_TOKEN_TABLE or monzo-tokens)
+        landing_zone: RawLandingZone every raw transactions, balance and pots response is recorded to (optional)
     """
-    def __init__(self):
-        self.base_url = 'https://api.monzo.com'
-        self.monzo_credentials = get_secret('monzo-api-credentials')
-        self.token_manager = MonzoTokenManager(
-            client_id=self.monzo_credentials['monzo_client_id'],
-            client_secret=self.monzo_credentials['monzo_client_secret'],
-            table_name='monzo-tokens'
-        )
-        self.access_token = json.loads(self.token_manager.get_valid_token()['body'])['access_token']
-        self.account_id = self.monzo_credentials['monzo_account_id']
+    landing_zone = None
+
+    def __init__(self, session: MonzoSession = None, base_url: str = None, access_token: str = None,
+                 account_id: str = None, secret_name: str = None, token_table: str = None, landing_zone=None):
+        self.base_url = base_url or get_api_base_url()
+        self.landing_zone = landing_zone
+        self.session = session or get_session()
+
+        if access_token:
+            # Injected credentials, e.g. for a local fake server, skip AWS entirely
+            self.access_token = access_token
+            self.account_id = account_id
+        else:
+            secret_name = secret_name or os.getenv('MONZO_CREDENTIALS_SECRET', DEFAULT_CREDENTIALS_SECRET)
+            self.monzo_credentials = get_secret(secret_name)
+            self.token_manager = MonzoTokenManager(
+                client_id=self.monzo_credentials['monzo_client_id'],
+                client_secret=self.monzo_credentials['monzo_client_secret'],
+                table_name=token_table or os.getenv('MONZO_TOKEN_TABLE', 'monzo-tokens'),
+                session=self.session,
+                base_url=self.base_url,
+                secret_name=secret_name
+            )
+            self.access_token = json.loads(self.token_manager.get_valid_token()['body'])['access_token']
+            self.account_id = account_id or self.monzo_credentials['monzo_account_id']
+
         self.headers = {'Authorization': f'Bearer {self.access_token}',
                         'Content-Type': 'application/json'}
         
@@ -34,85 +66,19 @@ class MonzoAPIClient:
         Extract merchant information from nested transaction data and flatten it
         Returns a list of transactions with merchant info flattened into the main dict
         """
-        processed_transactions = []
-        
-        for transaction in transactions_data.get('transactions', []):
-            # Create a new dict with basic transaction info
-            processed_tx = {
-                'id': transaction.get('id'),
-                'description': transaction.get('description'),
-                'amount': transaction.get('amount', 0),
-                'currency': transaction.get('currency'),
-                'created': transaction.get('created'),
-                'category': transaction.get('category'),
-                'notes': transaction.get('notes'),
-                'is_load': transaction.get('is_load', False),
-                'settled': transaction.get('settled'),
-                'local_amount': transaction.get('local_amount', 0),
-                'local_currency': transaction.get('local_currency'),
-                'counterparty_name': json.loads(json.dumps(transaction.get('counterparty'))).get('name'),
-                'counterparty_account_num': json.loads(json.dumps(transaction.get('counterparty'))).get('account_number'),
-                'counterparty_sort_code': json.loads(json.dumps(transaction.get('counterparty'))).get('sort_code')
-            }
-            
-            # Initialise all merchant fields with None
-            merchant_fields = {
-                'merchant_id': None,
-                'merchant_name': None,
-                'merchant_category': None,
-                'merchant_logo': None,
-                'merchant_emoji': None,
-                'merchant_online': False,
-                'merchant_atm': False,
-                'merchant_address': None,
-                'merchant_city': None,
-                'merchant_postcode': None,
-                'merchant_country': None,
-                'merchant_latitude': None,
-                'merchant_longitude': None,
-                'merchant_google_places_id': None,
-                'merchant_suggested_tags': None,
-                'merchant_foursquare_id': None,
-                'merchant_website': None
-            }
-            
-            # Extract merchant information if it exists
-            merchant = transaction.get('merchant')
-            if merchant:
-                # Update merchant details
-                merchant_fields.update({
-                    'merchant_id': merchant.get('id'),
-                    'merchant_name': merchant.get('name'),
-                    'merchant_category': merchant.get('category'),
-                    'merchant_logo': merchant.get('logo'),
-                    'merchant_emoji': merchant.get('emoji'),
-                    'merchant_online': merchant.get('online', False),
-                    'merchant_atm': merchant.get('atm', False)
-                })
-                
-                # Extract address if it exists
-                address = merchant.get('address', {})
-                if address:
-                    merchant_fields.update({
-                        'merchant_address': address.get('address'),
-                        'merchant_city': address.get('city'),
-                        'merchant_postcode': address.get('postcode'),
-                        'merchant_country': address.get('country'),
-                        'merchant_latitude': address.get('latitude'),
-                        'merchant_longitude': address.get('longitude')
-                    })
-            
-            # Add all merchant fields to the transaction
-            processed_tx.update(merchant_fields)
-            processed_transactions.append(processed_tx)
-        
-        return processed_transactions
+        rows = flatten_transactions(transactions_data.get('transactions', []), account_id=self.account_id)
+        return [dict(zip(TRANSACTION_COLUMNS, row)) for row in rows]
+
+    def _land(self, endpoint, params, body):
+        """Record a raw response in the landing zone, if one is attached"""
+        if self.landing_zone is not None:
+            self.landing_zone.record(endpoint, self.account_id, params, body)
 
     def whoami(self):
         """
         Call the /ping/whoami endpoint to verify authentication and get user information
         """
-        response = requests.get(
+        response = self.session.get(
             f'{self.base_url}/ping/whoami', 
             headers=self.headers
         )
@@ -122,19 +88,39 @@ class MonzoAPIClient:
         else:
             response.raise_for_status()
 
-    def list_accounts(self):
-        response = requests.get(
+    def list_accounts(self, include_closed=False):
+        """
+        Retrieve the accounts the access token can see (personal, joint, ...)
+
+        Args:
+            include_closed: Also return closed accounts
+
+        Returns:
+            list: Account dictionaries as returned by /accounts
+        """
+        response = self.session.get(
             f'{self.base_url}/accounts', 
             headers=self.headers
         )
         
         if response.status_code == 200:
             accounts = response.json().get('accounts', [])
-            for account in accounts:
-                print(f"Account ID: {account['id']}, Type: {account['type']}")
+            if not include_closed:
+                accounts = [account for account in accounts if not account.get('closed', False)]
+            return accounts
         else:
             response.raise_for_status()
 
+    def for_account(self, account_id):
+        """
+        A client for another account visible to the same access token
+
+        The copy shares this client's session (and so its connection pool and rate limit), token and landing zone.
+        """
+        client = copy.copy(self)
+        client.account_id = account_id
+        return client
+
     def list_pots(self):
         """
         Retrieve a list of pots associated with the account
@@ -143,28 +129,29 @@ class MonzoAPIClient:
             'current_account_id': self.account_id
         }
         
-        response = requests.get(
+        response = self.session.get(
             f'{self.base_url}/pots', 
             headers=self.headers,
             params=params
         )
 
         if response.status_code == 200:
-            return response.json()
+            data = response.json()
+            self._land('/pots', params, data)
+            return data
         else:
             response.raise_for_status()
 
-    def get_transactions(self, 
-                          limit=200, 
-                          since=None, 
-                          before=None):
+    @staticmethod
+    def _format_timestamp(value):
+        """Format a datetime as an ISO 8601 UTC timestamp, passing strings (timestamps or IDs) through"""
+        if isinstance(value, datetime):
+            return value.isoformat() + 'Z'
+        return value
+
+    def _get_transactions_page(self, limit, since=None, before=None):
         """
-        Retrieve transactions with optional filtering
-        
-        Args:
-            limit: Maximum number of transactions to retrieve (default 100)
-            since: Retrieve transactions since this date
-            before: Retrieve transactions before this date
+        Make a single /transactions request and return the raw JSON response
         """
         # Prepare query parameters
         params = {
@@ -175,19 +162,13 @@ class MonzoAPIClient:
         
         # Add optional date filters
         if since:
-            # Ensure the date is in ISO 8601 format with UTC timezone
-            if isinstance(since, datetime):
-                since = since.isoformat() + 'Z'
-            params['since'] = since
+            params['since'] = self._format_timestamp(since)
         
         if before:
-            # Ensure the date is in ISO 8601 format with UTC timezone
-            if isinstance(before, datetime):
-                before = before.isoformat() + 'Z'
-            params['before'] = before
+            params['before'] = self._format_timestamp(before)
         
         # Make the API call
-        response = requests.get(
+        response = self.session.get(
             f'{self.base_url}/transactions', 
             headers=self.headers,
             params=params
@@ -195,29 +176,87 @@ class MonzoAPIClient:
         
         # Check for successful response
         if response.status_code == 200:
-            return self._extract_merchant_info(response.json())
+            data = response.json()
+            self._land('/transactions', params, data)
+            return data
         else:
             # Handle potential errors
             response.raise_for_status()
+
+    def get_transactions(self, 
+                          limit=200, 
+                          since=None, 
+                          before=None):
+        """
+        Retrieve transactions with optional filtering (single request, see iter_transactions for paging)
+        
+        Args:
+            limit: Maximum number of transactions to retrieve (default 100)
+            since: Retrieve transactions since this date
+            before: Retrieve transactions before this date
+        """
+        return self._extract_merchant_info(self._get_transactions_page(limit, since=since, before=before))
+
+    def iter_transactions(self, 
+                          since=None, 
+                          before=None, 
+                          page_size=100,
+                          as_rows=False):
+        """
+        Yield flattened pages of transactions, following Monzo's cursor pagination until the window is exhausted
+
+        The first request uses `since` as given (timestamp or transaction ID); every following
+        request passes the ID of the last transaction on the previous page as `since`, so only
+        one page is held in memory at a time.
+
+        Args:
+            since: Retrieve transactions since this date or transaction ID
+            before: Retrieve transactions before this date
+            page_size: Number of transactions per request (Monzo allows at most 100)
+            as_rows: Yield bronze_transactions tuples (see flatten.TRANSACTION_COLUMNS) instead of dicts
+        """
+        cursor = since
+
+        while True:
+            page = self._get_transactions_page(page_size, since=cursor, before=before)
+            raw_transactions = page.get('transactions', [])
+
+            if not raw_transactions:
+                return
+
+            yield (flatten_transactions(raw_transactions, account_id=self.account_id) if as_rows
+                   else self._extract_merchant_info(page))
+
+            if len(raw_transactions) < page_size:
+                return
+
+            cursor = raw_transactions[-1]['id']
     
+    @staticmethod
+    def parse_balance(data, account_id):
+        """Shape a raw /balance response into the balance dictionary the loader expects"""
+        return {
+            'account_id': account_id,
+            'balance': data['balance'],
+            'total_balance': data['total_balance'],
+            'currency': data['currency'],
+            'spend_today': abs(data['spend_today'])
+        }
+
     def get_balance(self):
         """
         Retrieve current balance and spending information
         """
-        response = requests.get(
+        params = {'account_id': self.account_id}
+        response = self.session.get(
             f'{self.base_url}/balance',
             headers=self.headers,
-            params={'account_id': self.account_id}
+            params=params
         )
         
         if response.status_code == 200:
             data = response.json()
-            balance = {
-                'balance': data['balance'],
-                'total_balance': data['total_balance'],
-                'currency': data['currency'],
-                'spend_today': abs(data['spend_today'])
-            }
-            return balance
+            self._land('/balance', params, data)
+            return self.parse_balance(data, self.account_id)
         else:
             response.raise_for_status()
\ No newline at end of file
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+# Declarative mapping from each bronze_transactions column to its location in a raw
+# /transactions record (with merchant expanded): (column, path of keys, default if missing)
+TRANSACTION_FIELD_MAP = (
+    ('id', ('id',), None),
+    ('account_id', ('account_id',), None),
+    ('description', ('description',), None),
+    ('amount', ('amount',), 0),
+    ('currency', ('currency',), None),
+    ('created', ('created',), None),
+    ('category', ('category',), None),
+    ('notes', ('notes',), None),
+    ('is_load', ('is_load',), False),
+    ('settled', ('settled',), None),
+    ('local_amount', ('local_amount',), 0),
+    ('local_currency', ('local_currency',), None),
+    ('counterparty_name', ('counterparty', 'name'), None),
+    ('counterparty_account_num', ('counterparty', 'account_number'), None),
+    ('counterparty_sort_code', ('counterparty', 'sort_code'), None),
+    ('merchant_id', ('merchant', 'id'), None),
+    ('merchant_name', ('merchant', 'name'), None),
+    ('merchant_category', ('merchant', 'category'), None),
+    ('merchant_logo', ('merchant', 'logo'), None),
+    ('merchant_emoji', ('merchant', 'emoji'), None),
+    ('merchant_online', ('merchant', 'online'), False),
+    ('merchant_atm', ('merchant', 'atm'), False),
+    ('merchant_address', ('merchant', 'address', 'address'), None),
+    ('merchant_city', ('merchant', 'address', 'city'), None),
+    ('merchant_postcode', ('merchant', 'address', 'postcode'), None),
+    ('merchant_country', ('merchant', 'address', 'country'), None),
+    ('merchant_latitude', ('merchant', 'address', 'latitude'), None),
+    ('merchant_longitude', ('merchant', 'address', 'longitude'), None),
+    ('merchant_google_places_id', ('merchant', 'metadata', 'google_places_id'), None),
+    ('merchant_suggested_tags', ('merchant', 'metadata', 'suggested_tags'), None),
+    ('merchant_foursquare_id', ('merchant', 'metadata', 'foursquare_id'), None),
+    ('merchant_website', ('merchant', 'metadata', 'website'), None),
+)
+
+# Column order of the tuples produced by flatten_transactions (every bronze_transactions column)
+TRANSACTION_COLUMNS = tuple(column for column, _, _ in TRANSACTION_FIELD_MAP) + ('date_retrieved',)
+
+_MISSING = object()
+
+def _compile_getter(path, default):
+    """Build a function reading `path` from a raw record, returning `default` if any step is missing"""
+    if len(path) == 1:
+        key = path[0]
+        return lambda record: record.get(key, default)
+
+    def getter(record):
+        value = record
+        for key in path:
+            # Unexpanded or null nested objects (e.g. merchant as a bare ID) yield the default
+            if not isinstance(value, dict):
+                return default
+            value = value.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+        return value
+
+    return getter
+
+_TRANSACTION_GETTERS = tuple(_compile_getter(path, default) for _, path, default in TRANSACTION_FIELD_MAP)
+
+ACCOUNT_ID_INDEX = TRANSACTION_COLUMNS.index('account_id')
+
+def flatten_transactions(raw_transactions, date_retrieved=None, account_id=None):
+    """
+    Flatten a page of raw Monzo transactions into bronze_transactions rows in one pass
+
+    Args:
+        raw_transactions: List of transaction dicts as returned by /transactions
+        date_retrieved: Retrieval timestamp stored with every row (defaults to now)
+        account_id: Account the page was requested for, used where a record doesn't include its own
+
+    Returns:
+        list: One tuple per transaction, ordered as TRANSACTION_COLUMNS
+    """
+    if date_retrieved is None:
+        date_retrieved = datetime.now().isoformat()
+
+    getters = _TRANSACTION_GETTERS
+    rows = [
+        tuple([getter(transaction) for getter in getters] + [date_retrieved])
+        for transaction in raw_transactions
+    ]
+
+    if account_id is not None:
+        rows = [
+            row if row[ACCOUNT_ID_INDEX] is not None
+            else row[:ACCOUNT_ID_INDEX] + (account_id,) + row[ACCOUNT_ID_INDEX + 1:]
+            for row in rows
+        ]
+    return rows
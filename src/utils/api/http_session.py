@@ -0,0 +1,205 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, UTC
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_API_BASE_URL = 'https://api.monzo.com'
+
+def get_api_base_url() -> str:
+    """Monzo API base URL, overridable with MONZO_API_BASE_URL (e.g. to point at a local fake server)"""
+    return os.getenv('MONZO_API_BASE_URL', DEFAULT_API_BASE_URL).rstrip('/')
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every caller of a MonzoSession.
+
+    Args:
+        rate: Tokens added per second (sustained requests per second)
+        capacity: Maximum tokens held (largest burst allowed)
+    """
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+class MonzoSession:
+    """
+    Pooled HTTP session for all Monzo API calls, with retries and client-side rate limiting.
+
+    Connections are kept alive in a pool shared by all threads. Responses with a status in
+    RETRY_STATUS_CODES and connection errors are retried with exponential backoff and full
+    jitter. A Retry-After header is honoured as given; if it asks for a longer wait than
+    max_retry_after the response is returned instead of retried. Every attempt takes a token
+    from the rate limiter.
+
+    Args:
+        pool_size: Maximum connections kept open per host
+        max_retries: Retries after the first attempt before the last response/error is returned
+        backoff_factor: Base delay in seconds, doubled on every retry
+        max_backoff: Upper bound on any single backoff delay in seconds
+        max_retry_after: Longest Retry-After wait in seconds the session will sleep for
+        timeout: Per-request timeout in seconds
+        rate_limiter: RateLimiter shared between callers (no limit if None)
+
+    Request, retry and rate-limited (429) counts are kept in `stats` for run metrics.
+    """
+    def __init__(
+            self,
+            pool_size: int = 10,
+            max_retries: int = 5,
+            backoff_factor: float = 0.5,
+            max_backoff: float = 30.0,
+            max_retry_after: float = 120.0,
+            timeout: float = 30.0,
+            rate_limiter: RateLimiter = None
+    ):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.stats = {'requests': 0, 'retries': 0, 'rate_limited': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def snapshot_stats(self) -> dict:
+        """Copy of the counters, for working out the calls made during one run of a warm container"""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+    def _retry_after(self, response) -> float:
+        """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+
+        return max(0.0, delay)
+
+    def request(self, method: str, url: str, retry_statuses=RETRY_STATUS_CODES, retry_connection_errors: bool = True,
+                **kwargs):
+        """
+        Make a request, retrying transient failures
+
+        Args:
+            method: HTTP method
+            url: Full request URL
+            retry_statuses: Status codes to retry (pass a narrower set for non-idempotent calls)
+            retry_connection_errors: Retry connection errors and timeouts (pass False for non-idempotent calls,
+                as the server may have acted on a request whose response was lost)
+            **kwargs: Passed through to requests.Session.request
+
+        Returns:
+            requests.Response: The first non-retryable response, the last response once retries run out, or a
+                response whose Retry-After exceeds max_retry_after
+        """
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            self._count('requests')
+            if attempt:
+                self._count('retries')
+
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._count('errors')
+                if not retry_connection_errors or attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code == 429:
+                self._count('rate_limited')
+            elif response.status_code >= 500:
+                self._count('errors')
+
+            if response.status_code not in retry_statuses or attempt == self.max_retries:
+                return response
+
+            delay = self._retry_after(response)
+            if delay is not None and delay > self.max_retry_after:
+                # Give up rather than retry early into a rate limit the server says lasts longer
+                return response
+            time.sleep(delay if delay is not None else self._backoff(attempt))
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+def get_session() -> MonzoSession:
+    """
+    Get the container-wide MonzoSession, creating it on first use
+
+    Configured from the environment:
+        MONZO_HTTP_POOL_SIZE (default 10), MONZO_HTTP_MAX_RETRIES (default 5),
+        MONZO_HTTP_MAX_RETRY_AFTER_SECONDS (default 120), MONZO_RATE_LIMIT_PER_SECOND (default 10), MONZO_RATE_LIMIT_BURST (default 10)
+    """
+    global _shared_session
+
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = MonzoSession(
+                pool_size=int(os.getenv('MONZO_HTTP_POOL_SIZE', 10)),
+                max_retries=int(os.getenv('MONZO_HTTP_MAX_RETRIES', 5)),
+                max_retry_after=float(os.getenv('MONZO_HTTP_MAX_RETRY_AFTER_SECONDS', 120)),
+                rate_limiter=RateLimiter(
+                    rate=float(os.getenv('MONZO_RATE_LIMIT_PER_SECOND', 10)),
+                    capacity=int(os.getenv('MONZO_RATE_LIMIT_BURST', 10))
+                )
+            )
+        return _shared_session
@@ -1,3 +1,4 @@
+import os
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from src.utils import get_secret
 import webbrowser
@@ -38,7 +39,7 @@ class OAuthHandler(BaseHTTPRequestHandler):
             raise KeyboardInterrupt
 
 
-secrets = get_secret('monzo-api-credentials')
+secrets = get_secret(os.getenv('MONZO_CREDENTIALS_SECRET', 'monzo-api-credentials'))
 CLIENT_ID = secrets['monzo_client_id']
 CLIENT_SECRET = secrets['monzo_client_secret']
 
@@ -1,10 +1,19 @@
+import os
 import json
-import boto3
 import requests
 from datetime import datetime, timedelta, UTC
+from ..utils import get_client, get_resource
+from .http_session import MonzoSession, get_api_base_url, get_session
+
+# Access tokens kept for the life of the container, keyed by (table_name, client_id), so warm
+# Lambda invocations can skip DynamoDB entirely while the token is still valid
+_token_cache = {}
+
+DEFAULT_CREDENTIALS_SECRET = 'monzo-api-credentials'
 
 class MonzoTokenManager:
-    def __init__(self, client_id: str, client_secret: str, table_name: str):
+    def __init__(self, client_id: str, client_secret: str, table_name: str, session: MonzoSession = None,
+                 refresh_margin_seconds: int = None, base_url: str = None, secret_name: str = None):
         """
         Initialise MonzoTokenManager with Monzo credentials and DynamoDB table name.
         
@@ -12,11 +21,23 @@ class MonzoTokenManager:
             client_id (str): Monzo API client ID
             client_secret (str): Monzo API client secret
             table_name (str): Name of the DynamoDB table for token storage
+            session (MonzoSession): HTTP session for token requests (defaults to the shared session)
+            refresh_margin_seconds (int): Refresh tokens that expire within this many seconds
+                (defaults to MONZO_TOKEN_REFRESH_MARGIN_SECONDS or 300)
+            base_url (str): Monzo API base URL (defaults to MONZO_API_BASE_URL or https://api.monzo.com)
+            secret_name (str): Secrets Manager secret holding the refresh token
+                (defaults to MONZO_CREDENTIALS_SECRET or monzo-api-credentials)
         """
         self.client_id = client_id
         self.client_secret = client_secret
         self.table_name = table_name
-        self.dynamodb = boto3.resource('dynamodb')
+        self.secret_name = secret_name or os.getenv('MONZO_CREDENTIALS_SECRET', DEFAULT_CREDENTIALS_SECRET)
+        self.session = session or get_session()
+        self.base_url = base_url or get_api_base_url()
+        if refresh_margin_seconds is None:
+            refresh_margin_seconds = int(os.getenv('MONZO_TOKEN_REFRESH_MARGIN_SECONDS', 300))
+        self.refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self.dynamodb = get_resource('dynamodb')
         
         # Validate credentials
         if not all([client_id, client_secret, table_name]):
@@ -28,6 +49,9 @@ class MonzoTokenManager:
         
         Args:
             tokens (dict): Token data including access_token, refresh_token, and expires_in
+
+        Returns:
+            str: ISO 8601 expiry time of the stored access token
         """
         if not tokens.get('access_token'):
             raise ValueError("Invalid tokens: access_token is required")
@@ -47,6 +71,8 @@ class MonzoTokenManager:
         except Exception as e:
             raise Exception(f"Failed to store tokens in DynamoDB: {str(e)}")
 
+        return expiry.isoformat()
+
     def get_stored_tokens(self):
         """
         Retrieve tokens from DynamoDB.
@@ -75,14 +101,17 @@ class MonzoTokenManager:
             raise ValueError("refresh_token is required")
             
         try:
-            response = requests.post(
-                'https://api.monzo.com/oauth2/token',
+            # Only retry rate limiting: a 5xx or a lost response may mean the refresh token was already rotated
+            response = self.session.post(
+                f'{self.base_url}/oauth2/token',
                 data={
                     'grant_type': 'refresh_token',
                     'client_id': self.client_id,
                     'client_secret': self.client_secret,
                     'refresh_token': refresh_token
-                }
+                },
+                retry_statuses={429},
+                retry_connection_errors=False
             )
             
             if response.status_code != 200:
@@ -102,13 +131,13 @@ class MonzoTokenManager:
             
             try:
                 # Update the refresh token in AWS Secrets Manager
-                secrets_manager = boto3.client('secretsmanager')
-                secret_response = secrets_manager.get_secret_value(SecretId='monzo-api-credentials')
+                secrets_manager = get_client('secretsmanager')
+                secret_response = secrets_manager.get_secret_value(SecretId=self.secret_name)
                 credentials = json.loads(secret_response['SecretString'])
                 credentials['monzo_refresh_token'] = new_tokens['refresh_token']
                 
                 secrets_manager.put_secret_value(
-                    SecretId='monzo-api-credentials',
+                    SecretId=self.secret_name,
                     SecretString=json.dumps(credentials)
                 )
             except Exception as e:
@@ -119,14 +148,46 @@ class MonzoTokenManager:
         except requests.exceptions.RequestException as e:
             raise Exception(f"HTTP request failed during token refresh: {str(e)}")
 
-    def get_valid_token(self):
+    def _is_fresh(self, expires_at):
+        """Whether an access token expiring at `expires_at` (ISO 8601) is valid beyond the refresh margin"""
+        if not expires_at:
+            return False
+        try:
+            expiry = datetime.fromisoformat(expires_at)
+        except (TypeError, ValueError):
+            return False
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=UTC)
+        return expiry - self.refresh_margin > datetime.now(UTC)
+
+    def _token_response(self, access_token, expires_at):
+        _token_cache[(self.table_name, self.client_id)] = {
+            'access_token': access_token,
+            'expires_at': expires_at
+        }
+        return {
+            'statusCode': 200,
+            'body': json.dumps({'access_token': access_token})
+        }
+
+    def get_valid_token(self, force_refresh=False):
         """
-        Get a valid Monzo access token, refreshing if necessary.
+        Get a valid Monzo access token, refreshing only when it is close to expiry.
+
+        Checks the in-process cache first, then the token stored in DynamoDB, and only performs
+        an OAuth refresh when neither is valid for longer than the refresh margin.
+
+        Args:
+            force_refresh (bool): Skip the cached and stored tokens and always refresh
         
         Returns:
             dict: Response containing either a valid access token or an error
         """
         try:
+            cached = _token_cache.get((self.table_name, self.client_id))
+            if cached and not force_refresh and self._is_fresh(cached['expires_at']):
+                return self._token_response(cached['access_token'], cached['expires_at'])
+
             stored_tokens = self.get_stored_tokens()
             
             if not stored_tokens:
@@ -137,10 +198,13 @@ class MonzoTokenManager:
                     })
                 }
 
+            if not force_refresh and stored_tokens.get('access_token') and self._is_fresh(stored_tokens.get('expires_at')):
+                return self._token_response(stored_tokens['access_token'], stored_tokens['expires_at'])
+
             try:
                 # Get the up-to-date refresh token from AWS Secrets Manager
-                secrets_manager = boto3.client('secretsmanager')
-                secret_response = secrets_manager.get_secret_value(SecretId='monzo-api-credentials')
+                secrets_manager = get_client('secretsmanager')
+                secret_response = secrets_manager.get_secret_value(SecretId=self.secret_name)
                 credentials = json.loads(secret_response['SecretString'])
                 current_refresh_token = credentials.get('monzo_refresh_token')
                 
@@ -148,11 +212,8 @@ class MonzoTokenManager:
                     raise Exception("No refresh token found in Secrets Manager")
 
                 new_tokens = self.refresh_token(current_refresh_token)
-                self.store_tokens(new_tokens)
-                return {
-                    'statusCode': 200,
-                    'body': json.dumps({'access_token': new_tokens['access_token']})
-                }
+                expires_at = self.store_tokens(new_tokens)
+                return self._token_response(new_tokens['access_token'], expires_at)
             except Exception as e:
                 return {
                     'statusCode': 401,
@@ -168,4 +229,4 @@ class MonzoTokenManager:
                 'body': json.dumps({
                     'error': f"Token validation failed: {str(e)}"
                 })
-            }
\ No newline at end of file
+            }
@@ -0,0 +1,280 @@
+import io
+import os
+import json
+import time
+import zlib
+from functools import lru_cache
+from .utils import get_client
+
+SNAPSHOT_CHUNK_SIZE = 1024 * 1024
+COMPRESSED_SUFFIX = '.gz'
+
+@lru_cache(maxsize=None)
+def _stream_transfer_config():
+    """Keep multipart buffers small enough for a 128 MB Lambda when streaming a compressed upload"""
+    from boto3.s3.transfer import TransferConfig
+    return TransferConfig(max_concurrency=2)
+
+class _GzipCompressingReader(io.RawIOBase):
+    """
+    Read-only stream yielding the gzip-compressed contents of `source`, compressing one chunk at a time
+    """
+    def __init__(self, source, chunk_size: int = SNAPSHOT_CHUNK_SIZE, level: int = 6):
+        self._source = source
+        self._chunk_size = chunk_size
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        self._buffer = bytearray()
+        self._eof = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while len(self._buffer) < len(b) and not self._eof:
+            chunk = self._source.read(self._chunk_size)
+            if chunk:
+                self.bytes_in += len(chunk)
+                self._buffer += self._compressor.compress(chunk)
+            else:
+                self._buffer += self._compressor.flush()
+                self._eof = True
+
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        del self._buffer[:size]
+        self.bytes_out += size
+        return size
+
+class DatabaseCache:
+    """
+    Keeps the pipeline's SQLite database in local storage between warm Lambda invocations.
+
+    The ETag and version of the S3 object last downloaded or uploaded are recorded in a
+    sidecar file next to the database, along with the local file's size and mtime at that
+    point. A download first makes a HEAD request and skips the transfer if the object is
+    unchanged and the local copy hasn't been modified since (e.g. by a run that failed
+    before uploading).
+
+    With compression='gzip' the database is stored as a gzip snapshot at `key` + '.gz',
+    stream-compressed on upload and stream-decompressed on download. Downloads fall back
+    to the uncompressed object at `key` if no snapshot exists yet (and vice versa).
+
+    Bytes moved over the network are totalled in `bytes_downloaded` and `bytes_uploaded`.
+
+    Args:
+        local_path: Path of the local database file
+        bucket: S3 bucket holding the database
+        key: S3 key of the database
+        logger: Logger instance
+        s3_client: boto3 S3 client (defaults to the container-wide client)
+        compression: None for a plain copy of the file, or 'gzip' for compressed snapshots
+    """
+    def __init__(self, local_path: str, bucket: str, key: str, logger=None, s3_client=None, compression: str = None):
+        if compression not in (None, 'gzip'):
+            raise ValueError(f"Unsupported snapshot compression: {compression}")
+
+        self.local_path = local_path
+        self.bucket = bucket
+        self.key = key
+        self.logger = logger
+        self.s3_client = s3_client or get_client('s3')
+        self.compression = compression
+        self.metadata_path = f'{local_path}.s3.json'
+        self.bytes_downloaded = 0
+        self.bytes_uploaded = 0
+        # Set when _find_snapshot sees an object in the format not currently configured
+        self.other_format_exists = False
+
+    @property
+    def compressed_key(self):
+        return f'{self.key}{COMPRESSED_SUFFIX}'
+
+    def _local_signature(self):
+        stat = os.stat(self.local_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _read_metadata(self):
+        try:
+            with open(self.metadata_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_metadata(self, key, head):
+        metadata = {
+            'bucket': self.bucket,
+            'key': key,
+            'etag': head.get('ETag'),
+            'version_id': head.get('VersionId'),
+            'local': self._local_signature()
+        }
+        with open(self.metadata_path, 'w') as file:
+            json.dump(metadata, file)
+
+    def _head(self, key):
+        """HEAD an object, returning None if it doesn't exist"""
+        from botocore.exceptions import ClientError
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    @property
+    def _other_key(self):
+        """Key of the format not currently configured"""
+        return self.key if self.compression else self.compressed_key
+
+    def _find_snapshot(self):
+        """
+        Find the database object
+
+        If both formats exist (e.g. left over from before compression was switched), the most
+        recently modified one wins, preferring the configured format on a tie.
+
+        Returns:
+            tuple: (key, head) of the object, or (None, None) if neither format exists
+        """
+        keys = [self.compressed_key, self.key] if self.compression else [self.key, self.compressed_key]
+        found = []
+        for key in keys:
+            head = self._head(key)
+            if head is not None:
+                found.append((key, head))
+        self.other_format_exists = any(key == self._other_key for key, _ in found)
+        if not found:
+            return None, None
+
+        newest = found[0]
+        for key, head in found[1:]:
+            if head.get('LastModified') and newest[1].get('LastModified') and head['LastModified'] > newest[1]['LastModified']:
+                newest = (key, head)
+        return newest
+
+    def is_current(self, key, head) -> bool:
+        """Whether the local file is an unmodified copy of the S3 object at `key` described by `head`"""
+        metadata = self._read_metadata()
+        if not metadata or not os.path.exists(self.local_path):
+            return False
+
+        # A leftover WAL file holds commits from a run that never uploaded
+        wal_path = f'{self.local_path}-wal'
+        if os.path.exists(wal_path) and os.path.getsize(wal_path) > 0:
+            return False
+
+        return (
+            metadata.get('bucket') == self.bucket
+            and metadata.get('key') == key
+            and metadata.get('etag') == head.get('ETag')
+            and metadata.get('local') == self._local_signature()
+        )
+
+    def _log_transfer(self, action, key, transferred_bytes, start_time):
+        elapsed = time.perf_counter() - start_time
+        local_bytes = os.path.getsize(self.local_path)
+        self.logger.info(
+            f'[db_cache.py] {action} s3://{self.bucket}/{key}: {transferred_bytes} bytes transferred '
+            f'({local_bytes} bytes on disk) in {elapsed:.2f}s'
+        )
+
+    def _download_object(self, key, etag, decompress=False):
+        """
+        Stream an object from S3 into a temp file that replaces the database once complete
+
+        The GET is conditional on the ETag seen by the HEAD request, so an object replaced in
+        between fails the download instead of mixing versions. (download_file can't do this:
+        its managed transfer rejects IfMatch.)
+
+        Args:
+            decompress: Decompress a gzip snapshot on the fly
+
+        Returns:
+            int: Bytes transferred
+        """
+        response = self.s3_client.get_object(Bucket=self.bucket, Key=key, IfMatch=etag)
+        decompressor = zlib.decompressobj(31) if decompress else None
+        partial_path = f'{self.local_path}.part'
+        transferred = 0
+
+        with open(partial_path, 'wb') as file:
+            for chunk in response['Body'].iter_chunks(SNAPSHOT_CHUNK_SIZE):
+                transferred += len(chunk)
+                if decompressor is None:
+                    file.write(chunk)
+                    continue
+                # Cap each write at one chunk of output: a run of empty pages compresses by orders
+                # of magnitude, and must not be inflated into memory in one go
+                data = chunk
+                while data:
+                    file.write(decompressor.decompress(data, SNAPSHOT_CHUNK_SIZE))
+                    data = decompressor.unconsumed_tail
+            if decompressor:
+                file.write(decompressor.flush())
+
+        os.replace(partial_path, self.local_path)
+        return transferred
+
+    def download(self) -> bool:
+        """
+        Make sure the local database matches S3, downloading only if it doesn't
+
+        Returns:
+            bool: True if the database is available locally, False if it doesn't exist in S3
+        """
+        key, head = self._find_snapshot()
+        if head is None:
+            return False
+
+        if self.is_current(key, head):
+            self.logger.info(f"[db_cache.py] Local database at {self.local_path} matches s3://{self.bucket}/{key} (ETag {head.get('ETag')}), skipping download")
+            return True
+
+        # WAL/shared-memory files left by a crashed run belong to the old copy and must not be replayed onto the new one
+        for suffix in ('-wal', '-shm', '-journal'):
+            if os.path.exists(f'{self.local_path}{suffix}'):
+                os.remove(f'{self.local_path}{suffix}')
+
+        start_time = time.perf_counter()
+        transferred = self._download_object(key, head['ETag'], decompress=key.endswith(COMPRESSED_SUFFIX))
+
+        self.bytes_downloaded += transferred
+        self._log_transfer('Downloaded', key, transferred, start_time)
+        self._write_metadata(key, head)
+        return True
+
+    def upload(self):
+        """Upload the local database to S3 (as a snapshot if compression is enabled) and record the new object's ETag"""
+        start_time = time.perf_counter()
+
+        if self.compression:
+            key = self.compressed_key
+            with open(self.local_path, 'rb') as source:
+                reader = _GzipCompressingReader(source)
+                self.s3_client.upload_fileobj(reader,
+                                              Bucket=self.bucket,
+                                              Key=key,
+                                              ExtraArgs={'ContentType': 'application/gzip'},
+                                              Config=_stream_transfer_config())
+            transferred = reader.bytes_out
+        else:
+            key = self.key
+            self.s3_client.upload_file(Filename=self.local_path,
+                                       Bucket=self.bucket,
+                                       Key=key)
+            transferred = os.path.getsize(self.local_path)
+
+        self.bytes_uploaded += transferred
+        self._log_transfer('Uploaded', key, transferred, start_time)
+        self._write_metadata(key, self.s3_client.head_object(Bucket=self.bucket, Key=key))
+
+        # The other format, if the download saw one, is now out of date; leaving it would let a
+        # later change of the compression setting roll the database back to it
+        if self.other_format_exists:
+            try:
+                self.s3_client.delete_object(Bucket=self.bucket, Key=self._other_key)
+                self.other_format_exists = False
+            except Exception as e:
+                self.logger.error(f'[db_cache.py] Failed to delete stale s3://{self.bucket}/{self._other_key}: {e}')
@@ -1,15 +1,21 @@
 import os
 import sqlite3
-import sys
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.utils import execute_sql_script
+import logging
+from .utils import execute_sql_script
+from .storage_profile import PAGE_SIZE, apply_storage_profile
 
-def initialise_database(database_path):
+def initialise_database(database_path, logger=None):
     conn = sqlite3.connect(database_path)
+    # Must be set before the first table is created
+    conn.execute(f'PRAGMA page_size = {PAGE_SIZE}')
     sql_dir = os.path.join(os.path.dirname(__file__), '../sql')
     
     execute_sql_script(conn, os.path.join(sql_dir, 'create_bronze_layer.sql'))
     execute_sql_script(conn, os.path.join(sql_dir, 'create_silver_layer.sql'))
     execute_sql_script(conn, os.path.join(sql_dir, 'create_gold_layer.sql'))
+    execute_sql_script(conn, os.path.join(sql_dir, 'create_pipeline_state.sql'))
     
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+    # New databases start on the current storage profile
+    apply_storage_profile(database_path, logger or logging.getLogger('main'))
@@ -0,0 +1,161 @@
+import os
+import gzip
+import json
+import uuid
+import threading
+from datetime import datetime
+from .utils import get_client
+
+LANDING_FILE_NAME = 'pages.ndjson.gz'
+RUN_PARTITION_PREFIX = 'run_id='
+
+def run_partition(landed_run_id: str) -> str:
+    """Relative path of a landed run's file"""
+    return f'{RUN_PARTITION_PREFIX}{landed_run_id}/{LANDING_FILE_NAME}'
+
+class RawLandingZone:
+    """
+    Persists raw Monzo API responses of one run as gzip-compressed NDJSON, before any flattening
+
+    Each line is one response: the endpoint, account, request parameters, fetch time and the
+    untouched JSON body. Lines are compressed into the run's file as they arrive, so memory
+    stays bounded however many pages the run fetches. Pages may be recorded from the async
+    extractor's worker threads.
+
+    The run is landed under `landed_run_id`, the run ID plus a random suffix, so runs started in
+    the same second (e.g. tenants of the multi-tenant runner) never share a file. The file is
+    written to `{local_dir}/run_id={landed_run_id}/pages.ndjson.gz` and, when an S3 bucket and
+    prefix are given, uploaded to `{s3_prefix}/run_id={landed_run_id}/pages.ndjson.gz` on close
+    (and the local copy removed). Landed run IDs sort in run order. See src/replay/replay.py for
+    feeding landed runs back through the pipeline.
+
+    Args:
+        run_id: Identifier of the run, used as the partition
+        local_dir: Directory the run's file is written under
+        s3_bucket: S3 bucket the file is uploaded to (optional)
+        s3_prefix: S3 prefix the file is uploaded under (optional)
+        logger: Logger instance
+        compresslevel: gzip compression level
+    """
+    def __init__(self, run_id: str, local_dir: str, s3_bucket: str = None, s3_prefix: str = None, logger=None,
+                 compresslevel: int = 6):
+        self.run_id = run_id
+        self.landed_run_id = f'{run_id}-{uuid.uuid4().hex[:8]}'
+        self.local_path = os.path.join(local_dir, run_partition(self.landed_run_id))
+        self.s3_bucket = s3_bucket
+        self.s3_prefix = s3_prefix.rstrip('/') if s3_prefix else None
+        self.logger = logger
+        self.pages = 0
+        self.bytes_written = 0
+
+        os.makedirs(os.path.dirname(self.local_path), exist_ok=True)
+        self._file = gzip.open(self.local_path, 'wb', compresslevel=compresslevel)
+        self._lock = threading.Lock()
+
+    @property
+    def s3_key(self):
+        return f'{self.s3_prefix}/{run_partition(self.landed_run_id)}' if self.s3_prefix else None
+
+    def record(self, endpoint: str, account_id: str, params: dict, body):
+        """
+        Append one raw API response
+
+        Args:
+            endpoint: API path, e.g. '/transactions'
+            account_id: Account the request was made for
+            params: Query parameters of the request
+            body: Parsed JSON response body
+        """
+        line = json.dumps({
+            'endpoint': endpoint,
+            'account_id': account_id,
+            'params': params,
+            'fetched_at': datetime.now().isoformat(),
+            'body': body
+        }, default=str, separators=(',', ':')).encode('utf-8') + b'\n'
+
+        with self._lock:
+            if self._file is None:
+                raise ValueError(f'Landing zone for run {self.landed_run_id} is already closed')
+            self._file.write(line)
+            self.pages += 1
+            self.bytes_written += len(line)
+
+    def close(self):
+        """
+        Finish the run's file and upload it to S3 if configured
+
+        Failures are logged rather than raised, so a landing problem never fails the pipeline run.
+
+        Returns:
+            str: S3 key or local path of the landed file, or None if nothing was landed
+        """
+        with self._lock:
+            if self._file is None:
+                return None
+            self._file.close()
+            self._file = None
+
+        if not self.pages:
+            os.remove(self.local_path)
+            return None
+
+        if not (self.s3_bucket and self.s3_prefix):
+            if self.logger:
+                self.logger.info(f'[landing_zone.py] Landed {self.pages} raw API responses at {self.local_path}')
+            return self.local_path
+
+        try:
+            get_client('s3').upload_file(Filename=self.local_path, Bucket=self.s3_bucket, Key=self.s3_key,
+                                         ExtraArgs={'ContentType': 'application/x-ndjson', 'ContentEncoding': 'gzip'})
+            os.remove(self.local_path)
+            if self.logger:
+                self.logger.info(f'[landing_zone.py] Landed {self.pages} raw API responses at s3://{self.s3_bucket}/{self.s3_key}')
+            return self.s3_key
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f'[landing_zone.py] Failed to upload raw API responses to S3, kept at {self.local_path}: {e}')
+            return self.local_path
+
+def list_landed_runs(local_dir: str):
+    """Landed run IDs with a landing file under `local_dir`, oldest first"""
+    if not os.path.isdir(local_dir):
+        return []
+    return sorted(
+        name[len(RUN_PARTITION_PREFIX):] for name in os.listdir(local_dir)
+        if name.startswith(RUN_PARTITION_PREFIX) and os.path.exists(os.path.join(local_dir, name, LANDING_FILE_NAME))
+    )
+
+def download_landed_runs(s3_bucket: str, s3_prefix: str, local_dir: str, run_ids=None, s3_client=None):
+    """
+    Download landing files from S3 into `local_dir`, skipping runs already present locally
+
+    Args:
+        run_ids: Only download these landed runs (defaults to every run under the prefix)
+
+    Returns:
+        list: Landed run IDs downloaded
+    """
+    s3_client = s3_client or get_client('s3')
+    prefix = f"{s3_prefix.rstrip('/')}/{RUN_PARTITION_PREFIX}"
+    present = set(list_landed_runs(local_dir))
+    downloaded = []
+
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=s3_bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            partition, _, file_name = obj['Key'][len(prefix) - len(RUN_PARTITION_PREFIX):].partition('/')
+            run_id = partition[len(RUN_PARTITION_PREFIX):]
+            if file_name != LANDING_FILE_NAME or run_id in present or (run_ids and run_id not in run_ids):
+                continue
+            local_path = os.path.join(local_dir, run_partition(run_id))
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            s3_client.download_file(Bucket=s3_bucket, Key=obj['Key'], Filename=local_path)
+            downloaded.append(run_id)
+    return sorted(downloaded)
+
+def iter_landed_pages(local_dir: str, landed_run_id: str):
+    """Yield the recorded responses of a landed run in the order they were fetched"""
+    with gzip.open(os.path.join(local_dir, run_partition(landed_run_id)), 'rb') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
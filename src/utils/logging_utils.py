@@ -1,44 +1,127 @@
+import io
+import gzip
+import queue
 import logging
-import boto3
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
+from .utils import get_client
 
-class Logger:
-    def __init__(self, log_file_path: str, s3_bucket: str, s3_prefix: str, logger_name: str, run_id: str):
-        self.log_file_path = f"{log_file_path}_{run_id}.log"
-        self.s3_bucket = s3_bucket
-        self.s3_prefix = s3_prefix
-        self.s3_client = boto3.client('s3')
-        self.logger = self._setup_logger(logger_name)
+LOG_FORMAT = '%(asctime)s - monzo-etl - %(levelname)s - %(message)s'
+
+class _BufferHandler(logging.Handler):
+    """Keeps the formatted lines of the current run in memory until they are drained"""
+    def __init__(self):
+        super().__init__()
+        self._lines = []
+        self._buffer_lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._buffer_lock:
+            self._lines.append(line)
 
-    def _setup_logger(self, logger_name):
-        logger = logging.getLogger(logger_name)
-        logger.setLevel(logging.INFO)
+    def drain(self) -> str:
+        """Return everything buffered so far and start a new buffer"""
+        with self._buffer_lock:
+            lines, self._lines = self._lines, []
+        return '\n'.join(lines) + '\n' if lines else ''
 
-        # File handler
-        file_handler = RotatingFileHandler(self.log_file_path, maxBytes=5*1024*1024, backupCount=2)
-        file_handler.setLevel(logging.INFO)
+class _LogBackend:
+    """
+    One queue, listener thread and set of output handlers per logger name, created on first use
 
-        # Console handler
+    Callers only enqueue records; formatting, console output and buffering happen on the
+    listener thread. Warm Lambda invocations reuse the backend instead of adding handlers.
+    """
+    def __init__(self, logger_name: str):
+        self.queue = queue.SimpleQueue()
+        self.buffer_handler = _BufferHandler()
         console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
 
-        # Creating a formatter and set it for both handlers
-        formatter = logging.Formatter('%(asctime)s - monzo-etl - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
+        formatter = logging.Formatter(LOG_FORMAT)
+        for handler in (self.buffer_handler, console_handler):
+            handler.setLevel(logging.INFO)
+            handler.setFormatter(formatter)
+
+        self.listener = QueueListener(self.queue, console_handler, self.buffer_handler, respect_handler_level=True)
+        self.listener.start()
+
+        self.logger = logging.getLogger(logger_name)
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(QueueHandler(self.queue))
 
-        # Add handlers to the logger
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        self._flush_lock = threading.Lock()
 
-        return logger
+    def flush(self) -> str:
+        """Wait for every queued record to be handled, then drain the run's buffered log"""
+        with self._flush_lock:
+            # Stopping the listener processes the queue up to its sentinel and joins the thread
+            self.listener.stop()
+            self.listener.start()
+        return self.buffer_handler.drain()
+
+_backends_lock = threading.Lock()
+
+def _get_backend(logger_name: str) -> _LogBackend:
+    # Kept on the logging.Logger itself, so it is shared even if this module is imported under two names
+    logger = logging.getLogger(logger_name)
+    with _backends_lock:
+        if getattr(logger, '_monzo_etl_backend', None) is None:
+            logger._monzo_etl_backend = _LogBackend(logger_name)
+        return logger._monzo_etl_backend
+
+class Logger:
+    """
+    Run logger that writes through a queue to the console and an in-memory buffer
+
+    Handlers are attached once per container; constructing a Logger for a new run just starts
+    a new buffer. upload_log_to_s3 sends the buffered run log to S3 as one gzip-compressed object.
+
+    Args:
+        log_file_path: Path prefix for a local copy of the log, written only when no S3 bucket is configured
+        s3_bucket: S3 bucket for the log
+        s3_prefix: S3 prefix for the log
+        logger_name: Name of the logger
+        run_id: Identifier of the run, used in the local file name
+    """
+    def __init__(self, log_file_path: str, s3_bucket: str, s3_prefix: str, logger_name: str, run_id: str):
+        self.log_file_path = f"{log_file_path}_{run_id}.log" if log_file_path else None
+        self.s3_bucket = s3_bucket
+        self.s3_prefix = s3_prefix
+        self.s3_client = get_client('s3') if s3_bucket else None
+        self._backend = _get_backend(logger_name)
+        self.logger = self._backend.logger
+
+        # Drop anything logged between runs of a warm container (e.g. after the last upload)
+        self._backend.flush()
 
     def upload_log_to_s3(self):
         try:
+            log_text = self._backend.flush()
+
+            if not self.s3_client:
+                if self.log_file_path:
+                    with open(self.log_file_path, 'a') as file:
+                        file.write(log_text)
+                return
+
             timestamp = datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
-            s3_key = f"{self.s3_prefix}/monzo_etl_{timestamp}.log"
-            self.s3_client.upload_file(self.log_file_path, self.s3_bucket, s3_key)
+            s3_key = f"{self.s3_prefix}/monzo_etl_{timestamp}.log.gz"
+
+            body = io.BytesIO()
+            with gzip.GzipFile(fileobj=body, mode='wb') as file:
+                file.write(log_text.encode('utf-8'))
+
+            self.s3_client.put_object(Bucket=self.s3_bucket,
+                                      Key=s3_key,
+                                      Body=body.getvalue(),
+                                      ContentType='text/plain',
+                                      ContentEncoding='gzip')
             self.logger.info(f"Successfully uploaded log file to S3: {s3_key}")
         except Exception as e:
-            self.logger.error(f"Failed to upload log file to S3: {str(e)}")
\ No newline at end of file
+            self.logger.error(f"Failed to upload log file to S3: {str(e)}")
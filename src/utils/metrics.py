@@ -0,0 +1,81 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+
+METRICS_NAMESPACE = 'MonzoETL'
+
+class RunMetrics:
+    """
+    Collects a pipeline run's metrics and emits them as one CloudWatch Embedded Metric Format record.
+
+    Lambda forwards stdout to CloudWatch Logs, which extracts EMF records into metrics without
+    any log parsing. Locally the same record can also be appended to a JSON lines file.
+
+    Args:
+        run_id: Identifier of the run, included as a property (not a dimension) of the record
+        namespace: CloudWatch namespace
+        dimensions: Dimension names and values the metrics are published under
+        local_path: If given, each record is also appended to this file
+    """
+    def __init__(self, run_id: str = None, namespace: str = METRICS_NAMESPACE, dimensions: dict = None,
+                 local_path: str = None):
+        self.run_id = run_id
+        self.namespace = namespace
+        self.dimensions = dimensions or {'Pipeline': 'monzo-etl'}
+        self.local_path = local_path
+        self.metrics = {}
+        self.properties = {}
+
+    def put(self, name: str, value, unit: str = 'Count'):
+        """Set a metric, replacing any earlier value"""
+        self.metrics[name] = (value, unit)
+
+    def add(self, name: str, value, unit: str = 'Count'):
+        """Add to a metric, starting from zero"""
+        current = self.metrics.get(name, (0, unit))[0]
+        self.metrics[name] = (current + value, unit)
+
+    def set_property(self, name: str, value):
+        """Attach a non-metric value (searchable in Logs Insights but not published as a metric)"""
+        self.properties[name] = value
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as `<name>Seconds`, recorded even if the block raises"""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add(f'{name}Seconds', time.perf_counter() - start, 'Seconds')
+
+    def record(self) -> dict:
+        """Build the EMF record"""
+        record = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [list(self.dimensions)],
+                    'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in self.metrics.items()]
+                }]
+            },
+            **self.dimensions,
+            **self.properties,
+            **{name: value for name, (value, _) in self.metrics.items()}
+        }
+        if self.run_id:
+            record['RunId'] = self.run_id
+        return record
+
+    def emit(self) -> dict:
+        """Write the record to stdout (and the local file if configured) and return it"""
+        record = self.record()
+        line = json.dumps(record, default=str)
+        print(line, flush=True)
+
+        if self.local_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.local_path)), exist_ok=True)
+            with open(self.local_path, 'a') as file:
+                file.write(line + '\n')
+        return record
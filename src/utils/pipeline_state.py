@@ -0,0 +1,118 @@
+import os
+from datetime import datetime, timedelta, timezone
+from .storage_profile import connect_database
+
+PIPELINE_STATE_SQL = os.path.join(os.path.dirname(__file__), '../sql/create_pipeline_state.sql')
+
+def ensure_pipeline_state_table(conn):
+    """Create the pipeline_state table if it doesn't exist (databases pulled from S3 may predate it)"""
+    with open(PIPELINE_STATE_SQL, 'r') as file:
+        conn.execute(file.read())
+
+def get_state(conn, state_key):
+    """
+    Get a stored watermark
+
+    Returns:
+        dict: watermark, last_id and updated_at, or None if the key has never been recorded
+    """
+    ensure_pipeline_state_table(conn)
+    row = conn.execute(
+        'SELECT watermark, last_id, updated_at FROM pipeline_state WHERE state_key = ?',
+        (state_key,)
+    ).fetchone()
+
+    if row is None:
+        return None
+    return {'watermark': row[0], 'last_id': row[1], 'updated_at': row[2]}
+
+def set_state(conn, state_key, watermark, last_id=None):
+    """
+    Record a watermark. Does not commit, so it can share a transaction with the data it describes.
+    """
+    ensure_pipeline_state_table(conn)
+    conn.execute('''
+        INSERT INTO pipeline_state (state_key, watermark, last_id, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (state_key) DO UPDATE SET
+            watermark = excluded.watermark,
+            last_id = excluded.last_id,
+            updated_at = excluded.updated_at
+    ''', (state_key, watermark, last_id, datetime.now().isoformat()))
+
+def clear_state(conn, state_key):
+    """Remove a recorded watermark. Does not commit."""
+    ensure_pipeline_state_table(conn)
+    conn.execute('DELETE FROM pipeline_state WHERE state_key = ?', (state_key,))
+
+def transactions_state_key(account_id):
+    return f'transactions:{account_id}'
+
+def stream_checkpoint_key(account_id):
+    return f'stream:{account_id}'
+
+def get_stream_checkpoint(db_path, account_id):
+    """
+    Get the checkpoint left by an interrupted streaming load
+
+    Returns:
+        dict: watermark (created timestamp) and last_id of the last committed transaction, or None
+    """
+    conn = connect_database(db_path)
+    try:
+        state = get_state(conn, stream_checkpoint_key(account_id))
+        conn.commit()
+    finally:
+        conn.close()
+    return state
+
+def parse_timestamp(value):
+    """Parse a Monzo ISO 8601 timestamp into a naive UTC datetime"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def advance_transactions_watermark(conn, account_id, created, transaction_id=None):
+    """
+    Move the per-account high-water mark forward to a newly loaded transaction
+
+    The watermark never moves backwards, so reloading an older window leaves it untouched.
+
+    Args:
+        created: Created timestamp of the newest transaction loaded
+        transaction_id: ID of that transaction
+
+    Returns:
+        dict: The stored watermark after the update
+    """
+    state_key = transactions_state_key(account_id)
+    current = get_state(conn, state_key)
+
+    if current is None or parse_timestamp(created) > parse_timestamp(current['watermark']):
+        set_state(conn, state_key, created, transaction_id)
+        return {'watermark': created, 'last_id': transaction_id}
+
+    return current
+
+def resolve_transactions_since(db_path, account_id, overlap_hours, default_days_back):
+    """
+    Work out where extraction should resume for an account
+
+    Starts `overlap_hours` before the last loaded transaction to pick up late settlements,
+    or `default_days_back` days ago if the account has no recorded watermark.
+
+    Returns:
+        datetime: Naive UTC datetime to pass as `since`
+    """
+    conn = connect_database(db_path)
+    try:
+        state = get_state(conn, transactions_state_key(account_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+    if state is None or not state['watermark']:
+        return datetime.now() - timedelta(days=default_days_back)
+
+    return parse_timestamp(state['watermark']) - timedelta(hours=overlap_hours)
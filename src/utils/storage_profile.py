@@ -0,0 +1,141 @@
+import os
+import sqlite3
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), '../sql')
+
+# Ordered (version, script) migrations. The applied version is stored in PRAGMA user_version,
+# so databases pulled from S3 only run the scripts they haven't seen.
+STORAGE_PROFILE_MIGRATIONS = [
+    (1, 'storage_profile_v1.sql'),
+    (2, 'storage_profile_v2.sql'),
+    (3, 'storage_profile_v3.sql'),
+    (4, 'storage_profile_v4.sql'),
+    (5, 'storage_profile_v5.sql'),
+    (6, 'storage_profile_v6.sql'),
+]
+
+STORAGE_PROFILE_VERSION = STORAGE_PROFILE_MIGRATIONS[-1][0]
+
+PAGE_SIZE = 8192
+
+# Suited to a single-writer batch job whose durable copy is the S3 object: WAL avoids
+# rewriting pages twice, and NORMAL sync is safe under WAL (a crash can only lose the
+# local copy, which the database cache then re-downloads)
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -16000',
+    'PRAGMA busy_timeout = 5000',
+)
+
+def connect_database(db_path):
+    """Open a connection to the pipeline database with the storage profile's PRAGMA settings"""
+    conn = sqlite3.connect(db_path)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def apply_storage_profile(db_path, logger):
+    """
+    Bring a database up to the current storage profile version
+
+    Applies any pending migrations, rebuilds the file with the profile's page size the first
+    time it is profiled, and runs ANALYZE so the planner has statistics for the new indexes.
+    Safe to call on every run: an up-to-date database costs one PRAGMA read.
+
+    Returns:
+        int: The storage profile version of the database
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        pending = [(v, script) for v, script in STORAGE_PROFILE_MIGRATIONS if v > version]
+        if not pending:
+            return version
+
+        logger.info(f'[storage_profile.py] Upgrading database storage profile from v{version} to v{STORAGE_PROFILE_VERSION}')
+
+        if conn.execute('PRAGMA page_size').fetchone()[0] != PAGE_SIZE:
+            # The page size can only change outside WAL mode, and takes effect on VACUUM
+            conn.execute('PRAGMA journal_mode = DELETE')
+            conn.execute(f'PRAGMA page_size = {PAGE_SIZE}')
+            conn.execute('VACUUM')
+
+        for migration_version, script in pending:
+            with open(os.path.join(SQL_DIR, script), 'r') as file:
+                sql_script = file.read()
+            try:
+                conn.executescript(f'BEGIN;\n{sql_script}\nPRAGMA user_version = {migration_version};\nCOMMIT;')
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            logger.info(f'[storage_profile.py] Applied storage profile migration v{migration_version} ({script})')
+
+        conn.execute('ANALYZE')
+        conn.commit()
+        return STORAGE_PROFILE_VERSION
+    finally:
+        conn.close()
+
+# Tables whose rows were keyed by account in storage profile v3
+ACCOUNT_KEYED_TABLES = ('bronze_transactions', 'bronze_balance', 'silver_transactions')
+
+def assign_unowned_rows(db_path, account_id, logger):
+    """
+    Give rows still without an account_id to the credentials' account
+
+    Storage profile v3 can only backfill account_id from a recorded transactions watermark, which
+    databases created before pipeline_state existed don't have. Every row in those came from the
+    single account the credentials belong to. A no-op (one index lookup per table) once every
+    row has an account.
+
+    Args:
+        db_path: Path to SQLite database file
+        account_id: Account of the credentials secret (monzo_account_id)
+        logger: Logger instance
+
+    Returns:
+        int: Number of rows assigned
+    """
+    conn = connect_database(db_path)
+    try:
+        with conn:
+            assigned = sum(
+                conn.execute(f'UPDATE {table} SET account_id = ? WHERE account_id IS NULL', (account_id,)).rowcount
+                for table in ACCOUNT_KEYED_TABLES
+            )
+        if assigned:
+            logger.info(f'[storage_profile.py] Assigned {assigned} rows loaded before accounts were tracked to {account_id}')
+        return assigned
+    finally:
+        conn.close()
+
+def checkpoint_database(db_path):
+    """
+    Copy every committed WAL page into the main database file
+
+    Unlike finalise_database this works while other connections are open (as long as none is
+    mid-transaction), so the file can be uploaded part way through a streaming load.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('PRAGMA busy_timeout = 5000')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    finally:
+        conn.close()
+
+def finalise_database(db_path):
+    """
+    Prepare the database file for upload
+
+    Refreshes planner statistics, then checkpoints the WAL and switches back to a rollback
+    journal so the uploaded file is complete and self-contained.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('PRAGMA optimize')
+        conn.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        conn.close()
@@ -1,17 +1,30 @@
-import boto3
 import json
+from functools import lru_cache
+
+# boto3 is imported on first use rather than at module import, keeping it off the cold-start
+# import path of modules that never talk to AWS
+
+@lru_cache(maxsize=None)
+def get_client(service_name):
+    """Get a boto3 client, created once per container and reused across warm invocations"""
+    import boto3
+    return boto3.client(service_name)
+
+@lru_cache(maxsize=None)
+def get_resource(service_name):
+    """Get a boto3 resource, created once per container and reused across warm invocations"""
+    import boto3
+    return boto3.resource(service_name)
 
 def get_secret(secret_name):
     """Retrieve secret from AWS Secrets Manager"""
-    session = boto3.session.Session()
-    client = session.client('secretsmanager')
+    client = get_client('secretsmanager')
     response = client.get_secret_value(SecretId=secret_name)
     return json.loads(response['SecretString'])
 
 def update_secret(secret_name, new_secret_value):
     """Update secret in AWS Secrets Manager"""
-    session = boto3.session.Session()
-    client = session.client('secretsmanager')
+    client = get_client('secretsmanager')
     response = client.put_secret_value(
         SecretId=secret_name,
         SecretString=json.dumps(new_secret_value)
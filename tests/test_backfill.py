@@ -0,0 +1,75 @@
+import os
+import sys
+import sqlite3
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+from src.backfill.backfill import backfill_transactions
+from src.utils.initialise_database import initialise_database
+
+
+@pytest.fixture
+def mock_logger():
+    import logging
+    logger = logging.getLogger('test_logger')
+    logger.addHandler(logging.NullHandler())
+    return logger
+
+
+def test_backfill_resumes_from_completed_windows(mock_logger, tmp_path):
+    db_path = str(tmp_path / "backfill.db")
+    initialise_database(database_path=db_path)
+
+    failing_windows = {datetime(2024, 1, 21)}
+
+    def fake_page(limit, since=None, before=None):
+        if since in failing_windows:
+            raise ConnectionError('connection reset')
+        return {'transactions': [
+            {'id': f'tx_{since:%Y%m%d}_{i}', 'amount': -100, 'currency': 'GBP', 'created': f'{since:%Y-%m-%d}T12:00:00.000Z'}
+            for i in range(3)
+        ]}
+
+    client = MagicMock()
+    client.account_id = 'acc_0001'
+    client._get_transactions_page.side_effect = fake_page
+
+    with pytest.raises(RuntimeError):
+        backfill_transactions(db_path, mock_logger, datetime(2024, 1, 1), datetime(2024, 1, 31),
+                              window_days=10, client=client)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM backfill_windows").fetchone()[0] == 2
+    conn.close()
+
+    failing_windows.clear()
+    client._get_transactions_page.reset_mock()
+    totals = backfill_transactions(db_path, mock_logger, datetime(2024, 1, 1), datetime(2024, 1, 31),
+                                   window_days=10, client=client)
+
+    assert client._get_transactions_page.call_count == 1
+    assert totals == {'windows': 1, 'rows': 3, 'inserted': 3, 'failed': 0}
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM bronze_transactions").fetchone()[0] == 9
+    conn.close()
+
+
+def test_backfill_creates_missing_database(mock_logger, tmp_path):
+    from src.utils.storage_profile import STORAGE_PROFILE_VERSION
+    db_path = str(tmp_path / "new.db")
+
+    client = MagicMock()
+    client.account_id = 'acc_0001'
+    client._get_transactions_page.return_value = {'transactions': [
+        {'id': 'tx_0001', 'amount': -100, 'currency': 'GBP', 'created': '2024-01-02T12:00:00.000Z'}
+    ]}
+
+    totals = backfill_transactions(db_path, mock_logger, datetime(2024, 1, 1), datetime(2024, 1, 11),
+                                   window_days=10, client=client)
+
+    assert totals['inserted'] == 1
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == STORAGE_PROFILE_VERSION
+    assert conn.execute("SELECT account_id FROM bronze_transactions").fetchall() == [('acc_0001',)]
+    conn.close()
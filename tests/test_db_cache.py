@@ -0,0 +1,199 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import io
+import pytest
+from src.utils.db_cache import DatabaseCache
+
+
+@pytest.fixture
+def mock_logger():
+    import logging
+    logger = logging.getLogger('test_logger')
+    logger.addHandler(logging.NullHandler())
+    return logger
+
+
+@pytest.fixture
+def stubbed_s3():
+    """A real boto3 S3 client whose responses are stubbed, so botocore still validates every call's arguments"""
+    import boto3
+    from botocore.stub import Stubber
+    s3_client = boto3.client('s3', region_name='eu-north-1', aws_access_key_id='test', aws_secret_access_key='test')
+    with Stubber(s3_client) as stubber:
+        yield s3_client, stubber
+        stubber.assert_no_pending_responses()
+
+
+def test_database_cache_downloads_plain_database_with_real_client(mock_logger, tmp_path, stubbed_s3):
+    from botocore.response import StreamingBody
+    s3_client, stubber = stubbed_s3
+    content = b'SQLite format 3\x00' + b'\x00' * 4096
+
+    stubber.add_response('head_object', {'ETag': '"etag-1"', 'ContentLength': len(content)},
+                         {'Bucket': 'bucket', 'Key': 'monzo.db'})
+    stubber.add_client_error('head_object', service_error_code='404', http_status_code=404,
+                             expected_params={'Bucket': 'bucket', 'Key': 'monzo.db.gz'})
+    stubber.add_response('get_object', {'Body': StreamingBody(io.BytesIO(content), len(content))},
+                         {'Bucket': 'bucket', 'Key': 'monzo.db', 'IfMatch': '"etag-1"'})
+
+    local_path = tmp_path / "monzo.db"
+    cache = DatabaseCache(str(local_path), 'bucket', 'monzo.db', logger=mock_logger, s3_client=s3_client)
+
+    assert cache.download() is True
+    assert local_path.read_bytes() == content
+    assert cache.bytes_downloaded == len(content)
+
+
+def test_database_cache_decompresses_in_bounded_chunks(mock_logger, tmp_path, monkeypatch):
+    import gzip
+    from unittest.mock import MagicMock
+    from src.utils import db_cache
+
+    content = b'\x00' * (8 * db_cache.SNAPSHOT_CHUNK_SIZE)
+    compressed = gzip.compress(content)
+    assert len(compressed) < db_cache.SNAPSHOT_CHUNK_SIZE
+
+    written = []
+    real_open = open
+
+    class RecordingFile:
+        def __init__(self, path, mode):
+            self._file = real_open(path, mode)
+        def write(self, data):
+            written.append(len(data))
+            return self._file.write(data)
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc_info):
+            self._file.close()
+
+    body = MagicMock()
+    body.iter_chunks.side_effect = lambda size: iter([compressed])
+    s3_client = MagicMock()
+    s3_client.get_object.return_value = {'Body': body}
+
+    local_path = tmp_path / "monzo.db"
+    cache = DatabaseCache(str(local_path), 'bucket', 'monzo.db', logger=mock_logger, s3_client=s3_client)
+    monkeypatch.setattr(db_cache, 'open', RecordingFile, raising=False)
+    cache._download_object('monzo.db.gz', '"etag"', decompress=True)
+
+    assert local_path.read_bytes() == content
+    assert max(written) <= db_cache.SNAPSHOT_CHUNK_SIZE
+
+
+def test_database_cache_upload_removes_other_format(mock_logger, tmp_path, stubbed_s3):
+    from datetime import datetime, timezone
+    from botocore.stub import ANY
+    s3_client, stubber = stubbed_s3
+    local_path = tmp_path / "monzo.db"
+    cache = DatabaseCache(str(local_path), 'bucket', 'monzo.db', logger=mock_logger, s3_client=s3_client)
+
+    # Nothing else to clean up: an upload is one PUT and one HEAD
+    local_path.write_bytes(b'db')
+    stubber.add_response('put_object', {'ETag': '"etag-1"'},
+                         {'Bucket': 'bucket', 'Key': 'monzo.db', 'Body': ANY, 'ChecksumAlgorithm': ANY})
+    stubber.add_response('head_object', {'ETag': '"etag-1"'}, {'Bucket': 'bucket', 'Key': 'monzo.db'})
+    cache.upload()
+    stubber.assert_no_pending_responses()
+
+    # A snapshot left over from when compression was enabled is deleted by the next upload
+    stubber.add_response('head_object', {'ETag': '"etag-1"', 'LastModified': datetime(2025, 1, 1, tzinfo=timezone.utc)},
+                         {'Bucket': 'bucket', 'Key': 'monzo.db'})
+    stubber.add_response('head_object', {'ETag': '"old"', 'LastModified': datetime(2024, 1, 1, tzinfo=timezone.utc)},
+                         {'Bucket': 'bucket', 'Key': 'monzo.db.gz'})
+    stubber.add_response('put_object', {'ETag': '"etag-2"'},
+                         {'Bucket': 'bucket', 'Key': 'monzo.db', 'Body': ANY, 'ChecksumAlgorithm': ANY})
+    stubber.add_response('head_object', {'ETag': '"etag-2"'}, {'Bucket': 'bucket', 'Key': 'monzo.db'})
+    stubber.add_response('delete_object', {}, {'Bucket': 'bucket', 'Key': 'monzo.db.gz'})
+    assert cache.download() is True
+    cache.upload()
+
+
+def test_database_cache_prefers_newest_format(mock_logger, tmp_path, stubbed_s3):
+    from datetime import datetime, timezone
+    s3_client, stubber = stubbed_s3
+
+    # Compression was switched off after gzip runs wrote a newer snapshot than the old plain copy
+    stubber.add_response('head_object', {'ETag': '"old"', 'LastModified': datetime(2024, 1, 1, tzinfo=timezone.utc)},
+                         {'Bucket': 'bucket', 'Key': 'monzo.db'})
+    stubber.add_response('head_object', {'ETag': '"new"', 'LastModified': datetime(2025, 1, 1, tzinfo=timezone.utc)},
+                         {'Bucket': 'bucket', 'Key': 'monzo.db.gz'})
+
+    cache = DatabaseCache(str(tmp_path / "monzo.db"), 'bucket', 'monzo.db', logger=mock_logger, s3_client=s3_client)
+    key, head = cache._find_snapshot()
+
+    assert (key, head['ETag']) == ('monzo.db.gz', '"new"')
+
+
+def test_database_cache_skips_download_when_etag_unchanged(mock_logger, tmp_path):
+    from unittest.mock import MagicMock
+
+    from botocore.exceptions import ClientError
+    def raise_not_found():
+        raise ClientError({'Error': {'Code': '404'}}, 'HeadObject')
+
+    local_path = str(tmp_path / "monzo.db")
+    head = {'ETag': '"etag-1"'}
+    s3_client = MagicMock()
+    s3_client.head_object.side_effect = lambda Bucket, Key: head if Key == 'monzo.db' else raise_not_found()
+    def get_object(Bucket, Key, IfMatch=None):
+        body = MagicMock()
+        body.iter_chunks.side_effect = lambda size: iter([b'db'])
+        return {'Body': body}
+    s3_client.get_object.side_effect = get_object
+
+    cache = DatabaseCache(local_path, 'bucket', 'monzo.db', logger=mock_logger, s3_client=s3_client)
+
+    assert cache.download() is True
+    assert cache.download() is True
+    assert s3_client.get_object.call_count == 1
+
+    # A local modification that was never uploaded forces a fresh download
+    with open(local_path, 'a') as file:
+        file.write('uncommitted')
+    assert cache.download() is True
+    assert s3_client.get_object.call_count == 2
+
+    head['ETag'] = '"etag-2"'
+    assert cache.download() is True
+    assert s3_client.get_object.call_count == 3
+
+
+def test_database_cache_compressed_snapshot_round_trip(mock_logger, tmp_path):
+    from unittest.mock import MagicMock
+
+    objects = {}
+    s3_client = MagicMock()
+
+    def upload_fileobj(fileobj, Bucket, Key, ExtraArgs=None, Config=None):
+        objects[Key] = fileobj.read()
+
+    def head_object(Bucket, Key):
+        from botocore.exceptions import ClientError
+        if Key not in objects:
+            raise ClientError({'Error': {'Code': '404'}}, 'HeadObject')
+        return {'ETag': f'"{hash(objects[Key])}"', 'ContentLength': len(objects[Key])}
+
+    def get_object(Bucket, Key, IfMatch=None):
+        body = MagicMock()
+        stream = io.BytesIO(objects[Key])
+        body.iter_chunks.side_effect = lambda size: iter(lambda: stream.read(size), b'')
+        return {'Body': body}
+
+    s3_client.upload_fileobj.side_effect = upload_fileobj
+    s3_client.head_object.side_effect = head_object
+    s3_client.get_object.side_effect = get_object
+
+    source_path = tmp_path / "source.db"
+    source_path.write_bytes(b'merchant_logo ' * 100000)
+    DatabaseCache(str(source_path), 'bucket', 'monzo.db', logger=mock_logger,
+                  s3_client=s3_client, compression='gzip').upload()
+
+    assert list(objects) == ['monzo.db.gz']
+    assert len(objects['monzo.db.gz']) < source_path.stat().st_size // 10
+
+    target_path = tmp_path / "target.db"
+    assert DatabaseCache(str(target_path), 'bucket', 'monzo.db', logger=mock_logger,
+                         s3_client=s3_client, compression='gzip').download() is True
+    assert target_path.read_bytes() == source_path.read_bytes()
@@ -0,0 +1,56 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import pytest
+import sqlite3
+import pyarrow.parquet as pq
+from src.export.export import export_to_parquet
+
+
+@pytest.fixture
+def mock_logger():
+    import logging
+    logger = logging.getLogger('test_logger')
+    logger.addHandler(logging.NullHandler())
+    return logger
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    from src.utils.initialise_database import initialise_database
+    db_path = str(tmp_path / "test.db")
+    initialise_database(database_path=db_path)
+    return db_path
+
+
+def insert_silver_transaction(db_path, transaction_id, created, change_seq):
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        INSERT INTO silver_transactions (id, amount, currency, created, merchant_id, inserted_at, change_seq)
+        VALUES (?, -100, 'GBP', ?, 'merch_0001', CURRENT_TIMESTAMP, ?)
+    ''', (transaction_id, created, change_seq))
+    conn.commit()
+    conn.close()
+
+
+def test_export_to_parquet_rewrites_only_touched_partitions(mock_logger, db_path, tmp_path):
+    output_dir = str(tmp_path / "export")
+    insert_silver_transaction(db_path, 'tx_0001', '2025-01-05T10:00:00.000Z', 1)
+    insert_silver_transaction(db_path, 'tx_0002', '2025-02-05T10:00:00.000Z', 1)
+
+    written = export_to_parquet(db_path=db_path, logger=mock_logger, output_dir=output_dir, chunk_size=1)
+    assert os.path.join('silver_transactions', 'year=2025', 'month=01', 'part-0.parquet') in written
+    assert os.path.join('silver_transactions', 'year=2025', 'month=02', 'part-0.parquet') in written
+
+    table = pq.read_table(os.path.join(output_dir, 'silver_transactions', 'year=2025', 'month=01', 'part-0.parquet'))
+    assert table.column('id').to_pylist() == ['tx_0001']
+
+    assert export_to_parquet(db_path=db_path, logger=mock_logger, output_dir=output_dir) == []
+
+    insert_silver_transaction(db_path, 'tx_0003', '2025-02-20T10:00:00.000Z', 2)
+    written = export_to_parquet(db_path=db_path, logger=mock_logger, output_dir=output_dir)
+    assert [path for path in written if path.startswith('silver_transactions')] == [
+        os.path.join('silver_transactions', 'year=2025', 'month=02', 'part-0.parquet')
+    ]
+    table = pq.read_table(os.path.join(output_dir, 'silver_transactions', 'year=2025', 'month=02', 'part-0.parquet'))
+    assert sorted(table.column('id').to_pylist()) == ['tx_0002', 'tx_0003']
@@ -17,4 +17,150 @@ def test_extract_data(mock_logger):
     
     assert data is not None
     assert 'transactions' in data
-    assert isinstance(data['transactions'], list)
\ No newline at end of file
+    assert isinstance(data['transactions'], list)
+
+
+def test_iter_transactions_follows_since_cursor():
+    from unittest.mock import MagicMock
+    from src.utils.api import MonzoAPIClient
+
+    client = MonzoAPIClient.__new__(MonzoAPIClient)
+    client.base_url = 'https://api.monzo.com'
+    client.account_id = 'acc_0001'
+    client.headers = {}
+    client.session = MagicMock()
+
+    all_transactions = [{'id': f'tx_{i:04d}', 'counterparty': {}} for i in range(5)]
+
+    def fake_get(url, headers=None, params=None):
+        start = 0
+        if params['since'] != '2025-01-01T00:00:00Z':
+            start = int(params['since'].split('_')[1]) + 1
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'transactions': all_transactions[start:start + params['limit']]}
+        return response
+
+    client.session.get.side_effect = fake_get
+    pages = list(client.iter_transactions(since='2025-01-01T00:00:00Z', page_size=2))
+    mock_get = client.session.get
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [tx['id'] for page in pages for tx in page] == [tx['id'] for tx in all_transactions]
+    assert mock_get.call_args_list[1].kwargs['params']['since'] == 'tx_0001'
+
+
+def test_async_extract_data_fetches_windows_concurrently(mock_logger):
+    import threading
+    from datetime import datetime, timedelta
+    from unittest.mock import MagicMock
+
+    # Each window's request waits until all three are in flight, so a sequential fetch fails on the barrier
+    barrier = threading.Barrier(3, timeout=5)
+    in_flight = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+
+    def get_transactions_page(limit, since=None, before=None):
+        with lock:
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        barrier.wait()
+        with lock:
+            in_flight['now'] -= 1
+        return {'transactions': [{'id': f'tx_{since:%Y%m%d}'}, {'id': 'tx_boundary'}]}
+
+    monzo_client = MagicMock()
+    monzo_client._get_transactions_page.side_effect = get_transactions_page
+    monzo_client._extract_merchant_info.side_effect = lambda page: page['transactions']
+    monzo_client.get_balance.return_value = {'balance': 100}
+    monzo_client.list_pots.return_value = {'pots': []}
+
+    extractor = MonzoDataExtractor.__new__(MonzoDataExtractor)
+    extractor.logger = mock_logger
+    extractor.monzo_client = monzo_client
+    extractor.use_async = True
+    extractor.window_days = 10
+    extractor.as_rows = False
+
+    data = extractor.extract_data(since=datetime.now() - timedelta(days=25))
+
+    assert monzo_client._get_transactions_page.call_count == 3
+    assert in_flight['max'] == 3
+    assert len(data['transactions']) == 4
+    assert data['balance'] == {'balance': 100}
+
+
+def test_monzo_api_client_ignores_access_token_in_environment(monkeypatch):
+    import pytest
+    from unittest.mock import patch
+    from src.utils.api import MonzoAPIClient
+
+    monkeypatch.setenv('MONZO_ACCESS_TOKEN', 'stale-token')
+    monkeypatch.setenv('MONZO_ACCOUNT_ID', 'acc_0001')
+    with patch('src.utils.api.api_client.get_secret', side_effect=RuntimeError('secret not found')) as get_secret:
+        with pytest.raises(RuntimeError):
+            MonzoAPIClient()
+    get_secret.assert_called_once()
+
+
+def test_iter_transactions_against_fake_server_with_rate_limit_bursts():
+    from datetime import datetime
+    from benchmarks.fake_monzo_server import FakeMonzoServer
+    from benchmarks.generate import generate_transactions
+    from src.utils.api import MonzoAPIClient
+    from src.utils.api.http_session import MonzoSession
+
+    raw = [transaction for batch in generate_transactions(250, seed=7) for transaction in batch]
+    with FakeMonzoServer(transactions=raw, burst_every=2, burst_length=1, retry_after=0) as server:
+        client = MonzoAPIClient(session=MonzoSession(max_retries=3, backoff_factor=0),
+                                base_url=server.url, access_token='fake-token', account_id=server.account_id)
+        pages = list(client.iter_transactions(since=datetime(2019, 1, 1), as_rows=True))
+        before = raw[150]['created']
+        windowed = list(client.iter_transactions(since=datetime(2019, 1, 1), before=before))
+
+    assert [len(page) for page in pages] == [100, 100, 50]
+    assert [row[0] for page in pages for row in page] == [transaction['id'] for transaction in raw]
+    assert sum(len(page) for page in windowed) == 150
+    assert server.status_counts[429] >= 2
+
+
+@pytest.mark.parametrize('use_async', [True, False])
+def test_extract_accounts_loads_every_discovered_account(mock_logger, tmp_path, use_async):
+    import sqlite3
+    from datetime import datetime
+    from benchmarks.fake_monzo_server import FakeMonzoServer
+    from benchmarks.generate import generate_transactions
+    from src.load.load import MonzoBronzeDataLoader
+    from src.utils.api import MonzoAPIClient
+    from src.utils.api.http_session import MonzoSession
+    from src.utils.initialise_database import initialise_database
+
+    raw = [transaction for batch in generate_transactions(120, seed=1, account_id='acc_personal') for transaction in batch]
+    raw += [transaction for batch in generate_transactions(30, seed=2, account_id='acc_joint') for transaction in batch]
+    db_path = str(tmp_path / "accounts.db")
+    initialise_database(database_path=db_path)
+
+    with FakeMonzoServer(transactions=raw, account_id='acc_personal') as server:
+        extractor = MonzoDataExtractor.__new__(MonzoDataExtractor)
+        extractor.logger = mock_logger
+        extractor.monzo_client = MonzoAPIClient(session=MonzoSession(backoff_factor=0), base_url=server.url,
+                                                access_token='fake-token', account_id='acc_personal')
+        extractor.transactions_days_back = 30
+        extractor.use_async = use_async
+        extractor.window_days = None
+        extractor.as_rows = True
+
+        account_ids = extractor.discover_accounts()
+        extracted = extractor.extract_accounts({account_id: datetime(2019, 1, 1) for account_id in account_ids})
+
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=mock_logger)
+    for account_id, data in extracted.items():
+        loader.bulk_load_data(data, account_id=account_id)
+
+    assert sorted(account_ids) == ['acc_joint', 'acc_personal']
+    conn = sqlite3.connect(db_path)
+    assert dict(conn.execute("SELECT account_id, COUNT(*) FROM bronze_transactions GROUP BY account_id")) == {
+        'acc_joint': 30, 'acc_personal': 120
+    }
+    assert conn.execute("SELECT COUNT(*) FROM bronze_balance WHERE valid_to IS NULL").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM pipeline_state WHERE state_key LIKE 'transactions:%'").fetchone()[0] == 2
+    conn.close()
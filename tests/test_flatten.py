@@ -0,0 +1,23 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.api.flatten import TRANSACTION_COLUMNS, flatten_transactions
+
+
+def test_flatten_transactions_maps_nested_fields():
+    raw = [
+        {'id': 'tx_0001', 'amount': -450, 'created': '2025-01-02T10:00:00Z', 'counterparty': {},
+         'merchant': {'id': 'merch_01', 'name': 'Cafe', 'address': {'city': 'London'},
+                      'metadata': {'suggested_tags': '#coffee', 'website': 'cafe.example'}}},
+        {'id': 'tx_0002', 'counterparty': None, 'merchant': 'merch_02'}
+    ]
+    rows = [dict(zip(TRANSACTION_COLUMNS, row)) for row in flatten_transactions(raw, date_retrieved='2025-01-03')]
+
+    assert rows[0]['merchant_city'] == 'London'
+    assert rows[0]['merchant_suggested_tags'] == '#coffee'
+    assert rows[0]['merchant_website'] == 'cafe.example'
+    assert rows[0]['merchant_online'] is False
+    assert rows[1]['counterparty_name'] is None
+    assert rows[1]['merchant_id'] is None
+    assert rows[1]['amount'] == 0
+    assert all(row['date_retrieved'] == '2025-01-03' for row in rows)
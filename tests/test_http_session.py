@@ -0,0 +1,40 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.api.http_session import MonzoSession, RateLimiter
+
+
+def test_monzo_session_retries_rate_limited_requests():
+    from unittest.mock import MagicMock, patch
+
+    rate_limited = MagicMock(status_code=429, headers={'Retry-After': '0'})
+    ok = MagicMock(status_code=200, headers={})
+    limiter = RateLimiter(rate=1000, capacity=5)
+    session = MonzoSession(max_retries=3, backoff_factor=0, rate_limiter=limiter)
+
+    with patch.object(session.session, 'request', side_effect=[rate_limited, rate_limited, ok]) as mock_request:
+        response = session.get('https://api.monzo.com/balance')
+
+    assert response is ok
+    assert mock_request.call_count == 3
+    assert session.snapshot_stats() == {'requests': 3, 'retries': 2, 'rate_limited': 2, 'errors': 0}
+
+
+def test_monzo_session_returns_response_when_retry_after_exceeds_budget():
+    from unittest.mock import MagicMock, patch
+
+    rate_limited = MagicMock(status_code=429, headers={'Retry-After': '45'})
+    session = MonzoSession(max_retries=3, max_backoff=1, max_retry_after=60)
+
+    # A Retry-After above max_backoff but within the budget is slept in full
+    with patch.object(session.session, 'request', side_effect=[rate_limited, MagicMock(status_code=200, headers={})]), \
+            patch('src.utils.api.http_session.time.sleep') as sleep:
+        assert session.get('https://api.monzo.com/balance').status_code == 200
+    sleep.assert_called_once_with(45.0)
+
+    rate_limited.headers = {'Retry-After': '3600'}
+    with patch.object(session.session, 'request', return_value=rate_limited) as mock_request, \
+            patch('src.utils.api.http_session.time.sleep') as sleep:
+        assert session.get('https://api.monzo.com/balance') is rate_limited
+    assert mock_request.call_count == 1
+    assert not sleep.called
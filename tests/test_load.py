@@ -65,4 +65,176 @@ def test_load_data(mock_logger, db_connection):
     result = cursor.fetchone()
     
     assert result is not None
-    assert result[0] == 'tx_0001'
\ No newline at end of file
+    assert result[0] == 'tx_0001'
+
+
+def test_bulk_load_data_skips_existing_transactions(mock_logger, tmp_path):
+    from src.utils.initialise_database import initialise_database
+    db_path = str(tmp_path / "bulk.db")
+    initialise_database(database_path=db_path)
+
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=mock_logger)
+    transactions = [
+        {'id': f'tx_{i:04d}', 'amount': -100 * i, 'currency': 'GBP', 'created': f'2025-01-{i:02d}T00:00:00Z'}
+        for i in range(1, 6)
+    ]
+    sample_data = {
+        'transactions': transactions,
+        'balance': {'balance': 100, 'total_balance': 200, 'currency': 'GBP', 'spend_today': 0},
+        'pots': {'pots': [{'id': 'pot_0001', 'balance': 50, 'currency': 'GBP'}]}
+    }
+
+    first = loader.bulk_load_data(sample_data)
+    second = loader.bulk_load_data(sample_data)
+
+    assert (first['inserted'], first['skipped']) == (5, 0)
+    assert (second['inserted'], second['skipped']) == (0, 5)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM bronze_transactions").fetchone()[0] == 5
+    conn.close()
+
+
+def test_bulk_load_data_updates_changed_transactions(mock_logger, tmp_path):
+    from src.utils.initialise_database import initialise_database
+    db_path = str(tmp_path / "upsert.db")
+    initialise_database(database_path=db_path)
+
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=mock_logger)
+    pending = {'id': 'tx_0001', 'amount': -450, 'currency': 'GBP', 'created': '2025-01-01T00:00:00Z', 'settled': None}
+    unchanged = {'id': 'tx_0002', 'amount': -100, 'currency': 'GBP', 'created': '2025-01-02T00:00:00Z'}
+    loader.bulk_load_data({'transactions': [pending, unchanged]})
+
+    conn = sqlite3.connect(db_path)
+    first_retrieved = dict(conn.execute("SELECT id, date_retrieved FROM bronze_transactions"))
+
+    settled = dict(pending, amount=-500, settled='2025-01-03T00:00:00Z', notes='tip included')
+    counts = loader.bulk_load_data({'transactions': [settled, unchanged, settled]})
+
+    assert (counts['inserted'], counts['updated'], counts['skipped']) == (0, 1, 2)
+    row = conn.execute("SELECT amount, settled, notes, date_retrieved FROM bronze_transactions WHERE id = 'tx_0001'").fetchone()
+    assert row[:3] == (-500, '2025-01-03T00:00:00Z', 'tip included')
+    # The changed row is re-staged for the incremental transform, the unchanged one is not
+    assert row[3] > first_retrieved['tx_0001']
+    assert conn.execute("SELECT date_retrieved FROM bronze_transactions WHERE id = 'tx_0002'").fetchone()[0] == first_retrieved['tx_0002']
+    conn.close()
+
+
+def test_bulk_load_data_advances_transactions_watermark(mock_logger, tmp_path):
+    from datetime import datetime
+    from src.utils.initialise_database import initialise_database
+    from src.utils.pipeline_state import resolve_transactions_since
+    db_path = str(tmp_path / "watermark.db")
+    initialise_database(database_path=db_path)
+
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=mock_logger)
+    loader.bulk_load_data({'transactions': [
+        {'id': 'tx_0002', 'amount': -100, 'currency': 'GBP', 'created': '2025-01-02T10:00:00.000Z'},
+        {'id': 'tx_0001', 'amount': -100, 'currency': 'GBP', 'created': '2025-01-01T10:00:00.000Z'}
+    ]}, account_id='acc_0001')
+    # An older window must not move the watermark backwards
+    loader.bulk_load_data({'transactions': [
+        {'id': 'tx_0000', 'amount': -100, 'currency': 'GBP', 'created': '2024-12-01T10:00:00.000Z'}
+    ]}, account_id='acc_0001')
+
+    since = resolve_transactions_since(db_path, 'acc_0001', overlap_hours=24, default_days_back=30)
+    assert since == datetime(2025, 1, 1, 10, 0, 0)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT last_id FROM pipeline_state").fetchone()[0] == 'tx_0002'
+    conn.close()
+
+
+def test_bulk_load_data_keeps_scd2_history_for_pots_and_balance(mock_logger, tmp_path):
+    from src.utils.initialise_database import initialise_database
+    db_path = str(tmp_path / "scd2.db")
+    initialise_database(database_path=db_path)
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=mock_logger)
+
+    def load(pot_balance, balance):
+        return loader.bulk_load_data({
+            'transactions': [],
+            'balance': {'balance': balance, 'total_balance': balance, 'currency': 'GBP', 'spend_today': 0},
+            'pots': {'pots': [
+                {'id': 'pot_0001', 'balance': pot_balance, 'currency': 'GBP'},
+                {'id': 'pot_0002', 'balance': 500, 'currency': 'GBP'}
+            ]}
+        })
+
+    first = load(100, 1000)
+    second = load(100, 1000)
+    third = load(250, 1000)
+
+    assert (first['pots_changed'], first['balance_changed']) == (2, True)
+    assert (second['pots_changed'], second['pots_unchanged'], second['balance_changed']) == (0, 2, False)
+    assert (third['pots_changed'], third['pots_unchanged']) == (1, 1)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM bronze_pots").fetchone()[0] == 3
+    assert conn.execute("SELECT COUNT(*) FROM bronze_balance").fetchone()[0] == 1
+    assert conn.execute("SELECT balance FROM bronze_pots_current WHERE id = 'pot_0001'").fetchone()[0] == 250
+
+    first_version_from, first_version_to = conn.execute(
+        "SELECT valid_from, valid_to FROM bronze_pots WHERE id = 'pot_0001' AND balance = 100"
+    ).fetchone()
+    as_of = conn.execute('''
+        SELECT balance FROM bronze_pots
+        WHERE id = 'pot_0001' AND valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)
+    ''', (first_version_from, first_version_from)).fetchone()
+    assert first_version_to is not None
+    assert as_of[0] == 100
+    conn.close()
+
+
+def test_stream_load_transactions_checkpoints_each_chunk(mock_logger, tmp_path):
+    from src.utils.initialise_database import initialise_database
+    from src.utils.pipeline_state import get_stream_checkpoint
+    from src.utils.api.flatten import flatten_transactions
+    db_path = str(tmp_path / "stream.db")
+    initialise_database(database_path=db_path)
+
+    raw = [{'id': f'tx_{i:04d}', 'amount': -100, 'currency': 'GBP', 'created': f'2025-01-{i + 1:02d}T10:00:00.000Z'}
+           for i in range(7)]
+
+    def interrupted_pages():
+        yield flatten_transactions(raw[:3])
+        yield flatten_transactions(raw[3:5])
+        raise ConnectionError('connection reset')
+
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=mock_logger)
+    with pytest.raises(ConnectionError):
+        loader.stream_load_transactions(interrupted_pages(), account_id='acc_0001', chunk_size=2)
+
+    # The two full chunks are committed; the half-filled third chunk is not
+    checkpoint = get_stream_checkpoint(db_path, 'acc_0001')
+    assert checkpoint['last_id'] == 'tx_0003'
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM bronze_transactions").fetchone()[0] == 4
+    conn.close()
+
+    counts = loader.stream_load_transactions([flatten_transactions(raw[4:])], account_id='acc_0001', chunk_size=2)
+
+    assert counts == {'extracted': 3, 'inserted': 3, 'updated': 0, 'skipped': 0, 'chunks': 2}
+    assert get_stream_checkpoint(db_path, 'acc_0001') is None
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM bronze_transactions").fetchone()[0] == 7
+    assert conn.execute("SELECT last_id FROM pipeline_state WHERE state_key = 'transactions:acc_0001'").fetchone()[0] == 'tx_0006'
+    conn.close()
+
+
+def test_stream_load_transactions_reports_each_committed_chunk(mock_logger, tmp_path):
+    from src.utils.initialise_database import initialise_database
+    from src.utils.api.flatten import flatten_transactions
+    db_path = str(tmp_path / "stream.db")
+    initialise_database(database_path=db_path)
+
+    raw = [{'id': f'tx_{i:04d}', 'amount': -100, 'currency': 'GBP', 'created': f'2025-01-{i + 1:02d}T10:00:00.000Z'}
+           for i in range(5)]
+    committed = []
+
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=mock_logger)
+    loader.stream_load_transactions([flatten_transactions(raw)], account_id='acc_0001', chunk_size=2,
+                                    on_chunk_committed=lambda counts: committed.append(dict(counts)))
+
+    assert [counts['chunks'] for counts in committed] == [1, 2, 3]
+    assert committed[-1]['inserted'] == 5
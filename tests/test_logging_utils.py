@@ -0,0 +1,30 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.logging_utils import Logger
+
+
+def test_logger_attaches_handlers_once_and_uploads_one_gzip_object():
+    import gzip
+    import logging
+    from unittest.mock import MagicMock, patch
+
+    s3_client = MagicMock()
+    with patch('src.utils.logging_utils.get_client', return_value=s3_client):
+        for run in range(3):
+            logger_instance = Logger(None, 'bucket', 'logs', logger_name='test_run_logger', run_id=str(run))
+            logger_instance.logger.info(f'run {run} started')
+            logger_instance.logger.debug('not buffered')
+            logger_instance.upload_log_to_s3()
+
+    assert len(logging.getLogger('test_run_logger').handlers) == 1
+    assert s3_client.put_object.call_count == 3
+    assert not s3_client.upload_file.called
+
+    upload = s3_client.put_object.call_args.kwargs
+    assert upload['Key'].startswith('logs/monzo_etl_') and upload['Key'].endswith('.log.gz')
+    assert upload['ContentEncoding'] == 'gzip'
+    log_text = gzip.decompress(upload['Body']).decode('utf-8')
+    assert 'run 2 started' in log_text
+    assert 'run 1 started' not in log_text
+    assert 'not buffered' not in log_text
@@ -12,17 +12,140 @@ def mock_logger():
     logger.addHandler(logging.NullHandler())
     return logger
 
-@patch('main.MonzoDataExtractor.extract_data')
-@patch('main.MonzoBronzeDataLoader.load_data')
+@patch('main.MonzoDataExtractor')
+@patch('main.MonzoBronzeDataLoader.bulk_load_data')
 @patch('main.transform_bronze_to_silver')
-@patch('main.boto3.client')
-def test_lambda_handler(mock_boto3_client, mock_transform, mock_load_data, mock_extract_data, mock_logger):
-    mock_extract_data.return_value = {'transactions': []}
-    mock_load_data.return_value = None
+@patch('main.DatabaseCache')
+def test_lambda_handler(mock_db_cache, mock_transform, mock_load_data, mock_extractor, mock_logger, monkeypatch, tmp_path):
+    for name, value in {'LOCAL_DB_PATH': str(tmp_path / "monzo.db"), 'LOCAL_LOG_PATH': str(tmp_path / "monzo_etl.log"),
+                        'MONZO_ACCOUNT_IDS': 'acc_0001'}.items():
+        monkeypatch.setenv(name, value)
+    for name in ('PIPELINE_MODE', 'AWS_S3_BUCKET_NAME', 'AWS_S3_RAW_PREFIX', 'LOCAL_RAW_LANDING_PATH',
+                 'AWS_S3_EXPORT_PREFIX'):
+        monkeypatch.delenv(name, raising=False)
+
+    mock_extractor.return_value.account_id = 'acc_0001'
+    mock_extractor.return_value.extract_accounts.return_value = {'acc_0001': {'transactions': []}}
+    mock_load_data.return_value = {'inserted': 0, 'updated': 0, 'skipped': 0}
     mock_transform.return_value = None
-    mock_boto3_client.return_value.upload_file.return_value = None
+    mock_db_cache.return_value.download.return_value = False
+    mock_db_cache.return_value.upload.return_value = None
 
     response = lambda_handler(event=None, context=None)
     
     assert response['statusCode'] == 200
-    assert response['body'] == 'ETL process completed successfully'
\ No newline at end of file
+    assert response['body'] == 'ETL process completed successfully'
+
+
+@patch('main.Logger')
+@patch('main.DatabaseCache')
+def test_lambda_handler_uploads_log_when_run_fails(mock_db_cache, mock_logger_class, monkeypatch):
+    monkeypatch.setenv('LOCAL_DB_PATH', '/tmp/monzo_etl_test.db')
+    mock_db_cache.return_value.download.side_effect = RuntimeError('access denied')
+
+    response = lambda_handler(event=None, context=None)
+
+    assert response['statusCode'] == 500
+    logger_instance = mock_logger_class.return_value
+    logger_instance.logger.exception.assert_called_once()
+    assert 'access denied' in logger_instance.logger.exception.call_args.args[0]
+    logger_instance.upload_log_to_s3.assert_called_once()
+
+
+@patch('main.MonzoDataExtractor')
+@patch('main.DatabaseCache')
+def test_stream_mode_uploads_progress_and_reraises_load_failure(mock_db_cache, mock_extractor, monkeypatch, tmp_path):
+    from types import SimpleNamespace
+    from src.utils.api.flatten import flatten_transactions
+
+    db_path = str(tmp_path / "stream.db")
+    for name, value in {'LOCAL_DB_PATH': db_path, 'PIPELINE_MODE': 'stream', 'STREAM_CHUNK_SIZE': '2',
+                        'STREAM_UPLOAD_EVERY_CHUNKS': '2', 'MONZO_ACCOUNT_IDS': 'acc_0001'}.items():
+        monkeypatch.setenv(name, value)
+    for name in ('AWS_S3_BUCKET_NAME', 'AWS_S3_RAW_PREFIX', 'LOCAL_RAW_LANDING_PATH'):
+        monkeypatch.delenv(name, raising=False)
+
+    raw = [{'id': f'tx_{i:04d}', 'amount': -100, 'currency': 'GBP', 'created': f'2025-01-{i + 1:02d}T10:00:00.000Z'}
+           for i in range(5)]
+
+    def interrupted_pages(since, account_id):
+        yield flatten_transactions(raw)
+        raise ConnectionError('connection reset')
+
+    mock_extractor.return_value.account_id = 'acc_0001'
+    mock_extractor.return_value.stream_transactions.side_effect = interrupted_pages
+    mock_db_cache.return_value.download.return_value = False
+    # The periodic upload after two chunks succeeds, the rescue upload after the failure doesn't
+    mock_db_cache.return_value.upload.side_effect = [None, RuntimeError('s3 unavailable')]
+
+    response = lambda_handler(event=None, context=SimpleNamespace(get_remaining_time_in_millis=lambda: 900000))
+
+    assert response == {'statusCode': 500, 'body': 'Error: connection reset'}
+    assert mock_db_cache.return_value.upload.call_count == 2
+
+
+@patch('main.MonzoDataExtractor')
+@patch('main.DatabaseCache')
+def test_stream_mode_reports_transactions_extracted(mock_db_cache, mock_extractor, monkeypatch, tmp_path):
+    import json
+    from src.utils.api.flatten import flatten_transactions
+
+    metrics_path = str(tmp_path / "metrics.jsonl")
+    for name, value in {'LOCAL_DB_PATH': str(tmp_path / "stream.db"), 'PIPELINE_MODE': 'stream',
+                        'STREAM_CHUNK_SIZE': '2', 'MONZO_ACCOUNT_IDS': 'acc_0001',
+                        'METRICS_LOCAL_PATH': metrics_path}.items():
+        monkeypatch.setenv(name, value)
+    for name in ('AWS_S3_BUCKET_NAME', 'AWS_S3_RAW_PREFIX', 'LOCAL_RAW_LANDING_PATH', 'AWS_S3_EXPORT_PREFIX'):
+        monkeypatch.delenv(name, raising=False)
+
+    raw = [{'id': f'tx_{i:04d}', 'amount': -100, 'currency': 'GBP', 'created': f'2025-01-{i + 1:02d}T10:00:00.000Z'}
+           for i in range(5)]
+    mock_extractor.return_value.account_id = 'acc_0001'
+    mock_extractor.return_value.stream_transactions.side_effect = lambda since, account_id: iter(
+        [flatten_transactions(raw[:3]), flatten_transactions(raw[3:])])
+    mock_extractor.return_value.extract_snapshots.return_value = {'balance': None, 'pots': []}
+    mock_db_cache.return_value.download.return_value = False
+
+    response = lambda_handler(event=None, context=None)
+
+    assert response['statusCode'] == 200
+    with open(metrics_path, 'r') as file:
+        record = json.loads(file.readlines()[-1])
+    assert record['TransactionsExtracted'] == 5
+    assert record['TransactionsInserted'] == 5
+
+
+@patch('main.MonzoDataExtractor')
+@patch('main.DatabaseCache')
+def test_extract_mode_and_window_days_configure_extractor(mock_db_cache, mock_extractor, monkeypatch, tmp_path):
+    for name, value in {'LOCAL_DB_PATH': str(tmp_path / "batch.db"), 'EXTRACT_MODE': 'sync',
+                        'WINDOW_DAYS': '7', 'MONZO_ACCOUNT_IDS': 'acc_0001'}.items():
+        monkeypatch.setenv(name, value)
+    for name in ('PIPELINE_MODE', 'AWS_S3_BUCKET_NAME', 'AWS_S3_RAW_PREFIX', 'LOCAL_RAW_LANDING_PATH',
+                 'AWS_S3_EXPORT_PREFIX'):
+        monkeypatch.delenv(name, raising=False)
+
+    mock_extractor.return_value.account_id = 'acc_0001'
+    mock_extractor.return_value.extract_accounts.return_value = {
+        'acc_0001': {'transactions': [], 'balance': None, 'pots': []}}
+    mock_db_cache.return_value.download.return_value = False
+
+    response = lambda_handler(event=None, context=None)
+
+    assert response['statusCode'] == 200
+    kwargs = mock_extractor.call_args.kwargs
+    assert kwargs['use_async'] is False
+    assert kwargs['window_days'] == 7
+
+
+def test_load_local_env_reads_baked_in_env_file_on_lambda(monkeypatch):
+    import main
+    from unittest.mock import patch
+
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'monzo-etl')
+    monkeypatch.setattr(main, '_local_env_loaded', False)
+    with patch('dotenv.load_dotenv') as load_dotenv:
+        main._load_local_env()
+        main._load_local_env()
+
+    assert load_dotenv.call_count == 1
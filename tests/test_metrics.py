@@ -0,0 +1,30 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.metrics import RunMetrics
+
+
+def test_run_metrics_emits_emf_record(tmp_path, capsys):
+    import json
+
+    metrics_path = str(tmp_path / "metrics.jsonl")
+    metrics = RunMetrics(run_id='2025-01-01-00-00-00', local_path=metrics_path)
+    with metrics.stage('Load'):
+        pass
+    metrics.put('TransactionsInserted', 12)
+    metrics.add('ApiCalls', 2)
+    metrics.add('ApiCalls', 3)
+    metrics.put('BytesUploaded', 4096, 'Bytes')
+    metrics.emit()
+
+    record = json.loads(capsys.readouterr().out.strip())
+    directive = record['_aws']['CloudWatchMetrics'][0]
+    assert directive['Dimensions'] == [['Pipeline']]
+    assert {'Name': 'BytesUploaded', 'Unit': 'Bytes'} in directive['Metrics']
+    assert record['TransactionsInserted'] == 12
+    assert record['ApiCalls'] == 5
+    assert record['LoadSeconds'] >= 0
+    assert record['RunId'] == '2025-01-01-00-00-00'
+
+    with open(metrics_path, 'r') as file:
+        assert json.loads(file.readline()) == record
@@ -0,0 +1,85 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import sqlite3
+import pytest
+from src.replay import replay_runs
+
+
+@pytest.fixture
+def mock_logger():
+    import logging
+    logger = logging.getLogger('test_logger')
+    logger.addHandler(logging.NullHandler())
+    return logger
+
+
+def test_landed_run_replays_without_the_api(mock_logger, tmp_path):
+    from datetime import datetime
+    from benchmarks.fake_monzo_server import FakeMonzoServer
+    from benchmarks.generate import generate_transactions, generate_pots
+    from src.extract.extract import MonzoDataExtractor
+    from src.utils.api.http_session import MonzoSession
+    from src.utils.landing_zone import RawLandingZone, iter_landed_pages, list_landed_runs
+
+    landing_dir = str(tmp_path / "raw")
+    raw = [transaction for batch in generate_transactions(250, seed=5, account_id='acc_replay') for transaction in batch]
+    landing_zone = RawLandingZone(run_id='2025-01-01-06-00-00', local_dir=landing_dir, logger=mock_logger)
+
+    with FakeMonzoServer(transactions=raw, pots=generate_pots(3, seed=5, account_id='acc_replay'), account_id='acc_replay') as server:
+        extractor = MonzoDataExtractor.__new__(MonzoDataExtractor)
+        extractor.logger = mock_logger
+        extractor.monzo_client = server.client(session=MonzoSession(backoff_factor=0), landing_zone=landing_zone)
+        extractor.transactions_days_back = 30
+        extractor.use_async = False
+        extractor.as_rows = True
+        extractor.extract_data(since=datetime(2019, 1, 1))
+    landing_zone.close()
+
+    assert list_landed_runs(landing_dir) == [landing_zone.landed_run_id]
+    assert landing_zone.landed_run_id.startswith('2025-01-01-06-00-00-')
+    endpoints = [page['endpoint'] for page in iter_landed_pages(landing_dir, landing_zone.landed_run_id)]
+    assert endpoints == ['/transactions'] * 3 + ['/balance', '/pots']
+
+    # The fake server is stopped, so any API call during replay would fail
+    db_path = str(tmp_path / "replay.db")
+    first = replay_runs(db_path, mock_logger, landing_dir)
+    second = replay_runs(db_path, mock_logger, landing_dir)
+
+    assert (first['runs'], first['pages'], first['inserted']) == (1, 5, 250)
+    assert (second['inserted'], second['updated'], second['skipped']) == (0, 0, 250)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM silver_transactions WHERE account_id = 'acc_replay'").fetchone()[0] == 250
+    assert conn.execute("SELECT COUNT(*) FROM bronze_balance WHERE valid_to IS NULL").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(DISTINCT id) FROM bronze_pots").fetchone()[0] == 3
+    conn.close()
+
+
+def test_replayed_snapshots_are_dated_by_their_fetch(mock_logger, tmp_path, monkeypatch):
+    from datetime import datetime
+    from benchmarks.generate import generate_pots
+    from src.utils import landing_zone as landing_zone_module
+    from src.utils.landing_zone import RawLandingZone
+
+    class FetchTime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2025, 1, 1, 6, 0, 5)
+
+    landing_dir = str(tmp_path / "raw")
+    landing_zone = RawLandingZone(run_id='2025-01-01-06-00-00', local_dir=landing_dir, logger=mock_logger)
+    monkeypatch.setattr(landing_zone_module, 'datetime', FetchTime)
+    landing_zone.record('/balance', 'acc_replay', {}, {'balance': 100, 'total_balance': 100, 'currency': 'GBP', 'spend_today': 0})
+    landing_zone.record('/pots', 'acc_replay', {}, generate_pots(2, seed=5, account_id='acc_replay'))
+    monkeypatch.undo()
+    landing_zone.close()
+
+    db_path = str(tmp_path / "replay.db")
+    replay_runs(db_path, mock_logger, landing_dir, transform=False)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT valid_from, last_seen FROM bronze_balance").fetchall() == [
+        ('2025-01-01T06:00:05', '2025-01-01T06:00:05')]
+    assert conn.execute("SELECT DISTINCT valid_from FROM bronze_pots").fetchall() == [('2025-01-01T06:00:05',)]
+    conn.close()
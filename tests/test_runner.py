@@ -0,0 +1,140 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.runner import run_tenants, tenant_environment
+
+
+def fake_handler(event, context):
+    """Stand-in for lambda_handler, imported by the spawned workers from this module"""
+    name = os.environ['TENANT_NAME']
+    if name == 'broken':
+        raise RuntimeError('secret not found')
+    if name == 'failing':
+        return {'statusCode': 500, 'body': 'Error: token expired'}
+    # Leaked environment from a tenant previously run by the same worker would show up here
+    return {'statusCode': 200, 'body': f"{os.environ['AWS_S3_DATABASE_NAME']}:{os.environ.get('TRANSACTIONS_DAYS_BACK')}"}
+
+
+class _FileSecretsManager:
+    """Secrets Manager stand-in keeping each secret in a JSON file, so spawned workers share it with the test"""
+    def __init__(self, secrets_dir):
+        self.secrets_dir = secrets_dir
+
+    def get_secret_value(self, SecretId):
+        with open(os.path.join(self.secrets_dir, f'{SecretId}.json'), 'r') as file:
+            return {'SecretString': file.read()}
+
+    def put_secret_value(self, SecretId, SecretString):
+        with open(os.path.join(self.secrets_dir, f'{SecretId}.json'), 'w') as file:
+            file.write(SecretString)
+
+
+def refreshing_handler(event, context):
+    """Refresh the tenant's token the way the pipeline does, against file-backed secrets and a fake token endpoint"""
+    import json
+    from unittest.mock import MagicMock, patch
+    from src.utils.api import MonzoTokenManager
+
+    session = MagicMock()
+    session.post.side_effect = lambda url, data, **kwargs: MagicMock(status_code=200, json=lambda: {
+        'access_token': f"access-for-{data['refresh_token']}", 'refresh_token': f"rotated-{data['refresh_token']}",
+        'expires_in': 21600
+    })
+    dynamodb = MagicMock()
+    dynamodb.Table.return_value.get_item.return_value = {'Item': {'token_id': 'current', 'access_token': 'expired'}}
+
+    with patch('src.utils.api.token_manager.get_client', return_value=_FileSecretsManager(os.environ['FAKE_SECRETS_DIR'])), \
+         patch('src.utils.api.token_manager.get_resource', return_value=dynamodb):
+        manager = MonzoTokenManager('client_id', 'client_secret', os.environ['MONZO_TOKEN_TABLE'], session=session)
+        response = manager.get_valid_token()
+    return {'statusCode': response['statusCode'], 'body': json.loads(response['body']).get('access_token')}
+
+
+def test_tenant_environment_maps_config_to_pipeline_variables(tmp_path):
+    env = tenant_environment({'name': 'alice', 'credentials_secret': 'creds-alice', 'token_table': 'tokens-alice',
+                              'database_key': 'alice/monzo.db', 'env': {'TRANSACTIONS_DAYS_BACK': 7}}, str(tmp_path))
+
+    assert env['MONZO_CREDENTIALS_SECRET'] == 'creds-alice'
+    assert env['MONZO_TOKEN_TABLE'] == 'tokens-alice'
+    assert env['AWS_S3_DATABASE_NAME'] == 'alice/monzo.db'
+    assert env['LOCAL_DB_PATH'] == str(tmp_path / 'alice' / 'monzo.db')
+    assert env['TRANSACTIONS_DAYS_BACK'] == '7'
+
+
+def tenant_config(name, **config):
+    """Tenant config with the required credentials secret, token table and database key"""
+    return {'name': name, 'credentials_secret': f'creds-{name}', 'token_table': f'tokens-{name}',
+            'database_key': f'{name}.db', **config}
+
+
+def test_tenant_environment_rejects_tenant_without_own_credentials(tmp_path):
+    import pytest
+    for key in ('credentials_secret', 'token_table', 'database_key'):
+        tenant = tenant_config('alice')
+        del tenant[key]
+        with pytest.raises(ValueError, match=key):
+            tenant_environment(tenant, str(tmp_path))
+
+    # Nothing is submitted to the pool when any tenant is invalid
+    with pytest.raises(ValueError, match='token_table'):
+        run_tenants([tenant_config('bob'), {'name': 'alice', 'credentials_secret': 'creds', 'database_key': 'a.db'}],
+                    max_workers=1, work_dir=str(tmp_path), handler='test_runner.fake_handler')
+    assert not (tmp_path / 'bob').exists()
+
+
+def test_tenant_environment_gives_each_tenant_its_own_prefixes_and_paths(tmp_path, monkeypatch):
+    monkeypatch.setenv('AWS_S3_RAW_PREFIX', 'raw/')
+    monkeypatch.setenv('AWS_S3_EXPORT_PREFIX', 'export')
+    monkeypatch.setenv('AWS_S3_LOG_PREFIX', 'logs')
+    alice = tenant_environment(tenant_config('alice'), str(tmp_path))
+    bob = tenant_environment(tenant_config('bob', raw_prefix='bob-raw'), str(tmp_path))
+
+    assert alice['LOCAL_RAW_LANDING_PATH'] == str(tmp_path / 'alice' / 'raw')
+    assert bob['LOCAL_RAW_LANDING_PATH'] == str(tmp_path / 'bob' / 'raw')
+    assert alice['LOCAL_EXPORT_PATH'] == str(tmp_path / 'alice' / 'export')
+    assert bob['LOCAL_EXPORT_PATH'] == str(tmp_path / 'bob' / 'export')
+    assert alice['AWS_S3_RAW_PREFIX'] == 'raw/tenant=alice'
+    assert bob['AWS_S3_RAW_PREFIX'] == 'bob-raw'
+    assert (alice['AWS_S3_EXPORT_PREFIX'], bob['AWS_S3_EXPORT_PREFIX']) == ('export/tenant=alice', 'export/tenant=bob')
+    assert (alice['AWS_S3_LOG_PREFIX'], bob['AWS_S3_LOG_PREFIX']) == ('logs/tenant=alice', 'logs/tenant=bob')
+
+
+def test_run_tenants_isolates_failures(tmp_path):
+    tenants = [
+        tenant_config('alice', env={'TRANSACTIONS_DAYS_BACK': 7}),
+        tenant_config('broken'),
+        tenant_config('failing'),
+        tenant_config('bob'),
+    ]
+
+    results, summary = run_tenants(tenants, max_workers=1, work_dir=str(tmp_path),
+                                   handler='test_runner.fake_handler')
+
+    by_name = {result['name']: result for result in results}
+    assert by_name['alice']['status'] == 'succeeded' and by_name['alice']['body'] == 'alice.db:7'
+    assert by_name['bob']['status'] == 'succeeded' and by_name['bob']['body'] == 'bob.db:None'
+    assert by_name['broken']['body'] == 'Error: secret not found'
+    assert by_name['failing']['status_code'] == 500
+    assert summary['succeeded'] == 2
+    assert sorted(summary['failed']) == ['broken', 'failing']
+    assert (tmp_path / 'alice').is_dir()
+
+
+def test_tenants_refresh_tokens_against_their_own_secrets(tmp_path):
+    import json
+    secrets_dir = tmp_path / "secrets"
+    secrets_dir.mkdir()
+    for name in ('alice', 'bob'):
+        (secrets_dir / f'creds-{name}.json').write_text(json.dumps({'monzo_refresh_token': f'{name}-refresh'}))
+
+    tenants = [tenant_config(name, env={'FAKE_SECRETS_DIR': str(secrets_dir)}) for name in ('alice', 'bob')]
+    results, summary = run_tenants(tenants, max_workers=1, work_dir=str(tmp_path / "work"),
+                                   handler='test_runner.refreshing_handler')
+
+    assert summary['succeeded'] == 2
+    assert {result['name']: result['body'] for result in results} == {
+        'alice': 'access-for-alice-refresh', 'bob': 'access-for-bob-refresh'
+    }
+    for name in ('alice', 'bob'):
+        stored = json.loads((secrets_dir / f'creds-{name}.json').read_text())
+        assert stored['monzo_refresh_token'] == f'rotated-{name}-refresh'
@@ -0,0 +1,64 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import pytest
+import sqlite3
+from src.utils.storage_profile import (apply_storage_profile, assign_unowned_rows, connect_database,
+                                       STORAGE_PROFILE_VERSION, PAGE_SIZE)
+
+
+@pytest.fixture
+def mock_logger():
+    import logging
+    logger = logging.getLogger('test_logger')
+    logger.addHandler(logging.NullHandler())
+    return logger
+
+
+def test_apply_storage_profile_adds_indexes_once(mock_logger, tmp_path):
+    db_path = str(tmp_path / "profile.db")
+
+    # A database created before the storage profile existed
+    conn = sqlite3.connect(db_path)
+    for script in ('create_bronze_layer.sql', 'create_silver_layer.sql', 'create_gold_layer.sql'):
+        with open(os.path.join(os.path.dirname(__file__), '..', 'src', 'sql', script)) as file:
+            conn.executescript(file.read())
+    conn.close()
+
+    assert apply_storage_profile(db_path, mock_logger) == STORAGE_PROFILE_VERSION
+    assert apply_storage_profile(db_path, mock_logger) == STORAGE_PROFILE_VERSION
+
+    conn = connect_database(db_path)
+    indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM bronze_transactions WHERE date_retrieved > '2025-01-01'"
+    ).fetchall()
+    assert 'idx_bronze_transactions_date_retrieved' in indexes
+    assert 'idx_bronze_transactions_date_retrieved' in str(plan)
+    assert conn.execute("PRAGMA page_size").fetchone()[0] == PAGE_SIZE
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    conn.close()
+
+
+def test_assign_unowned_rows_backfills_account_without_watermark(mock_logger, tmp_path):
+    from src.utils.initialise_database import initialise_database
+    db_path = str(tmp_path / "unowned.db")
+    initialise_database(database_path=db_path)
+
+    # Rows from before accounts were tracked, in a database that never recorded a watermark
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO bronze_transactions (id, amount, currency, created, account_id) VALUES (?, -100, 'GBP', ?, ?)",
+                     [('tx_0001', '2024-01-01T00:00:00Z', None), ('tx_0002', '2025-01-01T00:00:00Z', 'acc_0002')])
+    conn.execute("INSERT INTO silver_transactions (id, amount, currency, created) VALUES ('tx_0001', -1.0, 'GBP', '2024-01-01T00:00:00Z')")
+    conn.commit()
+    conn.close()
+
+    assert assign_unowned_rows(db_path, 'acc_0001', mock_logger) == 2
+    assert assign_unowned_rows(db_path, 'acc_0001', mock_logger) == 0
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT id, account_id FROM bronze_transactions ORDER BY id").fetchall() == [
+        ('tx_0001', 'acc_0001'), ('tx_0002', 'acc_0002')
+    ]
+    assert conn.execute("SELECT account_id FROM silver_transactions").fetchone()[0] == 'acc_0001'
+    conn.close()
@@ -0,0 +1,45 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import pytest
+from src.utils.api.token_manager import MonzoTokenManager
+
+
+def test_get_valid_token_reuses_unexpired_token():
+    import json
+    from datetime import datetime, timedelta, UTC
+    from unittest.mock import MagicMock, patch
+    from src.utils.api.token_manager import _token_cache
+
+    _token_cache.clear()
+    with patch('src.utils.api.token_manager.get_resource'):
+        manager = MonzoTokenManager('client_id', 'client_secret', 'monzo-tokens', session=MagicMock(), refresh_margin_seconds=300)
+        manager.get_stored_tokens = MagicMock(return_value={
+            'access_token': 'stored_access_token',
+            'expires_at': (datetime.now(UTC) + timedelta(hours=2)).isoformat()
+        })
+        manager.refresh_token = MagicMock()
+
+        first = manager.get_valid_token()
+        second = manager.get_valid_token()
+
+    assert json.loads(first['body'])['access_token'] == 'stored_access_token'
+    assert json.loads(second['body'])['access_token'] == 'stored_access_token'
+    assert manager.get_stored_tokens.call_count == 1
+    manager.refresh_token.assert_not_called()
+    _token_cache.clear()
+
+
+def test_token_refresh_is_not_retried_after_connection_error():
+    import requests
+    from unittest.mock import patch
+    from src.utils.api.http_session import MonzoSession
+
+    session = MonzoSession(max_retries=3, backoff_factor=0)
+    with patch('src.utils.api.token_manager.get_resource'):
+        token_manager = MonzoTokenManager('client', 'secret', 'tokens', session=session)
+
+    with patch.object(session.session, 'request', side_effect=requests.exceptions.ReadTimeout) as mock_request:
+        with pytest.raises(Exception, match='HTTP request failed during token refresh'):
+            token_manager.refresh_token('refresh-token')
+    assert mock_request.call_count == 1
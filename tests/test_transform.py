@@ -67,4 +67,129 @@ def test_transform_bronze_to_silver(mock_logger, db_connection):
     result = cursor.fetchone()
     
     assert result is not None
-    assert result[0] == 'tx_0001'
\ No newline at end of file
+    assert result[0] == 'tx_0001'
+
+
+def test_transform_bronze_to_silver_is_incremental(mock_logger, tmp_path):
+    from src.utils.initialise_database import initialise_database
+    from src.load.load import MonzoBronzeDataLoader
+    db_path = str(tmp_path / "incremental.db")
+    initialise_database(database_path=db_path)
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=mock_logger)
+
+    loader.bulk_load_data({'transactions': [
+        {'id': 'tx_0001', 'amount': -100, 'currency': 'GBP', 'created': '2025-01-01T00:00:00Z', 'merchant_id': 'merch_0001'}
+    ]})
+    assert transform_bronze_to_silver(db_path=db_path, logger=mock_logger) == 1
+    assert transform_bronze_to_silver(db_path=db_path, logger=mock_logger) == 0
+
+    loader.bulk_load_data({'transactions': [
+        {'id': 'tx_0002', 'amount': -200, 'currency': 'GBP', 'created': '2025-01-02T00:00:00Z'}
+    ]})
+    assert transform_bronze_to_silver(db_path=db_path, logger=mock_logger) == 1
+    assert transform_bronze_to_silver(db_path=db_path, logger=mock_logger, full_rebuild=True) == 2
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM silver_transactions").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM silver_merchants").fetchone()[0] == 1
+    conn.close()
+
+
+def test_transform_silver_to_gold_recomputes_touched_months(mock_logger, tmp_path):
+    from src.utils.initialise_database import initialise_database
+    from src.transform.transform import transform_silver_to_gold, rebuild_gold_months
+    db_path = str(tmp_path / "gold.db")
+    initialise_database(database_path=db_path)
+
+    def insert(transaction_id, amount, created, category, change_seq, description=''):
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            INSERT INTO silver_transactions (id, description, amount, currency, created, category, is_load, inserted_at, change_seq)
+            VALUES (?, ?, ?, 'GBP', ?, ?, 0, CURRENT_TIMESTAMP, ?)
+        ''', (transaction_id, description, amount, created, category, change_seq))
+        conn.commit()
+        conn.close()
+
+    insert('tx_0001', -1000, '2025-01-05T10:00:00.000Z', 'groceries', 1)
+    insert('tx_0002', -500, '2025-01-06T10:00:00.000Z', 'eating_out', 1)
+    insert('tx_0003', 20000, '2025-01-07T10:00:00.000Z', 'income', 1)
+    insert('tx_0004', -3000, '2025-01-08T10:00:00.000Z', 'savings', 1, description='pot_0001')
+
+    assert transform_silver_to_gold(db_path=db_path, logger=mock_logger) == [(2025, 1)]
+    assert transform_silver_to_gold(db_path=db_path, logger=mock_logger) == []
+
+    insert('tx_0005', -250, '2025-02-01T10:00:00.000Z', 'groceries', 2)
+    assert transform_silver_to_gold(db_path=db_path, logger=mock_logger) == [(2025, 2)]
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute(
+        "SELECT year, month, total_spend FROM gold_monthly_spending ORDER BY year, month"
+    ).fetchall() == [(2025, 1, 15.0), (2025, 2, 2.5)]
+    assert conn.execute(
+        "SELECT category, total_spend, transaction_count FROM gold_monthly_category_spending WHERE month = 1 ORDER BY category"
+    ).fetchall() == [('eating_out', 5.0, 1), ('groceries', 10.0, 1)]
+
+    conn.execute("DELETE FROM gold_monthly_spending")
+    conn.commit()
+    assert rebuild_gold_months(db_path, mock_logger, '2024-12', '2025-02') == [(2024, 12), (2025, 1), (2025, 2)]
+    assert conn.execute("SELECT COUNT(*) FROM gold_monthly_spending").fetchone()[0] == 2
+    conn.close()
+
+
+def test_silver_changes_within_the_same_second_reach_gold(mock_logger, tmp_path):
+    from src.utils.initialise_database import initialise_database
+    from src.load.load import MonzoBronzeDataLoader
+    from src.transform.transform import transform_silver_to_gold
+    db_path = str(tmp_path / "same_second.db")
+    initialise_database(database_path=db_path)
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=mock_logger)
+
+    # Each load, transform and gold refresh runs well within one second of the last
+    loader.bulk_load_data({'transactions': [
+        {'id': 'tx_0001', 'amount': -100, 'currency': 'GBP', 'created': '2025-01-01T00:00:00Z'}
+    ]})
+    transform_bronze_to_silver(db_path=db_path, logger=mock_logger)
+    assert transform_silver_to_gold(db_path=db_path, logger=mock_logger) == [(2025, 1)]
+
+    loader.bulk_load_data({'transactions': [
+        {'id': 'tx_0002', 'amount': -200, 'currency': 'GBP', 'created': '2025-02-01T00:00:00Z'}
+    ]})
+    transform_bronze_to_silver(db_path=db_path, logger=mock_logger)
+    assert transform_silver_to_gold(db_path=db_path, logger=mock_logger) == [(2025, 2)]
+
+    loader.bulk_load_data({'transactions': [
+        {'id': 'tx_0001', 'amount': -150, 'currency': 'GBP', 'created': '2025-01-01T00:00:00Z'}
+    ]})
+    transform_bronze_to_silver(db_path=db_path, logger=mock_logger)
+    assert transform_silver_to_gold(db_path=db_path, logger=mock_logger) == [(2025, 1)]
+    assert transform_silver_to_gold(db_path=db_path, logger=mock_logger) == []
+
+
+def test_transaction_moved_to_another_month_leaves_old_month_in_gold(mock_logger, tmp_path):
+    from src.utils.initialise_database import initialise_database
+    from src.load.load import MonzoBronzeDataLoader
+    from src.transform.transform import transform_silver_to_gold
+    db_path = str(tmp_path / "moved.db")
+    initialise_database(database_path=db_path)
+    loader = MonzoBronzeDataLoader(db_path=db_path, logger=mock_logger)
+
+    loader.bulk_load_data({'transactions': [
+        {'id': 'tx_0001', 'amount': -100, 'currency': 'GBP', 'created': '2025-01-31T23:30:00Z'},
+        {'id': 'tx_0002', 'amount': -200, 'currency': 'GBP', 'created': '2025-01-15T10:00:00Z'}
+    ]})
+    transform_bronze_to_silver(db_path=db_path, logger=mock_logger)
+    assert transform_silver_to_gold(db_path=db_path, logger=mock_logger) == [(2025, 1)]
+
+    # The transaction settles with a corrected date in the next month
+    loader.bulk_load_data({'transactions': [
+        {'id': 'tx_0001', 'amount': -100, 'currency': 'GBP', 'created': '2025-02-01T00:30:00Z'}
+    ]})
+    transform_bronze_to_silver(db_path=db_path, logger=mock_logger)
+    assert transform_silver_to_gold(db_path=db_path, logger=mock_logger) == [(2025, 1), (2025, 2)]
+    assert transform_silver_to_gold(db_path=db_path, logger=mock_logger) == []
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute(
+        "SELECT year, month, total_spend FROM gold_monthly_spending ORDER BY year, month"
+    ).fetchall() == [(2025, 1, 2.0), (2025, 2, 1.0)]
+    conn.close()